@@ -0,0 +1,379 @@
+# Full-rerun benchmark for progress_tracker/app.py.
+#
+# Generates synthetic histories, runs the script headlessly with Streamlit's
+# AppTest and reports cold/warm rerun time, time spent loading and saving
+# tracker data, figure construction time and peak memory. With --sheets the
+# same scenarios run in Google Sheets mode against an in-memory fake gspread
+# (benchmarks/fake_gspread.py) and the Sheets API calls per load, rerun and
+# save are reported.
+#
+#   python benchmarks/bench_app.py
+#   python benchmarks/bench_app.py --sizes year decade --backend csv sqlite --sheets --json bench.json
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+import fake_gspread
+from progress_tracker.datastore import TrackerData
+from progress_tracker.digest import DEFAULT_FEEDS
+from progress_tracker.storage import BOOK_COLUMNS, DEFAULT_DATA_COLUMNS, ENTERTAINMENT_COLUMNS
+
+# name: (days of history, books, watchlist items)
+SIZES = {
+    "month": (30, 10, 10),
+    "year": (365, 50, 50),
+    "decade": (3650, 2000, 2000),
+}
+LEARNING_TYPES = ["None", "German A1.3", "Data Science / Software"]
+SAVE_LABEL = "Save Today"
+NOTES_LABEL = "Notes (optional)"
+FINISH_BOOK_LABEL = "Mark book as finished"
+
+
+# -------- Synthetic data --------
+def make_lists(n_books, n_items, rng):
+    books = pd.DataFrame({
+        "title": [f"Book {i:05d}" for i in range(n_books)],
+        "finished": [int(rng.random() < 0.5) for _ in range(n_books)],
+    })
+    items = pd.DataFrame({
+        "title": [f"Title {i:05d}" for i in range(n_items)],
+        "item_type": [rng.choice(["Movie", "Series"]) for _ in range(n_items)],
+        "finished": [int(rng.random() < 0.5) for _ in range(n_items)],
+    })
+    return books, items
+
+
+def make_history(days, books, items, rng):
+    end = date.today() - timedelta(days=1)
+    book_titles = books["title"].tolist() or [""]
+    item_titles = items["title"].tolist() or [""]
+    rows = []
+    for i in range(days):
+        row = {"date": str(end - timedelta(days=days - 1 - i))}
+        for activity, p, max_minutes in [
+            ("work", 0.7, 600), ("gym", 0.4, 120), ("learning", 0.5, 180),
+            ("reading", 0.5, 120), ("entertainment", 0.5, 240),
+        ]:
+            done = int(rng.random() < p)
+            row[activity] = done
+            row[f"{activity}_minutes"] = rng.randrange(15, max_minutes + 1, 15) if done else 0
+        row["learning_type"] = rng.choice(LEARNING_TYPES[1:]) if row["learning"] else "None"
+        row["reading_book"] = rng.choice(book_titles) if row["reading"] else ""
+        row["entertainment_item"] = rng.choice(item_titles) if row["entertainment"] else ""
+        row["mood"] = rng.randint(1, 5)
+        row["notes"] = rng.choice(["", "", "", "busy day", "felt good"])
+        rows.append(row)
+    return pd.DataFrame(rows, columns=DEFAULT_DATA_COLUMNS)
+
+
+def _sheet_values(frame, columns):
+    return [list(columns)] + [["" if v is None else str(v) for v in row] for row in frame[columns].itertuples(index=False, name=None)]
+
+
+def prepare_workdir(size, sheets, seed):
+    days, n_books, n_items = SIZES[size]
+    rng = random.Random(seed)
+    books, items = make_lists(n_books, n_items, rng)
+    history = make_history(days, books, items, rng)
+
+    workdir = tempfile.mkdtemp(prefix=f"tracker-bench-{size}-")
+    package = os.path.join(workdir, "progress_tracker")
+    os.makedirs(package)
+    # Only the script is copied: its paths resolve to this directory while the
+    # progress_tracker modules come from the checkout (already imported here).
+    shutil.copy(os.path.join(ROOT, "progress_tracker", "app.py"), package)
+
+    # A fresh digest snapshot so no feed is fetched during the run
+    snapshot = {
+        "fetched_at": time.time(),
+        "urls": [url for url, _ in DEFAULT_FEEDS],
+        "feeds": {
+            url: {"source": source, "etag": None, "modified": None, "entries": [
+                {"title": f"{source} headline {i}", "link": "#", "source": source, "published": str(date.today())}
+                for i in range(4)
+            ]}
+            for url, source in DEFAULT_FEEDS
+        },
+    }
+    with open(os.path.join(package, "digest_cache.json"), "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+    spreadsheet = None
+    if sheets:
+        # Fresh deployment: nothing on disk, everything in the sheet
+        spreadsheet = fake_gspread.FakeSpreadsheet()
+        spreadsheet.seed("data", _sheet_values(history, DEFAULT_DATA_COLUMNS))
+        spreadsheet.seed("books", _sheet_values(books, BOOK_COLUMNS))
+        spreadsheet.seed("entertainment", _sheet_values(items, ENTERTAINMENT_COLUMNS))
+    else:
+        history.to_csv(os.path.join(package, "data.csv"), index=False)
+        books.to_csv(os.path.join(package, "books.csv"), index=False)
+        items.to_csv(os.path.join(package, "entertainment.csv"), index=False)
+    return workdir, package, spreadsheet
+
+
+# -------- Instrumentation --------
+# TrackerData sits under load_data/load_books/load_aggregates/load_analytics and every save_*
+# helper in app.py, and figures are built with plotly.express, so wrapping
+# those attributes times the same work without editing the script.
+_LOAD_METHODS = ["frame", "aggregates", "analytics"]
+_SAVE_METHODS = ["save_checkin", "save_checkins", "replace", "add_item", "finish_item"]
+_FIGURE_FUNCTIONS = ["bar", "line", "pie", "area", "scatter", "histogram"]
+
+
+class Probe:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._patches = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.seconds = {"load": 0.0, "save": 0.0, "figures": 0.0, "plotly_chart": 0.0}
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.seconds)
+
+    def _wrap(self, owner, attr, bucket):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            # The write-behind worker pushes from its own thread; only reruns are timed
+            if threading.current_thread().name == "sheets-sync":
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.seconds[bucket] += time.perf_counter() - start
+
+        setattr(owner, attr, timed)
+        self._patches.append((owner, attr, original))
+
+    def install(self):
+        for name in _LOAD_METHODS:
+            self._wrap(TrackerData, name, "load")
+        for name in _SAVE_METHODS:
+            self._wrap(TrackerData, name, "save")
+        for name in _FIGURE_FUNCTIONS:
+            self._wrap(px, name, "figures")
+        self._wrap(st, "plotly_chart", "plotly_chart")
+
+    def uninstall(self):
+        while self._patches:
+            owner, attr, original = self._patches.pop()
+            setattr(owner, attr, original)
+
+
+# -------- Runs --------
+def _new_app(package, backend, sheets, timeout):
+    # AppTest resets logging on every run; keep cache warnings out of the report
+    set_log_level("error")
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(package, "app.py"), default_timeout=timeout)
+    at.secrets["storage_backend"] = backend
+    if sheets:
+        at.secrets["sheet_id"] = "fake-sheet"
+        at.secrets["gcp_service_account_json"] = "{}"
+    return at
+
+
+def _run(at, probe, button=None, notes=None):
+    if notes is not None:
+        # A different note each time, so every save changes today's row
+        next(t for t in at.text_input if t.label == NOTES_LABEL).input(notes)
+    if button is not None:
+        next(b for b in at.button if b.label == button).click()
+    probe.reset()
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"Script raised: {[e.value for e in at.exception]}")
+    return elapsed, probe.snapshot()
+
+
+def _wait_synced(package, timeout=60):
+    journal = os.path.join(package, "sync_journal.json")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with open(journal, encoding="utf-8") as f:
+                if not json.load(f).get("pending"):
+                    return True
+        except (OSError, ValueError):
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _settled_calls(package, sheets):
+    if not sheets:
+        return None
+    _wait_synced(package)
+    calls = fake_gspread.snapshot_calls()
+    fake_gspread.reset_calls()
+    return calls
+
+
+def _summary(samples):
+    times = [t for t, _ in samples]
+    buckets = {k: statistics.median(s[k] for _, s in samples) for k in samples[0][1]}
+    return {"seconds": statistics.median(times), "min_seconds": min(times), **{f"{k}_seconds": v for k, v in buckets.items()}}
+
+
+def _median_calls(calls):
+    if calls[0] is None:
+        return None
+    names = sorted({name for c in calls for name in c})
+    return {name: statistics.median(c.get(name, 0) for c in calls) for name in names}
+
+
+def run_scenario(size, backend, sheets, repeat, memory, seed, timeout):
+    workdir, package, spreadsheet = prepare_workdir(size, sheets, seed)
+    restore = fake_gspread.install(spreadsheet) if sheets else None
+    fake_gspread.reset_calls()
+    probe = Probe()
+    probe.install()
+    try:
+        at = _new_app(package, backend, sheets, timeout)
+        cold = _run(at, probe)
+        cold_calls = _settled_calls(package, sheets)
+
+        warm, warm_calls = [], []
+        for _ in range(repeat):
+            warm.append(_run(at, probe))
+            warm_calls.append(_settled_calls(package, sheets))
+
+        saves, save_calls = [], []
+        for i in range(repeat):
+            saves.append(_run(at, probe, SAVE_LABEL, notes=f"bench save {i}"))
+            save_calls.append(_settled_calls(package, sheets))
+
+        finish, finish_calls = None, None
+        if any(b.label == FINISH_BOOK_LABEL for b in at.button):
+            finish = _run(at, probe, FINISH_BOOK_LABEL)
+            finish_calls = _settled_calls(package, sheets)
+
+        peak = None
+        if memory:
+            # Separate cold start + rerun, since tracemalloc slows everything down
+            _settled_calls(package, sheets)
+            at = _new_app(package, backend, sheets, timeout)
+            tracemalloc.start()
+            try:
+                _run(at, probe)
+                _run(at, probe)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            _settled_calls(package, sheets)
+    finally:
+        probe.uninstall()
+        if restore is not None:
+            restore()
+        st.cache_resource.clear()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    days, n_books, n_items = SIZES[size]
+    return {
+        "size": size,
+        "backend": backend,
+        "sheets": sheets,
+        "days": days,
+        "books": n_books,
+        "watchlist": n_items,
+        "cold": _summary([cold]),
+        "warm": _summary(warm),
+        "save": _summary(saves),
+        "finish_book": _summary([finish]) if finish else None,
+        "peak_memory_mb": round(peak / 2**20, 1) if peak is not None else None,
+        "api_calls": None if not sheets else {
+            "load": cold_calls,
+            "rerun": _median_calls(warm_calls),
+            "save": _median_calls(save_calls),
+            "finish_book": finish_calls,
+        },
+    }
+
+
+# -------- Report --------
+def _ms(value):
+    return f"{value * 1000:9.1f}"
+
+
+def _total_calls(calls):
+    return "-" if calls is None else str(int(sum(calls.values())))
+
+
+def print_report(results):
+    header = (
+        f"{'scenario':<22} {'cold ms':>9} {'warm ms':>9} {'save ms':>9} {'load ms':>9} "
+        f"{'store ms':>9} {'figs ms':>9} {'chart ms':>9} {'peak MB':>8} {'calls load/rerun/save/finish':>29}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        name = f"{r['size']}/{r['backend']}" + ("+sheets" if r["sheets"] else "")
+        calls = r["api_calls"] or {}
+        call_text = "/".join(_total_calls(calls.get(k)) for k in ["load", "rerun", "save", "finish_book"]) if calls else "-"
+        peak = f"{r['peak_memory_mb']:8.1f}" if r["peak_memory_mb"] is not None else f"{'-':>8}"
+        print(
+            f"{name:<22} {_ms(r['cold']['seconds'])} {_ms(r['warm']['seconds'])} {_ms(r['save']['seconds'])} "
+            f"{_ms(r['warm']['load_seconds'])} {_ms(r['save']['save_seconds'])} {_ms(r['warm']['figures_seconds'])} "
+            f"{_ms(r['warm']['plotly_chart_seconds'])} {peak} {call_text:>29}"
+        )
+    print("\nwarm/save are medians; load/figs/chart are per warm rerun, store is the save itself.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark full reruns of progress_tracker/app.py")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--backend", nargs="+", choices=["csv", "sqlite"], default=["csv"])
+    parser.add_argument("--sheets", action="store_true", help="also run each scenario in Google Sheets mode (fake gspread)")
+    parser.add_argument("--sheets-only", action="store_true", help="only run Google Sheets mode")
+    parser.add_argument("--repeat", type=int, default=5, help="warm reruns and saves per scenario")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=300, help="per-run AppTest timeout in seconds")
+    parser.add_argument("--json", help="write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    modes = [True] if args.sheets_only else ([False, True] if args.sheets else [False])
+    results = []
+    for size in args.sizes:
+        for backend in args.backend:
+            for sheets in modes:
+                print(f"running {size}/{backend}{'+sheets' if sheets else ''} ...", file=sys.stderr, flush=True)
+                results.append(run_scenario(size, backend, sheets, args.repeat, not args.no_memory, args.seed, args.timeout))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
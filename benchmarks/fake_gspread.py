@@ -0,0 +1,235 @@
+import re
+import threading
+import time
+from collections import Counter
+
+import gspread
+from gspread.utils import a1_to_rowcol, numericise_all
+
+# In-memory stand-in for the parts of gspread the tracker uses. Every method
+# that would be an HTTP request to the Sheets API is counted in CALLS.
+CALLS = Counter()
+_lock = threading.Lock()
+
+
+def _count(name):
+    with _lock:
+        CALLS[name] += 1
+
+
+def reset_calls():
+    with _lock:
+        CALLS.clear()
+
+
+def snapshot_calls():
+    with _lock:
+        return dict(CALLS)
+
+
+def _start(range_name):
+    cell = (range_name or "A1").split("!")[-1].split(":")[0]
+    if not re.match(r"^[A-Z]+\d+$", cell):
+        cell = f"{cell}1"
+    return a1_to_rowcol(cell)
+
+
+def _end_row(range_name):
+    # Last row of an A1 range such as A2:P9, or None when the rows are open-ended
+    cells = range_name.split("!")[-1]
+    if ":" not in cells:
+        return _start(range_name)[0]
+    digits = re.sub(r"[A-Z]", "", cells.split(":")[1])
+    return int(digits) if digits else None
+
+
+class _ErrorResponse:
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text, "status": "INVALID_ARGUMENT"}}
+
+
+class FakeWorksheet:
+    def __init__(self, title, rows=1000, cols=26, values=None, spreadsheet=None):
+        self.title = title
+        self._spreadsheet = spreadsheet
+        self.row_count = rows
+        self.col_count = cols
+        self._values = [[str(v) for v in row] for row in (values or [])]
+        self.row_count = max(self.row_count, len(self._values))
+
+    def _trimmed(self):
+        values = self._values
+        while values and not any(v != "" for v in values[-1]):
+            values = values[:-1]
+        width = max((len(r) for r in values), default=0)
+        return [r + [""] * (width - len(r)) for r in values]
+
+    def _touch(self):
+        if self._spreadsheet is not None:
+            self._spreadsheet.touch()
+
+    def _set(self, row, col, value):
+        self._touch()
+        while len(self._values) < row:
+            self._values.append([])
+        cells = self._values[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = "" if value is None else str(value)
+
+    def _write(self, range_name, values):
+        row, col = _start(range_name)
+        if row - 1 + len(values) > self.row_count:
+            raise gspread.exceptions.GSpreadException("Range exceeds grid limits")
+        for i, cells in enumerate(values):
+            for j, value in enumerate(cells):
+                self._set(row + i, col + j, value)
+
+    def get_all_values(self, **kwargs):
+        _count("get_all_values")
+        return self._trimmed()
+
+    def get_all_records(self, **kwargs):
+        _count("get_all_records")
+        values = self._trimmed()
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, numericise_all(row))) for row in values[1:]]
+
+    def row_values(self, row, **kwargs):
+        _count("row_values")
+        values = self._trimmed()
+        return list(values[row - 1]) if row <= len(values) else []
+
+    def update(self, values=None, range_name=None, **kwargs):
+        _count("update")
+        self._write(range_name, values)
+
+    def update_cell(self, row, col, value):
+        _count("update_cell")
+        self._set(row, col, value)
+
+    def batch_update(self, data, **kwargs):
+        _count("batch_update")
+        for item in data:
+            self._write(item["range"], item["values"])
+
+    def append_row(self, values, **kwargs):
+        _count("append_row")
+        self._touch()
+        self._values = self._trimmed() + [[str(v) for v in values]]
+        self.row_count = max(self.row_count, len(self._values))
+
+    def append_rows(self, values, **kwargs):
+        _count("append_rows")
+        self._touch()
+        self._values = self._trimmed() + [[str(v) for v in row] for row in values]
+        self.row_count = max(self.row_count, len(self._values))
+
+    def add_rows(self, rows):
+        _count("add_rows")
+        self.row_count += rows
+
+    def resize(self, rows=None, cols=None):
+        _count("resize")
+        if rows is not None:
+            self.row_count = rows
+            self._values = self._values[:rows]
+
+    def clear(self):
+        _count("clear")
+        self._touch()
+        self._values = []
+
+
+class FakeSpreadsheet:
+    def __init__(self, id="fake-sheet"):
+        self.id = id
+        self.sheets = {}
+        self.revision = 0
+
+    def touch(self):
+        self.revision += 1
+
+    def seed(self, title, values, rows=None):
+        self.sheets[title] = FakeWorksheet(
+            title, rows=rows or max(len(values) + 100, 1000), values=values, spreadsheet=self
+        )
+        self.touch()
+        return self.sheets[title]
+
+    def worksheet(self, title):
+        _count("worksheet")
+        if title not in self.sheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def worksheets(self):
+        _count("worksheets")
+        return list(self.sheets.values())
+
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        _count("add_worksheet")
+        self.sheets[title] = FakeWorksheet(title, rows, cols, spreadsheet=self)
+        self.touch()
+        return self.sheets[title]
+
+    def values_batch_get(self, ranges, params=None):
+        # Like the API: a range on a missing worksheet fails the whole request,
+        # and empty ranges come back without "values"
+        _count("values_batch_get")
+        out = []
+        for range_name in ranges:
+            title, _, cells = range_name.rpartition("!")
+            ws = self.sheets.get(title.strip("'"))
+            if ws is None:
+                raise gspread.exceptions.APIError(_ErrorResponse(400, f"Unable to parse range: {range_name}"))
+            row, _ = _start(cells) if cells else (1, 1)
+            end = _end_row(range_name) if cells else None
+            values = ws._trimmed()[row - 1:end]
+            out.append({"range": range_name, "values": values} if values else {"range": range_name})
+        return {"valueRanges": out}
+
+    def get_lastUpdateTime(self):
+        _count("get_lastUpdateTime")
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(0)) + f".{self.revision:06d}Z"
+
+    def fetch_sheet_metadata(self, params=None):
+        _count("fetch_sheet_metadata")
+        return {"sheets": [
+            {"properties": {"title": t, "gridProperties": {"rowCount": ws.row_count, "columnCount": ws.col_count}}}
+            for t, ws in self.sheets.items()
+        ]}
+
+
+class FakeClient:
+    def __init__(self, spreadsheet):
+        self._spreadsheet = spreadsheet
+
+    def set_timeout(self, timeout=None):
+        self.timeout = timeout
+
+    def open_by_key(self, key):
+        _count("open_by_key")
+        return self._spreadsheet
+
+
+def install(spreadsheet):
+    # Route gspread.service_account_from_dict to the fake; returns an undo function
+    original = gspread.service_account_from_dict
+
+    def service_account_from_dict(info, *args, **kwargs):
+        _count("service_account_from_dict")
+        return FakeClient(spreadsheet)
+
+    gspread.service_account_from_dict = service_account_from_dict
+
+    def restore():
+        gspread.service_account_from_dict = original
+
+    return restore
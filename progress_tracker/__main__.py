@@ -0,0 +1,23 @@
+import sys
+
+COMMANDS = ("report", "import", "export")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: python -m progress_tracker {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        print("The app itself runs with: streamlit run progress_tracker/app.py", file=sys.stderr)
+        return 2
+    if argv[0] == "import":
+        from .transfer import import_main
+        return import_main(argv[1:])
+    if argv[0] == "export":
+        from .transfer import export_main
+        return export_main(argv[1:])
+    from .report import main as report
+    return report(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
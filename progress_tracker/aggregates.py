@@ -0,0 +1,262 @@
+import bisect
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+import pandas as pd
+
+ACTIVITIES = ["work", "gym", "learning", "reading", "entertainment"]
+WINDOWS = (7, 14, 30)
+# Text column counted for each activity's distribution chart
+DISTRIBUTIONS = {"learning": "learning_type", "reading": "reading_book", "entertainment": "entertainment_item"}
+# Rollup tables kept per period; "day" reads the check-ins themselves
+ROLLUPS = ("week", "month", "year")
+GRANULARITIES = ("day",) + ROLLUPS
+# Rough resident sizes for memory_bytes(): one stored entry without its text,
+# and one rollup bucket
+ENTRY_BYTES = 1900
+BUCKET_BYTES = 2500
+
+
+def _number(value):
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def _text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def _entry(row):
+    entry = {"date": _text(row.get("date"))[:10], "mood": _number(row.get("mood"))}
+    for activity in ACTIVITIES:
+        entry[activity] = 1 if (_number(row.get(activity)) or 0) >= 1 else 0
+        entry[f"{activity}_minutes"] = _number(row.get(f"{activity}_minutes")) or 0
+    for activity, col in DISTRIBUTIONS.items():
+        entry[col] = _text(row.get(col))
+    return entry
+
+
+def _entry_bytes(entry):
+    return ENTRY_BYTES + sum(len(entry[col]) for col in DISTRIBUTIONS.values())
+
+
+def period_start(day, granularity):
+    # ISO date of the day/week (Monday)/month/year containing day, or None if unparseable
+    try:
+        d = date.fromisoformat(day[:10])
+    except (TypeError, ValueError):
+        return None
+    if granularity == "week":
+        d -= timedelta(days=d.weekday())
+    elif granularity == "month":
+        d = d.replace(day=1)
+    elif granularity == "year":
+        d = d.replace(month=1, day=1)
+    return d.isoformat()
+
+
+def _bucket():
+    return {
+        "days": 0,
+        "counts": dict.fromkeys(ACTIVITIES, 0),
+        "minutes": dict.fromkeys(ACTIVITIES, 0),
+        "mood_sum": 0,
+        "mood_days": 0,
+        "mix": {col: Counter() for col in DISTRIBUTIONS.values()},
+    }
+
+
+def _add(bucket, entry, sign):
+    bucket["days"] += sign
+    for activity in ACTIVITIES:
+        bucket["counts"][activity] += sign * entry[activity]
+        bucket["minutes"][activity] += sign * entry[f"{activity}_minutes"]
+    if entry["mood"] is not None:
+        bucket["mood_sum"] += sign * entry["mood"]
+        bucket["mood_days"] += sign
+    for activity, col in DISTRIBUTIONS.items():
+        if entry[activity] and entry[col]:
+            counter = bucket["mix"][col]
+            counter[entry[col]] += sign
+            if counter[entry[col]] <= 0:
+                del counter[entry[col]]
+
+
+def _summary(period, bucket):
+    days = bucket["days"]
+    row = {"period": period, "days": days}
+    for activity in ACTIVITIES:
+        row[f"{activity}_rate"] = round(bucket["counts"][activity] / days * 100, 1) if days else 0.0
+    for activity in ACTIVITIES:
+        row[f"{activity}_minutes"] = bucket["minutes"][activity]
+    row["mood_mean"] = round(bucket["mood_sum"] / bucket["mood_days"], 2) if bucket["mood_days"] else None
+    for col in ("learning_type", "reading_book"):
+        top = bucket["mix"][col].most_common(1)
+        row[f"top_{col}"] = top[0][0] if top else ""
+    return row
+
+
+# Rolling windows and counters for the insights card and charts. Built once from
+# the full history, then updated per saved check-in; the windows are recomputed
+# from the 30 most recent check-ins only, so reads never scan the history.
+class Aggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dates = []
+        self._counters = {col: Counter() for col in DISTRIBUTIONS.values()}
+        self._totals = dict.fromkeys(ACTIVITIES, 0)
+        self._windows = {}
+        self._recent = []
+        # granularity: {period start: bucket}, with the period starts kept sorted
+        self._rollups = {g: {} for g in ROLLUPS}
+        self._periods = {g: [] for g in ROLLUPS}
+        self._bytes = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        agg = cls()
+        for row in df.to_dict("records"):
+            agg._upsert(_entry(row))
+        agg._refresh()
+        return agg
+
+    def apply(self, row):
+        with self._lock:
+            self._upsert(_entry(row))
+            self._refresh()
+
+    def _upsert(self, entry):
+        # Same date saved again: the old contribution is replaced. A check-in
+        # without a valid ISO date is left out; it has no day to count towards.
+        if period_start(entry["date"], "day") is None:
+            return
+        old = self._entries.get(entry["date"])
+        if old is not None:
+            self._count(old, -1)
+            self._roll(old, -1)
+            self._bytes -= _entry_bytes(old)
+        else:
+            bisect.insort(self._dates, entry["date"])
+        self._entries[entry["date"]] = entry
+        self._bytes += _entry_bytes(entry)
+        self._count(entry, 1)
+        self._roll(entry, 1)
+
+    def _roll(self, entry, sign):
+        for granularity in ROLLUPS:
+            period = period_start(entry["date"], granularity)
+            table = self._rollups[granularity]
+            bucket = table.get(period)
+            if bucket is None:
+                bucket = table[period] = _bucket()
+                bisect.insort(self._periods[granularity], period)
+                self._bytes += BUCKET_BYTES
+            _add(bucket, entry, sign)
+            if bucket["days"] <= 0:
+                del table[period]
+                self._periods[granularity].remove(period)
+                self._bytes -= BUCKET_BYTES
+
+    def _count(self, entry, sign):
+        for activity in ACTIVITIES:
+            self._totals[activity] += sign * entry[activity]
+        for activity, col in DISTRIBUTIONS.items():
+            if entry[activity] and entry[col]:
+                counter = self._counters[col]
+                counter[entry[col]] += sign
+                if counter[entry[col]] <= 0:
+                    del counter[entry[col]]
+
+    def _refresh(self):
+        recent = [self._entries[d] for d in self._dates[-max(WINDOWS):]]
+        windows = {}
+        for n in WINDOWS:
+            rows = recent[-n:]
+            moods = [e["mood"] for e in rows if e["mood"] is not None]
+            windows[n] = {
+                "days": len(rows),
+                "counts": {a: sum(e[a] for e in rows) for a in ACTIVITIES},
+                "minutes": {a: sum(e[f"{a}_minutes"] for e in rows) for a in ACTIVITIES},
+                "mood_mean": sum(moods) / len(moods) if moods else None,
+            }
+        self._windows = windows
+        self._recent = [(e["date"], e["mood"]) for e in recent]
+
+    def memory_bytes(self):
+        # Rough size of the entries and rollups, kept as they change; read
+        # without the lock
+        return self._bytes
+
+    @property
+    def days(self):
+        return len(self._dates)
+
+    def window(self, n):
+        with self._lock:
+            return self._windows.get(n) or {
+                "days": 0, "counts": dict.fromkeys(ACTIVITIES, 0),
+                "minutes": dict.fromkeys(ACTIVITIES, 0), "mood_mean": None,
+            }
+
+    def mood_series(self, n=None):
+        # Last n (date, mood) pairs, or the whole history for n=None
+        with self._lock:
+            if n is not None and n <= max(WINDOWS):
+                return list(self._recent[-n:])
+            dates = self._dates if n is None else self._dates[-n:]
+            return [(d, self._entries[d]["mood"]) for d in dates]
+
+    def total(self, activity):
+        with self._lock:
+            return self._totals[activity]
+
+    def date_range(self):
+        with self._lock:
+            return (self._dates[0], self._dates[-1]) if self._dates else (None, None)
+
+    def _buckets(self, granularity, start, end):
+        # (period, bucket) for periods overlapping [start, end]; bounds are ISO dates or None
+        if granularity == "day":
+            keys, lookup = self._dates, None
+        else:
+            keys, lookup = self._periods[granularity], self._rollups[granularity]
+            start = period_start(start, granularity) if start else None
+        lo = bisect.bisect_left(keys, start) if start else 0
+        hi = bisect.bisect_right(keys, end) if end else len(keys)
+        for key in keys[lo:hi]:
+            if lookup is None:
+                bucket = _bucket()
+                _add(bucket, self._entries[key], 1)
+                yield key, bucket
+            else:
+                yield key, lookup[key]
+
+    def history(self, granularity, start=None, end=None):
+        # One summary row per period, oldest first, read from the rollup tables
+        with self._lock:
+            return [_summary(period, bucket) for period, bucket in self._buckets(granularity, start, end)]
+
+    def mix(self, col, granularity, start=None, end=None):
+        # (label, count) pairs for col over the same periods as history()
+        with self._lock:
+            total = Counter()
+            for _, bucket in self._buckets(granularity, start, end):
+                total.update(bucket["mix"][col])
+            return total.most_common()
+
+    def distribution(self, col):
+        # (label, count) pairs, most common first, like value_counts()
+        with self._lock:
+            return self._counters[col].most_common()
@@ -0,0 +1,128 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import ACTIVITIES
+
+# Fewer paired mood/minutes days than this and no correlation is reported
+MIN_CORRELATION_DAYS = 14
+# Period compared week over week, and the recent window for the learning mix
+TREND_DAYS = 7
+BALANCE_DAYS = 30
+
+
+# Whole-history analytics over the typed check-in frame (coerce_checkins).
+# Everything is column arithmetic on one row per calendar day, so a ten-year
+# history costs the same handful of array passes as a month. TrackerData
+# memoizes the result per storage version and day.
+def daily_frame(df):
+    # One row per calendar day from the first check-in to the last; days
+    # without a check-in count as "not done" and have no mood
+    df = df[df["date"].notna()].drop_duplicates("date", keep="last")
+    if df.empty:
+        return df
+    days = pd.date_range(df["date"].min(), df["date"].max(), freq="D")
+    return df.set_index("date").reindex(days).rename_axis("date")
+
+
+def _streaks(flags, today):
+    # flags: 0/1 per calendar day. Runs are the cumulative sum reset at every
+    # zero; the current run is the one ending today, or yesterday while today
+    # has not been logged yet.
+    done = flags.to_numpy(dtype="int64")
+    total = np.cumsum(done)
+    resets = np.maximum.accumulate(np.where(done == 0, total, 0))
+    runs = total - resets
+    longest = int(runs.max()) if len(runs) else 0
+    last = flags.index[-1].date() if len(flags) else None
+    current = 0
+    if last is not None and last >= today - timedelta(days=1):
+        current = int(runs[-1])
+        if current == 0 and last == today and len(runs) > 1:
+            # Today is logged without this activity (yet); yesterday's run still counts
+            current = int(runs[-2])
+    return {"current": current, "longest": longest}
+
+
+def _period(daily, start, end):
+    window = daily.loc[(daily.index >= start) & (daily.index <= end)]
+    mood = window["mood"].astype("Float64").dropna()
+    return {
+        "days": int(window[ACTIVITIES[0]].notna().sum()),
+        "counts": {a: int(window[a].fillna(0).sum()) for a in ACTIVITIES},
+        "minutes": {a: int(window[f"{a}_minutes"].fillna(0).sum()) for a in ACTIVITIES},
+        "mood_mean": round(float(mood.mean()), 2) if len(mood) else None,
+    }
+
+
+def _trends(daily, today):
+    # This week (the last TREND_DAYS days up to today) against the one before
+    end = pd.Timestamp(today)
+    this = _period(daily, end - pd.Timedelta(days=TREND_DAYS - 1), end)
+    last = _period(daily, end - pd.Timedelta(days=2 * TREND_DAYS - 1), end - pd.Timedelta(days=TREND_DAYS))
+    change = {
+        "counts": {a: this["counts"][a] - last["counts"][a] for a in ACTIVITIES},
+        "minutes": {a: this["minutes"][a] - last["minutes"][a] for a in ACTIVITIES},
+        "mood_mean": (
+            round(this["mood_mean"] - last["mood_mean"], 2)
+            if this["mood_mean"] is not None and last["mood_mean"] is not None else None
+        ),
+    }
+    return {"this_week": this, "last_week": last, "change": change}
+
+
+def _correlations(df):
+    # Pearson r between mood and each activity's minutes over logged days
+    logged = df[df["mood"].notna()]
+    mood = logged["mood"].astype("float64")
+    out = {}
+    for activity in ACTIVITIES:
+        minutes = logged[f"{activity}_minutes"].astype("float64")
+        if len(mood) < MIN_CORRELATION_DAYS or minutes.std() == 0 or mood.std() == 0:
+            out[activity] = None
+            continue
+        r = float(np.corrcoef(minutes.to_numpy(), mood.to_numpy())[0, 1])
+        out[activity] = None if math.isnan(r) else round(r, 2)
+    return out
+
+
+def _mix(rows):
+    # (learning type, share of learning minutes) pairs and their evenness:
+    # Shannon entropy over the maximum for that many types, 1.0 = evenly spread.
+    # Days without minutes count as one minute so they still register.
+    weights = rows["learning_minutes"].astype("int64").clip(lower=1)
+    types = rows["learning_type"].astype(str).str.strip()
+    weights = weights[(types != "") & (types != "None")]
+    if weights.empty:
+        return {"shares": [], "evenness": None}
+    totals = weights.groupby(types[weights.index]).sum().sort_values(ascending=False)
+    shares = totals / totals.sum()
+    if len(shares) < 2:
+        evenness = 0.0
+    else:
+        evenness = float(-(shares * np.log(shares)).sum() / np.log(len(shares)))
+    return {"shares": [(t, round(float(s), 3)) for t, s in shares.items()], "evenness": round(evenness, 2)}
+
+
+def _balance(df, today):
+    learned = df[df["learning"] == 1]
+    recent = learned[learned["date"] > pd.Timestamp(today) - pd.Timedelta(days=BALANCE_DAYS)]
+    return {"all_time": _mix(learned), "recent": _mix(recent)}
+
+
+def analyze(df, today=None):
+    # df: typed check-ins as returned by TrackerData.checkins()
+    today = today or date.today()
+    daily = daily_frame(df)
+    if daily.empty:
+        return None
+    df = daily[daily[ACTIVITIES[0]].notna()].reset_index()
+    return {
+        "days": len(df),
+        "streaks": {a: _streaks(daily[a].fillna(0), today) for a in ACTIVITIES},
+        "trends": _trends(daily, today),
+        "mood_correlation": _correlations(df),
+        "learning_balance": _balance(df, today),
+    }
@@ -1,23 +1,54 @@
 import os
+import sys
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from datetime import date, datetime
+from datetime import date, timedelta
+
+# Session views of the shared frames rely on copy-on-write (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Make the package importable when run as `streamlit run progress_tracker/app.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress_tracker.aggregates import DISTRIBUTIONS
+from progress_tracker.charts import (
+    LEARNING_COLORS, MOOD_RANGES, PIE_CHARTS, PIE_COLORS, completion_figure, distribution_figure,
+    history_figure, history_table, mood_figure, time_figure,
+)
+from progress_tracker.datastore import TrackerData
+from progress_tracker.digest import DEFAULT_FEEDS, DigestCache
+from progress_tracker.profiler import CountedCalls, RerunProfiler
+from progress_tracker.sheets import (
+    SheetPool, compact, hydrate, is_auth_error, is_connection_error, push_worksheet, schedule_hydrate,
+    schedule_refresh,
+)
+from progress_tracker.snapshot import SNAPSHOT_FILE, Snapshot
+from progress_tracker.storage import atomic_write_text, open_store
+from progress_tracker.sync import SyncQueue
+from progress_tracker.tenants import MAX_BYTES, MAX_TENANTS, TenantCache, tenant_dir, tenant_key
+from progress_tracker.ui import (
+    SHEETS_HELP, THEME_CSS, date_header, digest_item, insight_card, pattern_insights, week_insights,
+)
 
 st.set_page_config(page_title="Stress-Proof Tracker", layout="centered", initial_sidebar_state="collapsed")
 
+# -------- Rerun profiler --------
+# Every rerun is timed per section, and storage and Sheets API calls are
+# counted. The debug panel is opt-in (?debug=1, the debug_panel secret or
+# TRACKER_DEBUG); with the metrics_file secret or TRACKER_METRICS_FILE set,
+# Prometheus text is written there after each rerun (node_exporter textfile).
+@st.cache_resource(show_spinner=False)
+def _rerun_profiler():
+    return RerunProfiler()
+
+
+_run = _rerun_profiler().start_run()
+
 # Paths relative to this app file (works when deployed or run from any folder)
 _BASE = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE = os.path.join(_BASE, "data.csv")
-BOOKS_FILE = os.path.join(_BASE, "books.csv")
-ENTERTAINMENT_FILE = os.path.join(_BASE, "entertainment.csv")
-
-DEFAULT_DATA_COLUMNS = [
-    "date", "work", "work_minutes", "gym", "gym_minutes", "learning", "learning_minutes",
-    "learning_type", "reading", "reading_book", "reading_minutes",
-    "entertainment", "entertainment_item", "entertainment_minutes",
-    "mood", "notes"
-]
+DIGEST_CACHE_FILE = os.path.join(_BASE, "digest_cache.json")
+SYNC_JOURNAL_FILE = os.path.join(_BASE, "sync_journal.json")
 
 
 def _use_sheets():
@@ -27,296 +58,373 @@ def _use_sheets():
         return False
 
 
+# -------- Local storage backend --------
+# "csv" (default) or "sqlite", from the storage_backend secret or the
+# TRACKER_STORAGE_BACKEND environment variable. With Google Sheets enabled the
+# local backend is the on-disk mirror.
+def _storage_backend():
+    try:
+        backend = st.secrets.get("storage_backend")
+    except Exception:
+        backend = None
+    return (backend or os.environ.get("TRACKER_STORAGE_BACKEND") or "csv").lower()
+
+
+def _open_tracker(backend, tenant=None):
+    # Check-ins start from the columnar snapshot next to the files while it is current
+    directory = tenant_dir(_BASE, tenant)
+    store = CountedCalls(open_store(directory, backend), _rerun_profiler(), "storage")
+    return TrackerData(store, Snapshot(os.path.join(directory, SNAPSHOT_FILE)))
+
+
+def _setting(secret, env):
+    try:
+        value = st.secrets.get(secret)
+    except Exception:
+        value = None
+    return value if value not in (None, "") else os.environ.get(env)
+
+
+def _debug_enabled():
+    try:
+        if st.query_params.get("debug") in ("1", "true"):
+            return True
+    except Exception:
+        pass
+    return str(_setting("debug_panel", "TRACKER_DEBUG") or "").lower() in ("1", "true", "yes")
+
+
+def _write_metrics(profiler):
+    path = _setting("metrics_file", "TRACKER_METRICS_FILE")
+    if not path:
+        return
+    try:
+        atomic_write_text(path, profiler.to_prometheus())
+    except OSError:
+        pass
+
+
+# -------- Google Sheets --------
+# One authorized client pool per process (progress_tracker/sheets.py). Saves
+# commit to the local backend first and mark the worksheet dirty; a background
+# worker pushes it with retries, journaled in sync_journal.json so a restart
+# replays unsent changes. Reads come from the local backend, hydrated from the
+# sheet once per process and topped up from it every sheet_refresh_seconds.
+@st.cache_resource(show_spinner=False)
+def _sheet_pool(creds_json, sheet_id):
+    return SheetPool(creds_json, sheet_id, _rerun_profiler())
+
+
+# Seconds the first page of a process may wait for the sheet before rendering
+# from the local mirror; the read carries on in the background either way
+FIRST_READ_WAIT = 5
+
+
+def _sheet_pool_from_secrets():
+    import json
+    if "gcp_service_account_json" in st.secrets:
+        creds_json = json.dumps(json.loads(st.secrets["gcp_service_account_json"]), sort_keys=True)
+    else:
+        creds_json = json.dumps(dict(st.secrets["gcp_service_account"]), sort_keys=True)
+    return _sheet_pool(creds_json, st.secrets["sheet_id"])
+
+
 def _get_sheet_client():
     if not _use_sheets():
         return None
     try:
-        import gspread
-        import json
-        if "gcp_service_account_json" in st.secrets:
-            creds = json.loads(st.secrets["gcp_service_account_json"])
-        else:
-            creds = dict(st.secrets["gcp_service_account"])
-        gc = gspread.service_account_from_dict(creds)
-        return gc.open_by_key(st.secrets["sheet_id"])
+        pool = _sheet_pool_from_secrets()
+        try:
+            pool.spreadsheet()
+        except Exception as exc:
+            if not (is_auth_error(exc) or is_connection_error(exc)):
+                raise
+            pool.reset()
+            pool.spreadsheet()
+        return pool
     except Exception:
         return None
 
 
-def load_data():
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("data")
-            rows = ws.get_all_records()
-            if not rows:
-                df = pd.DataFrame(columns=DEFAULT_DATA_COLUMNS)
-            else:
-                df = pd.DataFrame(rows)
-        except Exception:
-            try:
-                sh.add_worksheet(title="data", rows=1000, cols=20)
-                ws = sh.worksheet("data")
-                ws.append_row(DEFAULT_DATA_COLUMNS)
-                df = pd.DataFrame(columns=DEFAULT_DATA_COLUMNS)
-            except Exception:
-                df = pd.DataFrame(columns=DEFAULT_DATA_COLUMNS)
+def compact_data():
+    pool = _get_sheet_client()
+    if pool:
+        compact(_sheet_partition(pool, _tenant()), _tracker_data())
+
+
+def _refresh_interval():
+    value = _setting("sheet_refresh_seconds", "TRACKER_SHEET_REFRESH_SECONDS")
+    try:
+        return 60.0 if value is None else float(value)
+    except (TypeError, ValueError):
+        return 60.0
+
+
+# Queue targets are worksheet titles: "data" for the single-user layout,
+# "<tenant>.data" for a tenant's partition.
+def _sheet_partition(pool, tenant):
+    return pool if tenant is None else pool.partition(f"{tenant}.")
+
+
+def _target_tenant(target):
+    return target.rpartition(".")[0] or None
+
+
+def _hydrated(part, data, queue):
+    # Each partition is read from the sheet once per process before its first
+    # push or read; journaled local changes win over the sheet
+    if not part.hydrated:
+        with part.hydrate_lock:
+            if not part.hydrated:
+                hydrate(part, data, queue)
+    return part
+
+
+def _push_target(pool, registry, queue, target):
+    tenant = _target_tenant(target)
+    data = registry.get(tenant)
+    part = _hydrated(_sheet_partition(pool, tenant), data, queue)
+    push_worksheet(part, data, target.rpartition(".")[2])
+
+
+@st.cache_resource(show_spinner=False)
+def _sheet_sync_queue(_pool, _registry, sheet_id, backend):
+    # One worker and journal for every tenant; a tenant with unsent changes is
+    # never evicted, and an evicted one re-reads its worksheets when reopened
+    queue = SyncQueue(SYNC_JOURNAL_FILE, lambda target: _push_target(_pool, _registry, queue, target))
+    _registry.can_evict = lambda tenant, data: tenant is not None and not any(
+        _target_tenant(t) == tenant for t in queue.pending()
+    )
+    _registry.on_evict = lambda tenant, data: _pool.drop_partition(f"{tenant}.")
+    return queue
+
+
+def _sheets_sync(wait=0):
+    # (queue, this session's partition), or (None, None) without Sheets. The
+    # partition is read on a background thread; wait is how long the page's
+    # first read may block on it (later attempts never block a rerun).
+    if not _use_sheets():
+        return None, None
+    try:
+        pool = _sheet_pool_from_secrets()
+        registry = _tenant_registry(_storage_backend())
+        queue = _sheet_sync_queue(pool, registry, st.secrets["sheet_id"], _storage_backend())
+        tenant = _tenant()
+        data = registry.get(tenant)
+    except Exception:
+        return None, None
+    if not queue.started:
+        queue.start()
+    part = _sheet_partition(pool, tenant)
+    if not part.hydrated:
+        first = part.hydrate_at == 0
+        thread = schedule_hydrate(part, data, queue)
+        if thread is not None and first and wait:
+            thread.join(wait)
+    else:
+        schedule_refresh(part, data, queue, _refresh_interval())
+    return queue, part
+
+
+def _mark_dirty(name):
+    queue, part = _sheets_sync()
+    if queue is not None:
+        queue.enqueue(part.title(name))
+
+
+def _render_sync_status():
+    queue, part = _sheets_sync()
+    if queue is None:
+        return
+    status = {t.rpartition(".")[2]: s for t, s in queue.status().items() if _target_tenant(t) == _tenant()}
+    failed = {n: s for n, s in status.items() if s["state"] == "failed"}
+    pending = sorted(n for n, s in status.items() if s["state"] == "pending")
+    if not part.hydrated and part.hydrate_lock.locked():
+        st.caption("⏳ Loading from Google Sheets…")
+    elif not part.hydrated:
+        st.warning("Google Sheets is unreachable. Changes are saved on this device and will sync when it is back.")
+    elif failed:
+        error = next(iter(failed.values()))["error"]
+        st.warning(f"Google Sheets sync failed for {', '.join(sorted(failed))} ({error}). Your data is saved locally.")
+        if st.button("Retry sync"):
+            queue.retry_failed()
+            st.rerun()
+    elif pending:
+        st.caption(f"⏳ Syncing to Google Sheets: {', '.join(pending)}")
     else:
+        st.caption("☁️ Synced to Google Sheets")
+
+
+# -------- Tenants --------
+# With the tenants setting each user gets a partition: files under
+# tenants/<key>/ and, with Sheets, "<key>.data"-style worksheets in the shared
+# spreadsheet. "auth" uses the signed-in user's email (st.login, configured in
+# [auth] secrets); "query" trusts ?user=<name> and is meant for internal
+# deployments. Without it the app is single-user with the original layout.
+def _tenant_mode():
+    return str(_setting("tenants", "TRACKER_TENANTS") or "").lower()
+
+
+def _tenant():
+    # This session's tenant key, or None (single-user, or not signed in yet)
+    mode = _tenant_mode()
+    identity = None
+    if mode == "auth":
         try:
-            df = pd.read_csv(DATA_FILE)
+            if st.user.is_logged_in:
+                identity = st.user.get("email") or st.user.get("sub")
         except Exception:
-            df = pd.DataFrame(columns=DEFAULT_DATA_COLUMNS)
-    for col in DEFAULT_DATA_COLUMNS:
-        if col not in df.columns:
-            df[col] = 0 if "minutes" in col or col in ["work", "gym", "learning", "reading", "entertainment"] else ""
-    return df
+            identity = None
+    elif mode == "query":
+        identity = st.query_params.get("user")
+    return tenant_key(identity) if identity else None
+
+
+def _limit(secret, env, default):
+    try:
+        return float(_setting(secret, env) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+# -------- Shared tracker data --------
+# One TrackerData per tenant holds the history, lists and rolling aggregates
+# once for every session of that user. Reads are copy-on-write views that are
+# refreshed only when the backend's storage version changes (CSV mtime/size,
+# SQLite revision); writes are serialized through it and then marked dirty for
+# Sheets. Idle tenants are evicted least recently used first once more than
+# tenant_cache_size are open or their frames pass tenant_cache_mb.
+@st.cache_resource(show_spinner=False)
+def _tenant_registry(backend):
+    return TenantCache(
+        lambda tenant: _open_tracker(backend, tenant),
+        max_tenants=int(_limit("tenant_cache_size", "TRACKER_TENANT_CACHE_SIZE", MAX_TENANTS)),
+        max_bytes=int(_limit("tenant_cache_mb", "TRACKER_TENANT_CACHE_MB", MAX_BYTES / 2 ** 20) * 2 ** 20),
+        size=lambda data: data.memory_bytes(),
+        can_evict=lambda tenant, data: tenant is not None,
+    )
+
+
+def _tracker_data():
+    return _tenant_registry(_storage_backend()).get(_tenant())
+
+
+def load_data():
+    _sheets_sync()
+    return _tracker_data().checkins()
+
+
+def load_aggregates():
+    _sheets_sync()
+    return _tracker_data().aggregates()
+
+
+def load_analytics():
+    # Streaks, trends and correlations over the whole history, memoized per version
+    _sheets_sync()
+    return _tracker_data().analytics()
 
 
 def save_data(df):
-    df = df[DEFAULT_DATA_COLUMNS]
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("data")
-            ws.clear()
-            ws.append_row(list(df.columns))
-            for _, row in df.iterrows():
-                ws.append_row([row[c] for c in df.columns])
-        except Exception:
-            pass
-    df.to_csv(DATA_FILE, index=False)
+    _tracker_data().save_checkins(df)
+    _mark_dirty("data")
+
+
+def save_checkin(row):
+    # Upsert one day's check-in; returns the updated history
+    df = _tracker_data().save_checkin(row)
+    _mark_dirty("data")
+    return df
 
 
 def load_books():
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("books")
-            rows = ws.get_all_records()
-            if not rows:
-                return pd.DataFrame(columns=["title", "finished"])
-            return pd.DataFrame(rows)
-        except Exception:
-            try:
-                ws = sh.add_worksheet(title="books", rows=200, cols=5)
-                ws.append_row(["title", "finished"])
-                return pd.DataFrame(columns=["title", "finished"])
-            except Exception:
-                return pd.DataFrame(columns=["title", "finished"])
-    try:
-        return pd.read_csv(BOOKS_FILE)
-    except Exception:
-        return pd.DataFrame(columns=["title", "finished"])
+    # Titles still being read, in list order
+    _sheets_sync()
+    return _tracker_data().unfinished("books")
 
 
-def save_books(books_df):
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("books")
-            ws.clear()
-            ws.append_row(["title", "finished"])
-            for _, row in books_df.iterrows():
-                ws.append_row([str(row["title"]), int(row["finished"])])
-        except Exception:
-            pass
-    books_df.to_csv(BOOKS_FILE, index=False)
+def add_book(title):
+    # Raises ValueError for a title already on the list
+    _tracker_data().add_item("books", title)
+    _mark_dirty("books")
+
+
+def finish_book(title):
+    _tracker_data().finish_item("books", title)
+    _mark_dirty("books")
 
 
 def load_entertainment():
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("entertainment")
-            rows = ws.get_all_records()
-            if not rows:
-                return pd.DataFrame(columns=["title", "item_type", "finished"])
-            return pd.DataFrame(rows)
-        except Exception:
-            try:
-                ws = sh.add_worksheet(title="entertainment", rows=200, cols=5)
-                ws.append_row(["title", "item_type", "finished"])
-                return pd.DataFrame(columns=["title", "item_type", "finished"])
-            except Exception:
-                return pd.DataFrame(columns=["title", "item_type", "finished"])
-    try:
-        return pd.read_csv(ENTERTAINMENT_FILE)
-    except Exception:
-        return pd.DataFrame(columns=["title", "item_type", "finished"])
+    # Titles still to watch, in list order
+    _sheets_sync()
+    return _tracker_data().unfinished("entertainment")
 
 
-def save_entertainment(ent_df):
-    sh = _get_sheet_client()
-    if sh:
-        try:
-            ws = sh.worksheet("entertainment")
-            ws.clear()
-            ws.append_row(["title", "item_type", "finished"])
-            for _, row in ent_df.iterrows():
-                ws.append_row([str(row["title"]), str(row["item_type"]), int(row["finished"])])
-        except Exception:
-            pass
-    ent_df.to_csv(ENTERTAINMENT_FILE, index=False)
-
-
-df = load_data()
-books_df = load_books()
-ent_df = load_entertainment()
-
-# -------- Electric / AI theme CSS --------
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;600&family=Space+Grotesk:wght@400;500;600;700&display=swap');
-    .stApp { background: linear-gradient(180deg, #0a0e17 0%, #0f1629 35%, #0d1322 100%); }
-    .main .block-container { padding-top: 1.5rem; max-width: 720px; }
-    h1, h2, h3 { font-family: 'Space Grotesk', sans-serif !important; color: #e0e7ff !important; }
-    .electric-date {
-        text-align: center;
-        background: linear-gradient(135deg, #1e1b4b 0%, #312e81 40%, #3730a3 100%);
-        color: #fff;
-        padding: 1.25rem 1.5rem;
-        border-radius: 16px;
-        margin: 0.5rem 0 1.25rem 0;
-        font-family: 'Space Grotesk', sans-serif;
-        box-shadow: 0 0 24px rgba(99, 102, 241, 0.25), 0 4px 12px rgba(0,0,0,0.3);
-        border: 1px solid rgba(129, 140, 248, 0.2);
-    }
-    .electric-date .day-num { font-size: 2.25rem; font-weight: 700; color: #a5b4fc; }
-    .electric-date .weekday { font-size: 0.8rem; letter-spacing: 0.15em; opacity: 0.9; color: #c7d2fe; }
-    .ai-insight-card {
-        background: linear-gradient(135deg, rgba(30, 27, 75, 0.6) 0%, rgba(49, 46, 129, 0.4) 100%);
-        border: 1px solid rgba(129, 140, 248, 0.25);
-        border-radius: 12px;
-        padding: 1rem 1.25rem;
-        margin: 0.75rem 0;
-        font-family: 'Space Grotesk', sans-serif;
-        color: #c7d2fe;
-        box-shadow: 0 4px 16px rgba(0,0,0,0.2);
-    }
-    .ai-insight-card .label { font-size: 0.7rem; text-transform: uppercase; letter-spacing: 0.1em; color: #818cf8; margin-bottom: 0.25rem; }
-    .digest-header { font-family: 'Space Grotesk', sans-serif; color: #a5b4fc; }
-    .digest-item { padding: 0.5rem 0; border-bottom: 1px solid rgba(129, 140, 248, 0.15); }
-    .digest-item a { color: #818cf8; text-decoration: none; }
-    .digest-item a:hover { color: #a5b4fc; text-decoration: underline; }
-    div[data-testid="stExpander"] { border: 1px solid rgba(129, 140, 248, 0.2); border-radius: 12px; }
-    .stForm { border: 1px solid rgba(129, 140, 248, 0.15); border-radius: 12px; padding: 1rem; }
-</style>
-""", unsafe_allow_html=True)
+def add_watch_item(title, item_type):
+    _tracker_data().add_item("entertainment", title, item_type=item_type)
+    _mark_dirty("entertainment")
 
-st.title("📊 Stress-Proof Workday Tracker")
 
-# Today's date — electric display
-today_obj = date.today()
-weekday = today_obj.strftime("%A")
-day_num = today_obj.strftime("%d")
-month_short = today_obj.strftime("%b")
-year = today_obj.strftime("%Y")
-st.markdown(
-    f"""
-    <div class="electric-date">
-        <span class="weekday">{weekday}</span><br>
-        <span class="day-num">{day_num}</span>
-        <span style="font-size: 1.2rem; font-weight: 500;"> {month_short}</span>
-        <span style="font-size: 0.95rem; opacity: 0.9;"> {year}</span>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+def finish_watch_item(title):
+    _tracker_data().finish_item("entertainment", title)
+    _mark_dirty("entertainment")
 
-# -------- Tech & AI daily digest (pop-up style) --------
-@st.cache_data(ttl=3600)
-def fetch_tech_digest():
-    try:
-        import feedparser
-        entries = []
-        feeds = [
-            ("https://techcrunch.com/feed/", "TechCrunch"),
-            ("https://venturebeat.com/feed/", "VentureBeat"),
-            ("https://www.theverge.com/rss/index.xml", "The Verge"),
-        ]
-        for url, source in feeds:
-            try:
-                feed = feedparser.parse(url)
-                for e in feed.entries[:4]:
-                    entries.append({
-                        "title": e.get("title", "")[:80] + ("..." if len(e.get("title", "")) > 80 else ""),
-                        "link": e.get("link", "#"),
-                        "source": source,
-                        "published": e.get("published", "")[:10] if e.get("published") else "",
-                    })
-            except Exception:
-                continue
-        entries.sort(key=lambda x: x["published"] or "", reverse=True)
-        return entries[:12]
-    except Exception:
-        return []
 
-digest_entries = fetch_tech_digest()
-with st.expander("⚡ Today's Tech & AI digest — stay updated", expanded=True):
-    st.caption("Headlines from tech and AI sources. Refreshes hourly.")
-    if digest_entries:
-        for e in digest_entries:
-            st.markdown(
-                f'<div class="digest-item">'
-                f'<a href="{e["link"]}" target="_blank" rel="noopener">{e["title"]}</a> '
-                f'<span style="color:#6366f1;font-size:0.75rem;">[{e["source"]}]</span>'
-                f'</div>',
-                unsafe_allow_html=True,
-            )
+# -------- Header --------
+# Rendered before anything is loaded; the digest and insights get their slots
+# here and are filled in after the check-in form, so the part of the page used
+# every day appears before the feed fetch and the history aggregation.
+_run.enter("header")
+st.markdown(THEME_CSS, unsafe_allow_html=True)
+st.title("📊 Stress-Proof Workday Tracker")
+st.markdown(date_header(date.today()), unsafe_allow_html=True)
+digest_slot = st.container()
+insights_slot = st.container()
+
+_run.enter("tenant")
+if _tenant_mode() in ("auth", "query"):
+    if _tenant() is None:
+        if _tenant_mode() == "auth":
+            st.info("Sign in to open your tracker.")
+            if st.button("Sign in"):
+                st.login()
+        else:
+            user = st.text_input("Your name", key="tenant_user")
+            if user.strip():
+                st.query_params["user"] = user.strip()
+                st.rerun()
+        st.stop()
+    elif _tenant_mode() == "auth":
+        st.caption(f"👤 {st.user.get('email') or st.user.get('name') or ''}")
+        if st.button("Sign out"):
+            st.logout()
     else:
-        st.info("Could not load digest. Check connection or try again later.")
+        st.caption(f"👤 {st.query_params.get('user')}")
 
-# -------- AI-powered insights (from your data) --------
-if not df.empty and len(df) > 0:
-    df_temp = df.copy()
-    if "date" in df_temp.columns:
-        df_temp["date"] = pd.to_datetime(df_temp["date"], errors="coerce")
-    last_7 = df_temp.tail(7)
-    insights = []
-    if "work" in last_7.columns:
-        w = last_7["work"].sum()
-        if w >= 5:
-            insights.append("Strong work week — 5+ days logged.")
-        elif w >= 3:
-            insights.append("Solid work days this week. Keep the rhythm.")
-    if "gym" in last_7.columns:
-        g = last_7["gym"].sum()
-        if g >= 3:
-            insights.append("Gym streak: 3+ days. You're on fire.")
-        elif g == 0 and len(last_7) >= 3:
-            insights.append("No gym yet this week — one session can start the habit.")
-    if "learning" in last_7.columns:
-        lr = last_7["learning"].sum()
-        if lr >= 4:
-            insights.append("Learning consistency is high. Great for long-term growth.")
-    if "mood" in last_7.columns:
-        avg_mood = last_7["mood"].mean()
-        if avg_mood >= 4:
-            insights.append("Mood trend is up. Nice.")
-        elif avg_mood <= 2.5 and len(last_7) >= 5:
-            insights.append("Mood has been lower — small wins (one task, one walk) help.")
-    if insights:
-        st.markdown('<p class="ai-insight-card"><span class="label">AI insights</span><br>' + " ".join(insights[:3]) + "</p>", unsafe_allow_html=True)
+_run.enter("sheets_client")
+_sheets_sync(wait=FIRST_READ_WAIT)
+_run.enter("load")
+unfinished_books = load_books()
+unfinished_ent = load_entertainment()
 
 # -------- Manage lists (above form so lists are ready when submitting) --------
+_run.enter("lists")
 with st.expander("📚 Manage books", expanded=False):
-    add_book = st.text_input("Add a book to your list", key="add_book")
+    add_book_title = st.text_input("Add a book to your list", key="add_book")
     if st.button("Add book"):
-        if add_book and add_book.strip():
-            if books_df.empty or "title" not in books_df.columns:
-                books_df = pd.DataFrame({"title": [add_book.strip()], "finished": [0]})
+        if add_book_title and add_book_title.strip():
+            try:
+                add_book(add_book_title.strip())
+            except ValueError as exc:
+                st.warning(str(exc))
             else:
-                books_df = pd.concat([books_df, pd.DataFrame({"title": [add_book.strip()], "finished": [0]})], ignore_index=True)
-            save_books(books_df)
-            st.success(f"Added: {add_book.strip()}")
-            st.rerun()
+                st.success(f"Added: {add_book_title.strip()}")
+                st.rerun()
     st.caption("Mark as finished:")
-    unfinished_books = books_df[books_df["finished"] == 0]["title"].tolist() if not books_df.empty and "finished" in books_df.columns else []
     if unfinished_books:
         mark_book = st.selectbox("Select book", unfinished_books, key="mark_book_done")
         if st.button("Mark book as finished"):
-            books_df.loc[books_df["title"] == mark_book, "finished"] = 1
-            save_books(books_df)
+            finish_book(mark_book)
             st.success(f"Finished: {mark_book}")
             st.rerun()
     else:
@@ -327,26 +435,25 @@ with st.expander("🎬 Manage watchlist", expanded=False):
     item_type = st.radio("Type", ["Movie", "Series"], key="ent_type")
     if st.button("Add to watchlist"):
         if add_item and add_item.strip():
-            if ent_df.empty or "title" not in ent_df.columns:
-                ent_df = pd.DataFrame({"title": [add_item.strip()], "item_type": [item_type], "finished": [0]})
+            try:
+                add_watch_item(add_item.strip(), item_type)
+            except ValueError as exc:
+                st.warning(str(exc))
             else:
-                ent_df = pd.concat([ent_df, pd.DataFrame({"title": [add_item.strip()], "item_type": [item_type], "finished": [0]})], ignore_index=True)
-            save_entertainment(ent_df)
-            st.success(f"Added: {add_item.strip()}")
-            st.rerun()
+                st.success(f"Added: {add_item.strip()}")
+                st.rerun()
     st.caption("Mark as finished:")
-    unfinished_ent = ent_df[ent_df["finished"] == 0]["title"].tolist() if not ent_df.empty and "finished" in ent_df.columns else []
     if unfinished_ent:
         mark_ent = st.selectbox("Select item", unfinished_ent, key="mark_ent_done")
         if st.button("Mark as finished"):
-            ent_df.loc[ent_df["title"] == mark_ent, "finished"] = 1
-            save_entertainment(ent_df)
+            finish_watch_item(mark_ent)
             st.success(f"Finished: {mark_ent}")
             st.rerun()
     else:
         st.info("No items in progress. Add something above.")
 
 # -------- Daily Check-in --------
+_run.enter("checkin_form")
 st.subheader("Daily Check-in")
 
 with st.form("checkin_form"):
@@ -367,7 +474,7 @@ with st.form("checkin_form"):
 
     st.divider()
     reading = st.checkbox("Reading")
-    book_options = ["— Select book —"] + (books_df[books_df["finished"] == 0]["title"].tolist() if not books_df.empty and "finished" in books_df.columns else [])
+    book_options = ["— Select book —"] + unfinished_books
     if not book_options:
         book_options = ["— No books in list —"]
     reading_book = st.selectbox("What did you read?", book_options, key="reading_book")
@@ -375,7 +482,7 @@ with st.form("checkin_form"):
 
     st.divider()
     entertainment = st.checkbox("Entertainment (movie/series)")
-    ent_options = ["— Select —"] + (ent_df[ent_df["finished"] == 0]["title"].tolist() if not ent_df.empty and "finished" in ent_df.columns else [])
+    ent_options = ["— Select —"] + unfinished_ent
     if not ent_options:
         ent_options = ["— Nothing in watchlist —"]
     entertainment_item = st.selectbox("What did you watch?", ent_options, key="ent_item")
@@ -406,125 +513,213 @@ with st.form("checkin_form"):
             "mood": mood,
             "notes": notes or "",
         }
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        df = df[DEFAULT_DATA_COLUMNS]
-        save_data(df)
+        save_checkin(new_row)
         st.success("Saved ✔")
 
+_render_sync_status()
+
+# -------- Tech & AI daily digest (pop-up style) --------
+_run.enter("digest")
+@st.cache_resource(show_spinner=False)
+def _digest_cache():
+    return DigestCache(DIGEST_CACHE_FILE)
+
+
+def _digest_feeds():
+    # Optional override in secrets: [[digest_feeds]] entries with url and source
+    try:
+        feeds = st.secrets.get("digest_feeds")
+        if feeds:
+            return [(f["url"], f["source"]) if "url" in f else (f[0], f[1]) for f in feeds]
+    except Exception:
+        pass
+    return DEFAULT_FEEDS
+
+
+def fetch_tech_digest():
+    try:
+        return _digest_cache().entries(_digest_feeds())
+    except Exception:
+        return []
+
+with digest_slot:
+    digest_entries = fetch_tech_digest()
+    with st.expander("⚡ Today's Tech & AI digest — stay updated", expanded=True):
+        st.caption("Headlines from tech and AI sources. Refreshes hourly.")
+        if digest_entries:
+            for e in digest_entries:
+                st.markdown(digest_item(e), unsafe_allow_html=True)
+        else:
+            st.info("Could not load digest. Check connection or try again later.")
+
+# -------- AI-powered insights (from your data) --------
+_run.enter("insights")
+agg = load_aggregates()
+if agg.days > 0:
+    insights = week_insights(agg.window(7))
+    if insights:
+        insights_slot.markdown(insight_card(insights), unsafe_allow_html=True)
+    patterns = pattern_insights(load_analytics())
+    if patterns:
+        insights_slot.markdown(insight_card(patterns, "Patterns"), unsafe_allow_html=True)
+
 # -------- Charts --------
+_run.enter("charts")
 st.subheader("Progress Overview")
 
-if not df.empty:
-    df["date"] = pd.to_datetime(df["date"])
-    last_7 = df.tail(7)
-
-    tasks = ["Work", "Gym", "Learning", "Reading", "Entertainment"]
-    completed = [
-        last_7["work"].mean() * 100,
-        last_7["gym"].mean() * 100,
-        last_7["learning"].mean() * 100,
-        last_7["reading"].mean() * 100,
-        last_7["entertainment"].mean() * 100,
-    ]
-    completion = pd.DataFrame({"Task": tasks, "Completed": completed})
-
-    _layout = dict(
-        paper_bgcolor="rgba(10, 14, 23, 0.9)",
-        plot_bgcolor="rgba(15, 22, 41, 0.6)",
-        font=dict(color="#c7d2fe", size=12),
-        title_font=dict(color="#a5b4fc"),
-        xaxis=dict(gridcolor="rgba(99, 102, 241, 0.15)"),
-        yaxis=dict(gridcolor="rgba(99, 102, 241, 0.15)"),
-        margin=dict(t=50, b=40, l=50, r=30),
-    )
-    _bar_colors = ["#6366f1", "#818cf8", "#a5b4fc", "#818cf8", "#6366f1"]
-
-    fig1 = px.bar(
-        completion,
-        x="Task",
-        y="Completed",
-        title="Last 7 Days Completion (%)",
-        range_y=[0, 100],
-        color_discrete_sequence=_bar_colors,
-    )
-    fig1.update_layout(**_layout)
-    st.plotly_chart(fig1, use_container_width=True)
-
-    fig2 = px.line(
-        df.tail(14),
-        x="date",
-        y="mood",
-        title="Mood Trend (14 Days)",
-        color_discrete_sequence=["#818cf8"],
+
+# Figures are built only for the open tab and cached per data version, so
+# reruns from typing in the form or switching tabs reuse them.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _chart_figure(kind, version, _agg, option=None):
+    if kind == "completion":
+        return completion_figure(_agg.window(7))
+    if kind == "time":
+        return time_figure(_agg.window(7))
+    if kind == "mood":
+        return mood_figure(_agg.mood_series(MOOD_RANGES[option]), option)
+    dist = _agg.distribution(DISTRIBUTIONS[kind])
+    if not dist:
+        return None
+    title, colors = PIE_CHARTS[kind]
+    return distribution_figure(dist, title, colors)
+
+
+def _chart_tabs(labels):
+    # Tab state needs a recent Streamlit; older versions get a selector instead
+    try:
+        return [(tab, tab.open) for tab in st.tabs(labels, key="chart_tab", on_change="rerun")]
+    except TypeError:
+        choice = st.radio("Chart", labels, horizontal=True, key="chart_tab", label_visibility="collapsed")
+        return [(st.container(), label == choice) for label in labels]
+
+
+def _lazy_expander(label, key):
+    # (expander, open); content is only built while the expander is open
+    try:
+        expander = st.expander(label, key=key, on_change="rerun")
+        return expander, expander.open
+    except TypeError:
+        return st.expander(label), True
+
+
+if agg.days > 0:
+    version = _tracker_data().version("data")
+    (tab_week, week_open), (tab_mood, mood_open), (tab_mix, mix_open) = _chart_tabs(
+        ["Last 7 days", "Mood", "Learning, reading & watching"]
     )
-    fig2.update_layout(**_layout)
-    st.plotly_chart(fig2, use_container_width=True)
-
-    # Time spent per task (last 7 days)
-    time_cols = ["work_minutes", "gym_minutes", "learning_minutes", "reading_minutes", "entertainment_minutes"]
-    for c in time_cols:
-        if c not in last_7.columns:
-            last_7 = last_7.copy()
-            last_7[c] = 0
-    time_totals = last_7[time_cols].sum()
-    time_df = pd.DataFrame({
-        "Task": ["Work", "Gym", "Learning", "Reading", "Entertainment"],
-        "Minutes": time_totals.values,
-    })
-    fig_time = px.bar(time_df, x="Task", y="Minutes", title="Time spent (last 7 days, minutes)", color_discrete_sequence=_bar_colors)
-    fig_time.update_layout(**_layout)
-    st.plotly_chart(fig_time, use_container_width=True)
-
-    learning_dist = df[df["learning"] == 1]["learning_type"].value_counts()
-    if len(learning_dist) > 0:
-        fig3 = px.pie(
-            values=learning_dist.values,
-            names=learning_dist.index,
-            title="Learning Distribution",
-            color_discrete_sequence=["#6366f1", "#818cf8", "#a5b4fc", "#c7d2fe"],
-        )
-        fig3.update_layout(**_layout)
-        st.plotly_chart(fig3, use_container_width=True)
-
-    if df["reading"].sum() > 0 and "reading_book" in df.columns:
-        reading_dist = df.loc[(df["reading"] == 1) & (df["reading_book"] != ""), "reading_book"].value_counts()
-        if len(reading_dist) > 0:
-            fig4 = px.pie(
-                values=reading_dist.values,
-                names=reading_dist.index,
-                title="Reading distribution",
-                color_discrete_sequence=px.colors.sequential.Indigo_r,
-            )
-            fig4.update_layout(**_layout)
-            st.plotly_chart(fig4, use_container_width=True)
-
-    if df["entertainment"].sum() > 0 and "entertainment_item" in df.columns:
-        ent_dist = df.loc[(df["entertainment"] == 1) & (df["entertainment_item"] != ""), "entertainment_item"].value_counts()
-        if len(ent_dist) > 0:
-            fig5 = px.pie(
-                values=ent_dist.values,
-                names=ent_dist.index,
-                title="Entertainment (what you watched)",
-                color_discrete_sequence=px.colors.sequential.Indigo_r,
-            )
-            fig5.update_layout(**_layout)
-            st.plotly_chart(fig5, use_container_width=True)
+    if week_open:
+        with tab_week:
+            _run.enter("chart.completion")
+            st.plotly_chart(_chart_figure("completion", version, agg), use_container_width=True)
+            _run.enter("chart.time")
+            st.plotly_chart(_chart_figure("time", version, agg), use_container_width=True)
+    if mood_open:
+        with tab_mood:
+            _run.enter("chart.mood")
+            mood_range = st.radio("Range", list(MOOD_RANGES), horizontal=True, key="mood_range")
+            st.plotly_chart(_chart_figure("mood", version, agg, mood_range), use_container_width=True)
+    if mix_open:
+        with tab_mix:
+            shown = False
+            for activity in PIE_CHARTS:
+                _run.enter(f"chart.{activity}")
+                fig = _chart_figure(activity, version, agg) if agg.total(activity) > 0 else None
+                if fig is not None:
+                    st.plotly_chart(fig, use_container_width=True)
+                    shown = True
+            if not shown:
+                st.caption("Log learning, reading or entertainment to see the mix.")
 else:
     st.info("No data yet. Start with today.")
 
+# -------- History explorer --------
+_run.enter("history")
+
+
+# Reads the week/month/year rollup tables maintained on save, so a long range
+# is a few dozen precomputed rows; cached per data version like the charts.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _history_view(version, _agg, granularity, start, end):
+    rows = _agg.history(granularity.lower(), start, end)
+    if not rows:
+        return None
+    learning = _agg.mix("learning_type", granularity.lower(), start, end)
+    reading = _agg.mix("reading_book", granularity.lower(), start, end)
+    return {
+        "rates": history_figure(rows, granularity.lower()),
+        "table": history_table(rows),
+        "learning": distribution_figure(learning, "Learning mix", LEARNING_COLORS) if learning else None,
+        "reading": distribution_figure(reading, "Book mix", PIE_COLORS) if reading else None,
+    }
+
+
+if agg.days > 0:
+    history_box, history_open = _lazy_expander("🗓️ History explorer", "history_open")
+    if history_open:
+        with history_box:
+            first, last = (date.fromisoformat(d) for d in agg.date_range())
+            col_range, col_step = st.columns([2, 1])
+            with col_range:
+                picked = st.date_input(
+                    "Period", value=(max(first, last - timedelta(days=89)), last),
+                    min_value=first, max_value=last, key="history_range",
+                )
+            with col_step:
+                granularity = st.selectbox("Group by", ["Day", "Week", "Month", "Year"], index=1, key="history_step")
+            # While a range is being picked only its first day is set
+            picked = tuple(picked) if isinstance(picked, (list, tuple)) else (picked,)
+            start, end = (picked[0], picked[-1]) if picked else (first, last)
+            view = _history_view(version, agg, granularity, str(start), str(end))
+            if view is None:
+                st.caption("No check-ins in this period.")
+            else:
+                st.plotly_chart(view["rates"], use_container_width=True)
+                st.dataframe(view["table"], use_container_width=True)
+                for fig in (view["learning"], view["reading"]):
+                    if fig is not None:
+                        st.plotly_chart(fig, use_container_width=True)
+
 # -------- How to enable persistent storage (Google Sheets) --------
+_run.enter("help")
 with st.expander("🔐 How to keep data after Streamlit reboots (Google Sheets)", expanded=False):
-    st.markdown("""
-    **Data is lost on reboot unless you use Google Sheets.**
-
-    1. **Google Cloud:** [console.cloud.google.com](https://console.cloud.google.com) → Create project → APIs & Services → Enable **Google Sheets API**.
-    2. **Service account:** APIs & Services → Credentials → Create credentials → Service account → Create key (JSON). Download the JSON file.
-    3. **Google Sheet:** Create a new [Google Sheet](https://sheets.google.com). Copy the **Sheet ID** from the URL:  
-       `https://docs.google.com/spreadsheets/d/**SHEET_ID**/edit`
-    4. **Share the sheet:** Share the sheet with the **service account email** (from the JSON, e.g. `xxx@xxx.iam.gserviceaccount.com`) with **Editor** access.
-    5. **Streamlit Cloud:** Your app → Settings → Secrets. Add (TOML):
-       - `sheet_id = "your_sheet_id"`
-       - Either paste the whole JSON as a string: `gcp_service_account_json = '''{"type":"service_account", ...}'''`  
-         Or use nested keys: `[gcp_service_account]` then `type = "service_account"`, `project_id = "..."`, `private_key = "..."`, `client_email = "..."`, etc.
-    6. Redeploy the app. Data will be stored in the sheet and survive reboots.
-    """)
+    st.markdown(SHEETS_HELP)
+    if _use_sheets():
+        _, part = _sheets_sync()
+        st.caption("Saves only send new or changed rows. Compacting rewrites the whole sheet in one request.")
+        if st.button("Compact Google Sheet", disabled=part is None or not part.hydrated):
+            try:
+                compact_data()
+                st.success("Sheet compacted ✔")
+            except Exception:
+                st.error("Could not compact the sheet. Try again later.")
+
+# -------- Rerun profiler panel --------
+_run.finish()
+_write_metrics(_rerun_profiler())
+if _debug_enabled():
+    with st.expander("🛠 Rerun profiler", expanded=False):
+        _profiler = _rerun_profiler()
+        _summary = _profiler.summary()
+        if _summary:
+            st.caption(f"Section timings over the last {_summary[0]['runs']} reruns (ms), slowest first.")
+            st.dataframe(
+                pd.DataFrame(_summary).set_index("section")[["last", "p50", "p95", "max"]].mul(1000).round(1),
+                use_container_width=True,
+            )
+        _last = _profiler.runs()[-1] if _profiler.runs() else {"counters": {}}
+        _calls = _profiler.calls()
+        if _calls:
+            st.caption("Storage and Google Sheets API calls: this rerun / since start.")
+            st.dataframe(
+                pd.DataFrame(
+                    {"this rerun": [_last["counters"].get(n, 0) for n in sorted(_calls)], "total": [_calls[n] for n in sorted(_calls)]},
+                    index=sorted(_calls),
+                ),
+                use_container_width=True,
+            )
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("Export JSON", _profiler.to_json(), file_name="tracker_profile.json", mime="application/json")
+        with col_prom:
+            st.download_button("Export Prometheus", _profiler.to_prometheus(), file_name="tracker_metrics.prom", mime="text/plain")
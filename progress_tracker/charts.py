@@ -0,0 +1,136 @@
+import pandas as pd
+
+from .aggregates import ACTIVITIES
+
+# plotly.express is imported inside the figure builders: it is the slowest
+# import in the app, and only charts that are actually shown need it.
+TASKS = ["Work", "Gym", "Learning", "Reading", "Entertainment"]
+# Longer series are averaged into coarser buckets before they reach Plotly
+MAX_POINTS = 120
+RESAMPLE_STEPS = [("W", "weekly"), ("MS", "monthly"), ("QS", "quarterly"), ("YS", "yearly")]
+# Pie charts keep the largest slices and fold the rest into "Other"
+PIE_SLICES = 8
+MOOD_RANGES = {"14 Days": 14, "90 Days": 90, "1 Year": 365, "All time": None}
+
+LAYOUT = dict(
+    paper_bgcolor="rgba(10, 14, 23, 0.9)",
+    plot_bgcolor="rgba(15, 22, 41, 0.6)",
+    font=dict(color="#c7d2fe", size=12),
+    title_font=dict(color="#a5b4fc"),
+    xaxis=dict(gridcolor="rgba(99, 102, 241, 0.15)"),
+    yaxis=dict(gridcolor="rgba(99, 102, 241, 0.15)"),
+    margin=dict(t=50, b=40, l=50, r=30),
+)
+BAR_COLORS = ["#6366f1", "#818cf8", "#a5b4fc", "#818cf8", "#6366f1"]
+PIE_COLORS = ["#312e81", "#3730a3", "#4338ca", "#4f46e5", "#6366f1", "#818cf8", "#a5b4fc", "#c7d2fe"]
+LEARNING_COLORS = ["#6366f1", "#818cf8", "#a5b4fc", "#c7d2fe"]
+HISTORY_COLORS = ["#818cf8", "#22d3ee", "#a78bfa", "#f472b6", "#facc15"]
+# activity: (title, colors) for its distribution pie
+PIE_CHARTS = {
+    "learning": ("Learning Distribution", LEARNING_COLORS),
+    "reading": ("Reading distribution", PIE_COLORS),
+    "entertainment": ("Entertainment (what you watched)", PIE_COLORS),
+}
+
+
+def completion_figure(week):
+    import plotly.express as px
+
+    completed = [week["counts"][a] / week["days"] * 100 for a in ACTIVITIES]
+    completion = pd.DataFrame({"Task": TASKS, "Completed": completed})
+    fig = px.bar(
+        completion,
+        x="Task",
+        y="Completed",
+        title="Last 7 Days Completion (%)",
+        range_y=[0, 100],
+        color_discrete_sequence=BAR_COLORS,
+    )
+    fig.update_layout(**LAYOUT)
+    return fig
+
+
+def time_figure(week):
+    import plotly.express as px
+
+    time_df = pd.DataFrame({"Task": TASKS, "Minutes": [week["minutes"][a] for a in ACTIVITIES]})
+    fig = px.bar(time_df, x="Task", y="Minutes", title="Time spent (last 7 days, minutes)", color_discrete_sequence=BAR_COLORS)
+    fig.update_layout(**LAYOUT)
+    return fig
+
+
+def downsample_mood(frame, max_points=MAX_POINTS):
+    # Daily points up to max_points, otherwise the finest bucket that fits
+    if len(frame) <= max_points:
+        return frame, None
+    series = frame.set_index("date")["mood"].astype("float64")
+    for freq, label in RESAMPLE_STEPS:
+        resampled = series.resample(freq).mean().dropna()
+        if len(resampled) <= max_points:
+            break
+    return resampled.round(2).rename_axis("date").reset_index(), label
+
+
+def mood_figure(series, range_label):
+    import plotly.express as px
+
+    mood = pd.DataFrame(series, columns=["date", "mood"])
+    mood["date"] = pd.to_datetime(mood["date"], errors="coerce")
+    mood, bucket = downsample_mood(mood)
+    title = f"Mood Trend ({range_label})" if bucket is None else f"Mood Trend ({range_label}, {bucket} mean)"
+    fig = px.line(mood, x="date", y="mood", title=title, color_discrete_sequence=["#818cf8"])
+    fig.update_layout(**LAYOUT)
+    return fig
+
+
+def top_slices(dist, limit=PIE_SLICES):
+    # dist is (label, count) pairs, most common first
+    if len(dist) <= limit:
+        return list(dist)
+    head = list(dist[:limit - 1])
+    return head + [("Other", sum(n for _, n in dist[limit - 1:]))]
+
+
+def distribution_figure(dist, title, colors):
+    import plotly.express as px
+
+    slices = top_slices(dist)
+    fig = px.pie(
+        values=[n for _, n in slices],
+        names=[label for label, _ in slices],
+        title=title,
+        color_discrete_sequence=colors,
+    )
+    fig.update_layout(**LAYOUT)
+    return fig
+
+
+def history_figure(rows, granularity):
+    import plotly.express as px
+
+    rates = pd.DataFrame(rows).melt(
+        id_vars="period", value_vars=[f"{a}_rate" for a in ACTIVITIES], var_name="Task", value_name="Completed"
+    )
+    rates["Task"] = rates["Task"].map({f"{a}_rate": t for a, t in zip(ACTIVITIES, TASKS)})
+    rates["period"] = pd.to_datetime(rates["period"])
+    fig = px.line(
+        rates,
+        x="period",
+        y="Completed",
+        color="Task",
+        title=f"Completion by {granularity} (%)",
+        range_y=[0, 100],
+        markers=len(rows) <= 31,
+        color_discrete_sequence=HISTORY_COLORS,
+    )
+    fig.update_layout(**LAYOUT)
+    return fig
+
+
+def history_table(rows):
+    table = pd.DataFrame(rows)
+    columns = {"period": "Period", "days": "Days"}
+    columns.update({f"{a}_rate": f"{t} %" for a, t in zip(ACTIVITIES, TASKS)})
+    columns.update({f"{a}_minutes": f"{t} min" for a, t in zip(ACTIVITIES, TASKS)})
+    columns.update({"mood_mean": "Mood", "top_learning_type": "Top learning", "top_reading_book": "Top book"})
+    return table[list(columns)].rename(columns=columns).set_index("Period")
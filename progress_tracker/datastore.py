@@ -0,0 +1,348 @@
+import sys
+import threading
+from datetime import date
+
+import pandas as pd
+
+from .aggregates import Aggregates
+from .analytics import analyze
+from .storage import DEFAULT_DATA_COLUMNS, LIST_COLUMNS, coerce_checkins, merge_frames, title_key, upsert_checkin_row
+
+
+def _list_frame(frame, columns):
+    for col in columns:
+        if col not in frame.columns:
+            frame[col] = 0 if col == "finished" else ""
+    return frame
+
+
+def _clean_item(row, columns):
+    item = {}
+    for col in columns:
+        value = row.get(col)
+        if col == "finished":
+            try:
+                item[col] = 1 if float(value) >= 1 else 0
+            except (TypeError, ValueError):
+                item[col] = 0
+        elif value is None or (not isinstance(value, str) and pd.isna(value)):
+            item[col] = ""
+        else:
+            item[col] = str(value).strip()
+    return item
+
+
+def _item_bytes(item):
+    return 100 + sum(len(str(v)) for v in item.values())
+
+
+# A book or watch list keyed by title. Rows keep their storage order, which is
+# also their sheet order (sheet row = position + 2), and the title index makes
+# lookups, appends and single-flag updates O(1).
+class ItemList:
+    def __init__(self, columns, frame=None):
+        self.columns = list(columns)
+        self._rows = []
+        self._index = {}
+        self._bytes = 0
+        if frame is not None:
+            frame = _list_frame(frame.copy(deep=False), self.columns)
+            for row in frame[self.columns].to_dict("records"):
+                self.add(_clean_item(row, self.columns))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def position(self, title):
+        return self._index.get(title_key(title))
+
+    def row(self, position):
+        return dict(self._rows[position])
+
+    def new_item(self, row):
+        # Validated item for add(); duplicate titles are rejected
+        item = _clean_item(row, self.columns)
+        if not item["title"]:
+            raise ValueError("Title is empty.")
+        if self.position(item["title"]) is not None:
+            raise ValueError(f'"{item["title"]}" is already on the list.')
+        return item
+
+    def add(self, item):
+        # Older files may repeat a title; the index keeps the first row
+        self._index.setdefault(title_key(item["title"]), len(self._rows))
+        self._rows.append(item)
+        self._bytes += _item_bytes(item)
+        return len(self._rows) - 1
+
+    def set(self, position, item):
+        self._bytes += _item_bytes(item) - _item_bytes(self._rows[position])
+        self._rows[position] = item
+
+    def memory_bytes(self):
+        return self._bytes
+
+    def unfinished(self):
+        return [
+            r["title"] for i, r in enumerate(self._rows)
+            if not r["finished"] and self._index.get(title_key(r["title"])) == i
+        ]
+
+    def frame(self):
+        return pd.DataFrame(self._rows, columns=self.columns)
+
+
+def _frame_bytes(name, value):
+    if name == "data":
+        return int(value.memory_usage(deep=True).sum())
+    return value.memory_bytes()
+
+
+def _checkin_bytes(row):
+    # One more day in the typed frame: its fixed-width columns and its text
+    return 40 + sum(len(v) for v in row.values() if isinstance(v, str))
+
+
+def _object_bytes(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(_object_bytes(k) + _object_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return size + sum(_object_bytes(v) for v in value)
+    return size
+
+
+def _fill_stored(df, stored, current, columns):
+    # df's rows for stored dates, with the stored values of columns
+    base = current.drop_duplicates("date", keep="last").set_index("date")[columns].astype(object)
+    df = df.reset_index(drop=True).astype({c: object for c in columns})
+    hits = stored.to_numpy().nonzero()[0]
+    df.loc[hits, columns] = base.loc[df.loc[hits, "date"]].to_numpy()
+    return coerce_checkins(df)
+
+
+# Process-wide tracker data shared by every session. Each frame is held once,
+# keyed by the backend's storage version, and handed out as a shallow
+# copy-on-write view, so sessions never duplicate the history and cannot modify
+# the shared copy. Writes go through the lock and always start from the current
+# frame, so concurrent saves cannot overwrite each other's rows. Book and watch
+# lists are ItemLists; positions touched since the last Sheets push are tracked
+# so the push can send just those rows.
+class TrackerData:
+    def __init__(self, backend, snapshot=None):
+        self.backend = backend
+        self.snapshot = snapshot
+        self.lock = threading.RLock()
+        self._frames = {}
+        self._aggregates = None
+        self._aggregates_version = None
+        self._analytics = (None, None)
+        self._sizes = {}
+        self._seq = 0
+        self._dirty = {name: {} for name in LIST_COLUMNS}
+        self._resync = {}
+
+    def _read(self, name):
+        if name == "data":
+            return self._read_checkins()
+        if name == "books":
+            return ItemList(LIST_COLUMNS[name], self.backend.load_books())
+        return ItemList(LIST_COLUMNS[name], self.backend.load_entertainment())
+
+    def _read_checkins(self):
+        # The snapshot when it matches the stored version, else a full parse
+        # that refreshes it. The version is taken first, so a write racing the
+        # parse leaves a snapshot that is already out of date, never a wrong one.
+        version = self.backend.version("data")
+        if self.snapshot is not None:
+            df = self.snapshot.load(version)
+            if df is not None:
+                return df
+        df = coerce_checkins(self.backend.load_checkins())
+        if self.snapshot is not None:
+            self.snapshot.save(df, version)
+        return df
+
+    def _set_frame(self, name, version, value, size=None):
+        self._frames[name] = (version, value)
+        # Kept current on every change, so memory_bytes() never needs the lock;
+        # a caller that knows the change passes the new size instead of a scan
+        self._sizes[name] = _frame_bytes(name, value) if size is None else size
+
+    def _saved_checkins(self, df, size=None):
+        version = self.backend.version("data")
+        self._set_frame("data", version, df, size)
+        if self.snapshot is not None:
+            self.snapshot.save(df, version)
+        return version
+
+    def _current(self, name):
+        version = self.backend.version(name)
+        cached = self._frames.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, self._read(name))
+            self._set_frame(name, *cached)
+            if name in LIST_COLUMNS:
+                self._changed(name, None)
+        return cached[1]
+
+    def _changed(self, name, position):
+        # position None: the whole list changed and is pushed in full
+        self._seq += 1
+        if position is None:
+            self._resync[name] = self._seq
+            self._dirty[name] = {}
+        else:
+            self._dirty[name][position] = self._seq
+
+    def _commit(self, name, value):
+        if name == "data":
+            self.backend.save_checkins(value)
+            self._saved_checkins(value)
+            return
+        if name == "books":
+            self.backend.save_books(value.frame())
+        else:
+            self.backend.save_entertainment(value.frame())
+        self._set_frame(name, self.backend.version(name), value)
+
+    def version(self, name):
+        return self.backend.version(name)
+
+    def frame(self, name):
+        with self.lock:
+            current = self._current(name)
+            return current.copy(deep=False) if name == "data" else current.frame()
+
+    def checkins(self):
+        return self.frame("data")
+
+    def unfinished(self, name):
+        with self.lock:
+            return self._current(name).unfinished()
+
+    def aggregates(self):
+        with self.lock:
+            version = self.backend.version("data")
+            if self._aggregates is None or self._aggregates_version != version:
+                self._aggregates = Aggregates.from_frame(self._current("data"))
+                self._aggregates_version = version
+            return self._aggregates
+
+    def analytics(self, today=None):
+        # Whole-history streaks, trends and correlations; recomputed only when
+        # the data version or the day changes (the current streaks depend on it)
+        today = today or date.today()
+        with self.lock:
+            key = (self.backend.version("data"), today)
+            if self._analytics[0] != key:
+                self._analytics = (key, analyze(self._current("data"), today))
+                self._sizes["analytics"] = _object_bytes(self._analytics[1])
+            return self._analytics[1]
+
+    def memory_bytes(self):
+        # Rough resident size of the loaded frames, the aggregates and the
+        # analytics, for tenant eviction. Read without the lock, so a tenant
+        # busy loading never holds up the others.
+        aggregates = self._aggregates
+        return sum(list(self._sizes.values())) + (aggregates.memory_bytes() if aggregates is not None else 0)
+
+    # -------- writes --------
+    def save_checkin(self, row):
+        with self.lock:
+            before = self.backend.version("data")
+            current = self._current("data")
+            df = upsert_checkin_row(current, row)
+            if self.backend.kind == "csv":
+                self.backend.save_checkins(df)
+            else:
+                self.backend.upsert_checkin(row)
+            size = self._sizes["data"] + (_checkin_bytes(row) if len(df) > len(current) else 0)
+            after = self._saved_checkins(df, size)
+            if self._aggregates is not None and self._aggregates_version == before:
+                self._aggregates.apply(row)
+                self._aggregates_version = after
+            return df.copy(deep=False)
+
+    def save_checkins(self, df):
+        with self.lock:
+            self._commit("data", coerce_checkins(df))
+
+    def import_checkins(self, df, replace=True, columns=None):
+        # Bulk upsert of typed check-ins: a date already stored is overwritten
+        # in place (or kept as is without replace) and new dates are appended,
+        # so the backend only rewrites when a stored day changes. columns are
+        # the ones the source actually supplied (default: all); a stored day
+        # keeps its values for the rest. Returns the (added, replaced) counts.
+        with self.lock:
+            current = self._current("data")
+            df = df[df["date"].notna()].drop_duplicates("date", keep="last")
+            stored = df["date"].isin(current["date"])
+            if not replace:
+                df, stored = df[~stored], stored[~stored]
+            if df.empty:
+                return 0, 0
+            replaced = int(stored.sum())
+            kept = [c for c in DEFAULT_DATA_COLUMNS if columns is not None and c not in columns]
+            if replaced and kept:
+                df = _fill_stored(df, stored, current, kept)
+            if replaced:
+                merged = coerce_checkins(merge_frames(current, df, "date"))
+            else:
+                merged = coerce_checkins(pd.concat([current, df], ignore_index=True))
+            if self.backend.kind == "csv" and replaced:
+                self.backend.save_checkins(merged)
+            else:
+                self.backend.append_checkins(df)
+            self._saved_checkins(merged)
+            return len(df) - replaced, replaced
+
+    def replace(self, name, frame):
+        with self.lock:
+            if name == "data":
+                self._commit(name, coerce_checkins(frame))
+            else:
+                self._commit(name, ItemList(LIST_COLUMNS[name], frame))
+                self._changed(name, None)
+
+    def add_item(self, name, title, **fields):
+        # Raises ValueError for an empty or duplicate title
+        with self.lock:
+            items = self._current(name)
+            item = items.new_item({"title": title, **fields, "finished": 0})
+            self.backend.append_item(name, item)
+            position = items.add(item)
+            self._set_frame(name, self.backend.version(name), items)
+            self._changed(name, position)
+            return item
+
+    def finish_item(self, name, title):
+        with self.lock:
+            items = self._current(name)
+            position = items.position(title)
+            if position is None:
+                return None
+            item = {**items.row(position), "finished": 1}
+            self.backend.update_item(name, item["title"], {"finished": 1})
+            items.set(position, item)
+            self._set_frame(name, self.backend.version(name), items)
+            self._changed(name, position)
+            return item
+
+    # -------- Sheets push bookkeeping --------
+    def list_delta(self, name):
+        # ({position: row} touched since the last push, or None when the whole
+        # list must be pushed) and a marker to hand back to list_pushed()
+        with self.lock:
+            items = self._current(name)
+            if name in self._resync:
+                return None, self._seq
+            return {p: items.row(p) for p in self._dirty[name]}, self._seq
+
+    def list_pushed(self, name, marker):
+        with self.lock:
+            if self._resync.get(name, marker + 1) <= marker:
+                del self._resync[name]
+            dirty = self._dirty[name]
+            for position in [p for p, seq in dirty.items() if seq <= marker]:
+                del dirty[position]
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .storage import atomic_write_text
+
+DEFAULT_FEEDS = [
+    ("https://techcrunch.com/feed/", "TechCrunch"),
+    ("https://venturebeat.com/feed/", "VentureBeat"),
+    ("https://www.theverge.com/rss/index.xml", "The Verge"),
+]
+TTL_SECONDS = 3600
+TIMEOUT_SECONDS = 5
+PER_FEED_ENTRIES = 4
+MAX_ENTRIES = 12
+_USER_AGENT = "stress-proof-tracker/1.0 (+digest)"
+
+
+def fetch_feed(url, source, etag=None, modified=None, timeout=TIMEOUT_SECONDS):
+    # Conditional GET: returns None when the server answers 304 Not Modified
+    import feedparser
+
+    headers = {"User-Agent": _USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            body = resp.read()
+            etag = resp.headers.get("ETag")
+            modified = resp.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+    feed = feedparser.parse(body)
+    entries = []
+    for e in feed.entries[:PER_FEED_ENTRIES]:
+        title = e.get("title", "")
+        if e.get("published_parsed"):
+            published = time.strftime("%Y-%m-%d", e.published_parsed)
+        else:
+            published = e.get("published", "")[:10] if e.get("published") else ""
+        entries.append({
+            "title": title[:80] + ("..." if len(title) > 80 else ""),
+            "link": e.get("link", "#"),
+            "source": source,
+            "published": published,
+        })
+    return {"source": source, "etag": etag, "modified": modified, "entries": entries}
+
+
+def refresh_snapshot(feeds, previous=None, timeout=TIMEOUT_SECONDS):
+    # All feeds are fetched in parallel under one deadline; a feed that fails,
+    # times out or is not modified keeps its previous entries.
+    previous_feeds = (previous or {}).get("feeds", {})
+    pool = ThreadPoolExecutor(max_workers=max(len(feeds), 1))
+    futures = {}
+    for url, source in feeds:
+        prev = previous_feeds.get(url, {})
+        futures[pool.submit(fetch_feed, url, source, prev.get("etag"), prev.get("modified"), timeout)] = url
+    done, _ = wait(futures, timeout=timeout)
+    pool.shutdown(wait=False)
+    merged = {}
+    for future, url in futures.items():
+        result = None
+        if future in done and future.exception() is None:
+            result = future.result()
+        if result is not None:
+            merged[url] = result
+        elif url in previous_feeds:
+            merged[url] = previous_feeds[url]
+    return {"fetched_at": time.time(), "urls": [url for url, _ in feeds], "feeds": merged}
+
+
+def digest_entries(snapshot, feeds):
+    entries = []
+    for url, _ in feeds:
+        entries.extend(snapshot.get("feeds", {}).get(url, {}).get("entries", []))
+    entries.sort(key=lambda x: x["published"] or "", reverse=True)
+    return entries[:MAX_ENTRIES]
+
+
+def load_snapshot(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_snapshot(path, snapshot):
+    atomic_write_text(path, json.dumps(snapshot))
+
+
+# Stale-while-revalidate digest backed by a JSON snapshot on disk: the last good
+# snapshot is served immediately and, once older than the TTL, revalidated by a
+# single background thread. Only a cold start (no snapshot, or a changed feed
+# list) fetches in the foreground.
+class DigestCache:
+    def __init__(self, path, ttl=TTL_SECONDS, timeout=TIMEOUT_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._snapshot = load_snapshot(path)
+        self._refreshing = None
+
+    def entries(self, feeds):
+        feeds = [tuple(f) for f in feeds]
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None or snapshot.get("urls") != [url for url, _ in feeds]:
+            snapshot = self.refresh(feeds)
+        elif time.time() - snapshot.get("fetched_at", 0) > self.ttl:
+            self.refresh_async(feeds)
+        return digest_entries(snapshot, feeds)
+
+    def refresh(self, feeds):
+        with self._lock:
+            previous = self._snapshot
+        snapshot = refresh_snapshot(feeds, previous, self.timeout)
+        with self._lock:
+            self._snapshot = snapshot
+        try:
+            save_snapshot(self.path, snapshot)
+        except OSError:
+            pass
+        return snapshot
+
+    def refresh_async(self, feeds):
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            self._refreshing = threading.Thread(target=self.refresh, args=(feeds,), daemon=True)
+            self._refreshing.start()
+            return self._refreshing
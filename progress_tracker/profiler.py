@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+
+HISTORY = 200
+QUANTILES = (0.5, 0.95)
+
+
+def _quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Timings for one rerun. Sections are entered in script order; entering one
+# closes the previous, so the script only marks where each section starts.
+class RerunTimer:
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self.started_at = time.time()
+        self._start = self._mark = time.perf_counter()
+        self._section = None
+        self.sections = {}
+        self.counters = Counter()
+
+    def enter(self, name):
+        self._close(time.perf_counter())
+        self._section = name
+
+    def _close(self, now):
+        if self._section is not None:
+            self.sections[self._section] = self.sections.get(self._section, 0.0) + now - self._mark
+        self._mark = now
+
+    def finish(self):
+        now = time.perf_counter()
+        self._close(now)
+        self._section = None
+        record = {
+            "at": self.started_at,
+            "total": now - self._start,
+            "sections": dict(self.sections),
+            "counters": dict(self.counters),
+        }
+        self._profiler._record(self, record)
+        return record
+
+
+# Process-wide rerun profiler: a rolling history of per-section timings and
+# call counters, plus cumulative totals for export. Calls are attributed to the
+# rerun running on the calling thread; calls from background threads (Sheets
+# sync, digest refresh) only go into the process totals.
+class RerunProfiler:
+    def __init__(self, history=HISTORY):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._runs = deque(maxlen=history)
+        self._section_totals = {}
+        self._calls = Counter()
+        self._reruns = 0
+        self._rerun_seconds = 0.0
+
+    def start_run(self):
+        # A rerun cut short (st.rerun, widget interrupt) is never finished and is dropped
+        run = RerunTimer(self)
+        self._local.run = run
+        return run
+
+    def count(self, name, n=1):
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.counters[name] += n
+        with self._lock:
+            self._calls[name] += n
+
+    def _record(self, run, record):
+        if getattr(self._local, "run", None) is run:
+            self._local.run = None
+        with self._lock:
+            self._runs.append(record)
+            self._reruns += 1
+            self._rerun_seconds += record["total"]
+            for name, seconds in record["sections"].items():
+                total = self._section_totals.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += 1
+
+    def runs(self):
+        with self._lock:
+            return list(self._runs)
+
+    def summary(self):
+        # Per-section stats over the rolling history, slowest median first
+        runs = self.runs()
+        samples = {}
+        for record in runs:
+            for name, seconds in record["sections"].items():
+                samples.setdefault(name, []).append(seconds)
+        samples["total"] = [r["total"] for r in runs]
+        rows = []
+        for name, values in samples.items():
+            if not values:
+                continue
+            rows.append({
+                "section": name,
+                "runs": len(values),
+                "last": values[-1],
+                "mean": sum(values) / len(values),
+                "p50": _quantile(values, 0.5),
+                "p95": _quantile(values, 0.95),
+                "max": max(values),
+            })
+        rows.sort(key=lambda r: (r["section"] != "total", -r["p50"]))
+        return rows
+
+    def calls(self):
+        with self._lock:
+            return dict(self._calls)
+
+    def to_json(self):
+        with self._lock:
+            reruns, seconds = self._reruns, self._rerun_seconds
+        return json.dumps({
+            "reruns": reruns,
+            "rerun_seconds": seconds,
+            "calls": self.calls(),
+            "summary": self.summary(),
+            "runs": self.runs(),
+        }, indent=2)
+
+    def to_prometheus(self):
+        runs = self.runs()
+        with self._lock:
+            reruns, seconds = self._reruns, self._rerun_seconds
+            section_totals = {name: tuple(t) for name, t in self._section_totals.items()}
+            calls = dict(self._calls)
+        samples = {}
+        for record in runs:
+            for name, value in record["sections"].items():
+                samples.setdefault(name, []).append(value)
+        totals = [r["total"] for r in runs]
+
+        lines = [
+            "# HELP tracker_rerun_seconds Full script rerun time; quantiles over the recent reruns.",
+            "# TYPE tracker_rerun_seconds summary",
+        ]
+        for q in QUANTILES if totals else ():
+            lines.append(f'tracker_rerun_seconds{{quantile="{q}"}} {_quantile(totals, q):.6f}')
+        lines += [f"tracker_rerun_seconds_sum {seconds:.6f}", f"tracker_rerun_seconds_count {reruns}"]
+
+        lines += [
+            "# HELP tracker_section_seconds Time per script section; quantiles over the recent reruns.",
+            "# TYPE tracker_section_seconds summary",
+        ]
+        for name in sorted(section_totals):
+            label = _label(name)
+            for q in QUANTILES if samples.get(name) else ():
+                lines.append(f'tracker_section_seconds{{section="{label}",quantile="{q}"}} {_quantile(samples[name], q):.6f}')
+            total, count = section_totals[name]
+            lines.append(f'tracker_section_seconds_sum{{section="{label}"}} {total:.6f}')
+            lines.append(f'tracker_section_seconds_count{{section="{label}"}} {count}')
+
+        lines += [
+            "# HELP tracker_calls_total Storage and Google Sheets API calls.",
+            "# TYPE tracker_calls_total counter",
+        ]
+        for name in sorted(calls):
+            lines.append(f'tracker_calls_total{{call="{_label(name)}"}} {calls[name]}')
+        return "\n".join(lines) + "\n"
+
+
+# Counts every method call on the wrapped object as "<prefix>.<method>"
+class CountedCalls:
+    def __init__(self, target, profiler, prefix):
+        self._target = target
+        self._profiler = profiler
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._profiler.count(f"{self._prefix}.{name}")
+            return attr(*args, **kwargs)
+
+        return call
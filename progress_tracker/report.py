@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from .aggregates import ACTIVITIES
+from .analytics import analyze
+from .datastore import ItemList
+from .snapshot import SNAPSHOT_FILE, Snapshot
+from .storage import BOOK_COLUMNS, ENTERTAINMENT_COLUMNS, CSVStore, coerce_checkins
+
+# Headless weekly summaries for many tracker directories (data.csv plus the
+# optional books.csv and entertainment.csv). Each directory is summarized in a
+# worker process with the same storage and analytics code as the app, and one
+# flat row per directory is written as soon as it is ready.
+FILES = ("data.csv", "books.csv", "entertainment.csv")
+FORMATS = ("json", "csv")
+
+COLUMNS = ["path", "days", "first_date", "last_date", "week_days"]
+COLUMNS += [f"{a}_{field}" for a in ACTIVITIES for field in ("done", "minutes", "change", "streak", "longest_streak", "mood_r")]
+COLUMNS += [
+    "mood_mean", "mood_change", "top_learning_type", "learning_evenness",
+    "books_reading", "books_finished", "watchlist_open", "watchlist_finished", "error",
+]
+
+
+def find_sets(paths):
+    # Directories holding a data.csv: each path itself, or any directory below it
+    seen = set()
+    for path in paths:
+        if os.path.isfile(path) and os.path.basename(path) == FILES[0]:
+            path = os.path.dirname(path) or "."
+        if os.path.isfile(os.path.join(path, FILES[0])):
+            found = [path]
+        else:
+            found = sorted(root for root, _, files in os.walk(path) if FILES[0] in files)
+        for directory in found:
+            key = os.path.realpath(directory)
+            if key not in seen:
+                seen.add(key)
+                yield directory
+
+
+def _lists(frame, columns):
+    items = ItemList(columns, frame)
+    finished = sum(1 for i in range(len(items)) if items.row(i)["finished"])
+    return len(items.unfinished()), finished
+
+
+def _read(path, missing=None):
+    # Unlike CSVStore, a file that cannot be read is an error here, so it
+    # lands in the row; only the list files may be missing (missing columns)
+    if missing is not None and not os.path.exists(path):
+        return pd.DataFrame(columns=missing)
+    return pd.read_csv(path, keep_default_na=False, na_values=[""])
+
+
+def summarize(directory, today=None):
+    # One flat row; a directory that cannot be read reports the error instead
+    today = today or date.today()
+    row = dict.fromkeys(COLUMNS)
+    row["path"] = directory
+    try:
+        store = CSVStore(*(os.path.join(directory, name) for name in FILES))
+        # The app's snapshot when it is current; never written from here
+        df = Snapshot(os.path.join(directory, SNAPSHOT_FILE)).load(store.version("data"))
+        if df is None:
+            df = coerce_checkins(_read(store.files["data"]))
+        row["books_reading"], row["books_finished"] = _lists(_read(store.files["books"], BOOK_COLUMNS), BOOK_COLUMNS)
+        row["watchlist_open"], row["watchlist_finished"] = _lists(
+            _read(store.files["entertainment"], ENTERTAINMENT_COLUMNS), ENTERTAINMENT_COLUMNS
+        )
+        analysis = analyze(df, today)
+    except Exception as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        return row
+    if analysis is None:
+        row["days"] = 0
+        return row
+    dates = df["date"].dropna()
+    week, change = analysis["trends"]["this_week"], analysis["trends"]["change"]
+    row.update({
+        "days": analysis["days"],
+        "first_date": dates.min().date().isoformat(),
+        "last_date": dates.max().date().isoformat(),
+        "week_days": week["days"],
+        "mood_mean": week["mood_mean"],
+        "mood_change": change["mood_mean"],
+    })
+    for a in ACTIVITIES:
+        row[f"{a}_done"] = week["counts"][a]
+        row[f"{a}_minutes"] = week["minutes"][a]
+        row[f"{a}_change"] = change["counts"][a]
+        row[f"{a}_streak"] = analysis["streaks"][a]["current"]
+        row[f"{a}_longest_streak"] = analysis["streaks"][a]["longest"]
+        row[f"{a}_mood_r"] = analysis["mood_correlation"][a]
+    balance = analysis["learning_balance"]["all_time"]
+    row["top_learning_type"] = balance["shares"][0][0] if balance["shares"] else None
+    row["learning_evenness"] = balance["evenness"]
+    return row
+
+
+def _summarize_all(args):
+    directory, today = args
+    return summarize(directory, today)
+
+
+def run(paths, out, fmt="json", workers=None, today=None):
+    # Streams one JSON object per line, or CSV with a header row, in input
+    # order; returns the number of directories that failed.
+    today = today or date.today()
+    sets = [(d, today) for d in find_sets(paths)]
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            out.write(json.dumps(row) + "\n")
+
+    failed = 0
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(sets) <= 1:
+        rows = map(_summarize_all, sets)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(sets)))
+        # Chunks keep per-task overhead low for hundreds of small histories
+        rows = pool.map(_summarize_all, sets, chunksize=max(1, len(sets) // (workers * 4)))
+    try:
+        for row in rows:
+            failed += row["error"] is not None
+            write(row)
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return failed
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m progress_tracker report", description=(
+        "Summarize the last week of one or more tracker directories (data.csv, books.csv, entertainment.csv)."
+    ))
+    parser.add_argument("paths", nargs="+", help="tracker directories, or folders searched for data.csv")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="json: one object per line (default); csv")
+    parser.add_argument("--output", "-o", help="write here instead of stdout")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count; 1 runs inline)")
+    parser.add_argument("--today", type=date.fromisoformat, help="report as of this date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            failed = run(args.paths, out, args.format, args.workers, args.today)
+    else:
+        failed = run(args.paths, sys.stdout, args.format, args.workers, args.today)
+    return 1 if failed else 0
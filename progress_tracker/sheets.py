@@ -0,0 +1,576 @@
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from .storage import BOOK_COLUMNS, DEFAULT_DATA_COLUMNS, ENTERTAINMENT_COLUMNS, merge_frames
+
+
+# -------- Google Sheets client pool --------
+# One authorized client per process: the OAuth session (which refreshes its own
+# token) and the worksheet handles are reused across reruns and sessions.
+_APPEND_METHODS = {"append_row", "append_rows", "add_rows", "insert_row", "insert_rows"}
+# gspread waits forever by default; a host that never answers must not hang a push
+REQUEST_TIMEOUT = 30
+# A partition whose first read failed is tried again at most this often
+HYDRATE_RETRY_SECONDS = 30
+
+
+def is_auth_error(exc):
+    try:
+        from google.auth.exceptions import RefreshError
+        if isinstance(exc, RefreshError):
+            return True
+    except Exception:
+        pass
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 401
+
+
+def is_connection_error(exc):
+    try:
+        import requests
+        from google.auth.exceptions import TransportError
+        return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TransportError))
+    except Exception:
+        return False
+
+
+class PooledWorksheet:
+    def __init__(self, pool, title):
+        self._pool = pool
+        self.title = title
+
+    def __getattr__(self, name):
+        attr = getattr(self._pool._handle(self.title), name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._pool.profiler.count(f"sheets.{name}")
+            try:
+                return getattr(self._pool._handle(self.title), name)(*args, **kwargs)
+            except Exception as exc:
+                auth = is_auth_error(exc)
+                if not auth and not is_connection_error(exc):
+                    raise
+                self._pool.reset()
+                # A dropped connection may still have applied an append; only auth failures are safe to replay
+                if not auth and name in _APPEND_METHODS:
+                    raise
+                self._pool.profiler.count(f"sheets.{name}")
+                return getattr(self._pool._handle(self.title), name)(*args, **kwargs)
+
+        return call
+
+
+class SheetPool:
+    def __init__(self, creds_json, sheet_id, profiler):
+        self._creds_json = creds_json
+        self._sheet_id = sheet_id
+        self.profiler = profiler
+        self._lock = threading.RLock()
+        self._spreadsheet = None
+        self._handles = {}
+        # Serializes writes to the sheet; synced survives reconnects
+        self.write_lock = threading.Lock()
+        self.synced = {}
+        # Drive modifiedTime at the last read, and when remote changes were last pulled
+        self.revision = None
+        self.refreshed_at = 0.0
+        self.refresh_lock = threading.Lock()
+        self.hydrate_lock = threading.Lock()
+        self.hydrated = False
+        self.hydrate_at = 0.0
+        self._partitions = {}
+
+    def title(self, name):
+        return name
+
+    def partition(self, prefix):
+        # Per-tenant view of this spreadsheet; worksheets are "<prefix><name>"
+        with self._lock:
+            part = self._partitions.get(prefix)
+            if part is None:
+                part = self._partitions[prefix] = SheetPartition(self, prefix)
+            return part
+
+    def drop_partition(self, prefix):
+        # Forgets a tenant's synced rows; its next sync starts with a fresh read
+        with self._lock:
+            self._partitions.pop(prefix, None)
+        for name in _SHEETS:
+            self.synced.pop(f"{prefix}{name}", None)
+
+    def spreadsheet(self):
+        with self._lock:
+            if self._spreadsheet is None:
+                import gspread
+                import json
+                gc = gspread.service_account_from_dict(json.loads(self._creds_json))
+                gc.set_timeout(REQUEST_TIMEOUT)
+                self.profiler.count("sheets.open_by_key")
+                self._spreadsheet = gc.open_by_key(self._sheet_id)
+            return self._spreadsheet
+
+    def _handle(self, title):
+        with self._lock:
+            if title not in self._handles:
+                # One metadata request returns every worksheet handle
+                spreadsheet = self.spreadsheet()
+                self.profiler.count("sheets.worksheets")
+                self._handles.update((ws.title, ws) for ws in spreadsheet.worksheets())
+            if title not in self._handles:
+                import gspread
+                raise gspread.exceptions.WorksheetNotFound(title)
+            return self._handles[title]
+
+    def _call(self, name, *args):
+        # Spreadsheet-level reads; retried once after an auth or connection reset
+        for attempt in range(2):
+            self.profiler.count(f"sheets.{name}")
+            try:
+                return getattr(self.spreadsheet(), name)(*args)
+            except Exception as exc:
+                if attempt or not (is_auth_error(exc) or is_connection_error(exc)):
+                    raise
+                self.reset()
+
+    def batch_get(self, ranges):
+        # Values of several A1 ranges in one request; empty ranges come back as []
+        response = self._call("values_batch_get", ranges)
+        return [r.get("values", []) for r in response.get("valueRanges", [])]
+
+    def last_update(self):
+        return self._call("get_lastUpdateTime")
+
+    def worksheet(self, title):
+        try:
+            self._handle(title)
+        except Exception as exc:
+            if not (is_auth_error(exc) or is_connection_error(exc)):
+                raise
+            self.reset()
+            self._handle(title)
+        return PooledWorksheet(self, title)
+
+    def add_worksheet(self, title, rows, cols):
+        with self._lock:
+            spreadsheet = self.spreadsheet()
+            self.profiler.count("sheets.add_worksheet")
+            self._handles[title] = spreadsheet.add_worksheet(title=title, rows=rows, cols=cols)
+        return PooledWorksheet(self, title)
+
+    def reset(self):
+        with self._lock:
+            self._spreadsheet = None
+            self._handles.clear()
+
+
+# A tenant's slice of a shared SheetPool: the same client, handles, write lock
+# and synced rows, with its own worksheet titles and refresh state.
+class SheetPartition:
+    def __init__(self, pool, prefix):
+        self.pool = pool
+        self.prefix = prefix
+        self.profiler = pool.profiler
+        self.write_lock = pool.write_lock
+        self.synced = pool.synced
+        self.revision = None
+        self.refreshed_at = 0.0
+        self.refresh_lock = threading.Lock()
+        self.hydrate_lock = threading.Lock()
+        self.hydrated = False
+        self.hydrate_at = 0.0
+
+    def title(self, name):
+        return f"{self.prefix}{name}"
+
+    def __getattr__(self, name):
+        # spreadsheet, worksheet, add_worksheet, batch_get, last_update, reset
+        return getattr(self.pool, name)
+
+
+# -------- Google Sheets delta sync --------
+# pool.synced records the rows already persisted per worksheet, so a push only
+# sends the rows that are new or changed instead of clearing and re-appending.
+_SHEETS = {
+    "data": (DEFAULT_DATA_COLUMNS, 1000, 20),
+    "books": (BOOK_COLUMNS, 200, 5),
+    "entertainment": (ENTERTAINMENT_COLUMNS, 200, 5),
+}
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sheet_rows(frame, columns):
+    return [[_cell(v) for v in row] for row in frame[columns].itertuples(index=False, name=None)]
+
+
+def _row_key(row, width):
+    key = [str(_cell(v)) for v in row][:width]
+    return key + [""] * (width - len(key))
+
+
+def _remember_sheet_rows(pool, title, header, rows):
+    pool.synced[title] = {
+        "header": list(header),
+        "rows": [_row_key(r, len(header)) for r in rows],
+    }
+
+
+def _persisted_sheet_rows(pool, ws):
+    state = pool.synced.get(ws.title)
+    if state is None:
+        values = ws.get_all_values()
+        header = values[0] if values else []
+        _remember_sheet_rows(pool, ws.title, header, values[1:])
+        state = pool.synced[ws.title]
+    return state
+
+
+def _open_worksheet(pool, name):
+    import gspread
+    try:
+        return pool.worksheet(pool.title(name))
+    except gspread.exceptions.WorksheetNotFound:
+        header, rows, cols = _SHEETS[name]
+        ws = pool.add_worksheet(title=pool.title(name), rows=rows, cols=cols)
+        ws.append_row(header)
+        return ws
+
+
+def _rewrite_sheet(ws, header, rows, old_height=0):
+    # Full rewrite as a single range update; blank rows overwrite any leftovers
+    values = [list(header)] + rows
+    width = len(header)
+    values += [[""] * width for _ in range(old_height - len(values))]
+    if len(values) > ws.row_count:
+        ws.add_rows(len(values) - ws.row_count)
+    ws.update(range_name="A1", values=values)
+
+
+def _sync_sheet_rows(pool, ws, header, rows):
+    from gspread.utils import rowcol_to_a1
+
+    header = list(header)
+    persisted = _persisted_sheet_rows(pool, ws)
+    old = persisted["rows"]
+    try:
+        if len(rows) < len(old):
+            # A shorter frame than the sheet means it was loaded from stale or partial data;
+            # dropping rows is left to explicit compaction.
+            raise ValueError(f"Refusing to sync {len(rows)} rows over {len(old)} persisted rows")
+        if persisted["header"] != header:
+            _rewrite_sheet(ws, header, rows, len(old) + 1)
+        else:
+            keys = [_row_key(r, len(header)) for r in rows]
+            changed = [i for i in range(len(old)) if keys[i] != old[i]]
+            new = rows[len(old):]
+            # Sheet rows are 1-based and row 1 is the header
+            updates = [
+                {"range": f"A{i + 2}:{rowcol_to_a1(i + 2, len(header))}", "values": [rows[i]]}
+                for i in changed
+            ]
+            if new and len(rows) + 1 <= ws.row_count:
+                first = len(old) + 2
+                updates.append({
+                    "range": f"A{first}:{rowcol_to_a1(len(rows) + 1, len(header))}",
+                    "values": new,
+                })
+                new = []
+            if updates:
+                ws.batch_update(updates)
+            if new:
+                ws.append_rows(new)
+    except Exception:
+        # Unknown remote state: re-read it before the next sync
+        pool.synced.pop(ws.title, None)
+        raise
+    _remember_sheet_rows(pool, ws.title, header, rows)
+
+
+def _sync_list_rows(pool, ws, header, delta):
+    # Books/watchlist: only rows touched since the last push are sent. Finishing
+    # one item is a single-cell update; new items go out in one write. Returns
+    # False when the persisted rows are unknown and a full sync is needed.
+    from gspread.utils import rowcol_to_a1
+
+    header = list(header)
+    state = pool.synced.get(ws.title)
+    if state is None or state["header"] != header:
+        return False
+    old = state["rows"]
+    width = len(header)
+    rows = {p: [_cell(row.get(c)) for c in header] for p, row in delta.items()}
+    new = sorted(p for p in rows if p >= len(old))
+    if new != list(range(len(old), len(old) + len(new))):
+        return False
+    changed = {p: r for p, r in rows.items() if p < len(old) and _row_key(r, width) != old[p]}
+    cells = [(p, j) for p, r in changed.items() for j, v in enumerate(_row_key(r, width)) if v != old[p][j]]
+    try:
+        if not new and len(cells) == 1:
+            p, j = cells[0]
+            ws.update_cell(p + 2, j + 1, rows[p][j])
+        else:
+            updates = [
+                {"range": f"A{p + 2}:{rowcol_to_a1(p + 2, width)}", "values": [r]}
+                for p, r in sorted(changed.items())
+            ]
+            appended = [rows[p] for p in new]
+            if appended and len(old) + len(appended) + 1 <= ws.row_count:
+                first = len(old) + 2
+                updates.append({
+                    "range": f"A{first}:{rowcol_to_a1(first + len(appended) - 1, width)}",
+                    "values": appended,
+                })
+                appended = []
+            if updates:
+                ws.batch_update(updates)
+            if appended:
+                ws.append_rows(appended)
+    except Exception:
+        pool.synced.pop(ws.title, None)
+        raise
+    for p, r in changed.items():
+        old[p] = _row_key(r, width)
+    old.extend(_row_key(rows[p], width) for p in new)
+    return True
+
+
+def compact(pool, data):
+    # Rewrites the data worksheet from the local history in one request. Until
+    # the partition is hydrated the local history may be missing the sheet's
+    # rows, so rewriting from it could wipe them.
+    if not pool.hydrated:
+        raise ValueError("Refusing to compact before the sheet has been read")
+    ws = _open_worksheet(pool, "data")
+    rows = _sheet_rows(data.frame("data"), DEFAULT_DATA_COLUMNS)
+    with pool.write_lock:
+        try:
+            old_height = len(_persisted_sheet_rows(pool, ws)["rows"]) + 1
+            _rewrite_sheet(ws, DEFAULT_DATA_COLUMNS, rows, old_height)
+        except Exception:
+            pool.synced.pop(ws.title, None)
+            raise
+        _remember_sheet_rows(pool, ws.title, DEFAULT_DATA_COLUMNS, rows)
+
+
+# -------- Push, hydrate and refresh --------
+# push_worksheet runs on the SyncQueue worker thread; hydrate runs once per
+# partition, on a background thread (schedule_hydrate) or on the worker before
+# its first push, and pull_remote_changes on a throttled background thread.
+def push_worksheet(pool, data, name):
+    header = _SHEETS[name][0]
+    ws = _open_worksheet(pool, name)
+    with pool.write_lock:
+        if name == "data":
+            _sync_sheet_rows(pool, ws, header, _sheet_rows(data.frame(name), header))
+            return
+        delta, marker = data.list_delta(name)
+        if delta is None or not _sync_list_rows(pool, ws, header, delta):
+            _sync_sheet_rows(pool, ws, header, _sheet_rows(data.frame(name), header))
+        data.list_pushed(name, marker)
+
+
+def _sheet_range(name, first=1, last=""):
+    # Columns up to Z cover every worksheet; an empty last row reads to the end
+    return f"'{name}'!A{first}:Z{last}"
+
+
+def _values_frame(values, header):
+    # Raw cell values (header row first) as a frame of strings
+    if not values or not values[0]:
+        return pd.DataFrame(columns=header)
+    columns = values[0]
+    width = len(columns)
+    return pd.DataFrame([(r + [""] * width)[:width] for r in values[1:]], columns=columns)
+
+
+def _read_ranges(pool, ranges):
+    import gspread
+    try:
+        return pool.batch_get(ranges)
+    except gspread.exceptions.APIError as exc:
+        # A range on a missing worksheet fails the whole batch: create it, read again
+        if getattr(exc.response, "status_code", None) != 400:
+            raise
+        for name in _SHEETS:
+            _open_worksheet(pool, name)
+        return pool.batch_get(ranges)
+
+
+def _sheet_revision(pool):
+    try:
+        return pool.last_update()
+    except Exception:
+        return None
+
+
+def _fetch_sheets(pool, names):
+    # Full read of the named worksheets in one request; no data lock is held
+    # while it is in flight, so reruns and saves carry on meanwhile
+    ranges = [_sheet_range(pool.title(n)) for n in names]
+    return list(zip(names, _read_ranges(pool, ranges)))
+
+
+def _changed_rows(frame, before):
+    # Rows of frame that are new or differ from before, i.e. what was saved
+    # locally while a read was in flight
+    columns = list(frame.columns)
+    width = len(columns)
+    seen = {tuple(_row_key(r, width)) for r in _sheet_rows(before.reindex(columns=columns), columns)}
+    return frame[[tuple(_row_key(r, width)) not in seen for r in _sheet_rows(frame, columns)]]
+
+
+def _local_state(data, names):
+    # (storage version, frame) per worksheet, taken before a read goes out
+    return {n: (data.version(n), data.frame(n)) for n in names}
+
+
+def _apply_sheets(pool, data, queue, fetched, before):
+    # Fetched worksheets into the local data, under data.lock. Pending pushes
+    # are read again here, so a save queued while the request was in flight is
+    # seen: journaled local rows win over the sheet. Rows saved since before
+    # was taken win too, and are queued so they reach the sheet. A sheet that
+    # is still empty is seeded from local data instead of wiping it.
+    with data.lock:
+        pending = queue.pending()
+        for name, values in fetched:
+            title = pool.title(name)
+            key = "date" if name == "data" else "title"
+            remote = _values_frame(values, _SHEETS[name][0])
+            if values:
+                _remember_sheet_rows(pool, title, values[0], values[1:])
+            local = data.frame(name)
+            version, frame = before[name]
+            if title in pending:
+                data.replace(name, merge_frames(remote, local, key))
+            elif data.version(name) != version:
+                changed = _changed_rows(local, frame)
+                data.replace(name, merge_frames(remote, changed, key))
+                if not changed.empty:
+                    queue.enqueue(title)
+            elif remote.empty and not local.empty:
+                queue.enqueue(title)
+            else:
+                data.replace(name, remote)
+
+
+def hydrate(pool, data, queue):
+    # Journaled local changes win over the sheet. The revision is read first,
+    # so a write racing the load shows up as a change on the next refresh.
+    revision = _sheet_revision(pool)
+    before = _local_state(data, _SHEETS)
+    _apply_sheets(pool, data, queue, _fetch_sheets(pool, list(_SHEETS)), before)
+    pool.revision = revision
+    pool.refreshed_at = time.monotonic()
+    pool.hydrated = True
+
+
+def pull_remote_changes(pool, data, queue):
+    # Changes made to the sheet elsewhere (another device, the Sheets UI) since
+    # the last read. An unchanged revision means nothing is fetched. Otherwise
+    # one request reads every worksheet in full, and its rows are compared with
+    # the ones last read or written: when those are all unchanged, the rows
+    # after them are appended locally; any edit, reorder or removal reloads the
+    # worksheet from what was read. Requests are made without data.lock, which
+    # is only held to apply the rows.
+    revision = _sheet_revision(pool)
+    if revision is not None and revision == pool.revision:
+        return
+    with pool.write_lock:
+        names = [n for n in _SHEETS if pool.title(n) not in queue.pending()]
+        before = _local_state(data, names)
+        fetched = _fetch_sheets(pool, names)
+        reload = []
+        with data.lock:
+            pending = queue.pending()
+            for name, values in fetched:
+                title = pool.title(name)
+                state = pool.synced.get(title)
+                if state is None or (values or [[]])[0] != state["header"]:
+                    reload.append((name, values))
+                    continue
+                width, count = len(state["header"]), len(state["rows"])
+                if [_row_key(r, width) for r in values[1:count + 1]] != state["rows"]:
+                    reload.append((name, values))
+                    continue
+                tail = values[count + 1:]
+                if not tail or title in pending:
+                    continue
+                if data.version(name) != before[name][0]:
+                    # Saved locally while the rows were fetched: merge them
+                    reload.append((name, values))
+                    continue
+                current = data.frame(name)
+                merged = merge_frames(current, _values_frame([state["header"]] + tail, state["header"]),
+                                      "date" if name == "data" else "title")
+                if len(merged) != len(current) + len(tail):
+                    # A new row repeats an existing date or title
+                    reload.append((name, values))
+                    continue
+                data.replace(name, merged)
+                state["rows"].extend(_row_key(r, width) for r in tail)
+            if reload:
+                _apply_sheets(pool, data, queue, reload, before)
+    pool.revision = revision
+
+
+def schedule_hydrate(pool, data, queue, retry=HYDRATE_RETRY_SECONDS):
+    # The first read of a partition, on a background thread so a slow or
+    # unreachable sheet never holds up a rerun; after a failure the next
+    # attempt waits out the retry window. Returns the started thread or None.
+    if pool.hydrated or time.monotonic() - pool.hydrate_at < retry:
+        return None
+    if not pool.hydrate_lock.acquire(blocking=False):
+        return None
+    pool.hydrate_at = time.monotonic()
+
+    def run():
+        try:
+            if not pool.hydrated:
+                hydrate(pool, data, queue)
+        except Exception:
+            pass
+        finally:
+            pool.hydrate_lock.release()
+
+    thread = threading.Thread(target=run, name="sheets-hydrate", daemon=True)
+    thread.start()
+    return thread
+
+
+def schedule_refresh(pool, data, queue, interval):
+    # At most one background pull per interval per pool; 0 turns it off
+    if interval <= 0 or time.monotonic() - pool.refreshed_at < interval:
+        return
+    if not pool.refresh_lock.acquire(blocking=False):
+        return
+    pool.refreshed_at = time.monotonic()
+
+    def run():
+        try:
+            pull_remote_changes(pool, data, queue)
+        except Exception:
+            pass
+        finally:
+            pool.refresh_lock.release()
+
+    threading.Thread(target=run, name="sheets-refresh", daemon=True).start()
@@ -0,0 +1,58 @@
+import json
+
+from .storage import DEFAULT_DATA_COLUMNS, atomic_write
+
+SNAPSHOT_FILE = "data.arrow"
+# Bump when the typed frame (coerce_checkins) changes shape so old files are rebuilt
+FORMAT = 1
+
+
+# Columnar copy of the typed check-in frame (Arrow IPC) next to the tracker
+# files. It is tagged with the backend's storage version at the time it was
+# written, so a snapshot older than data.csv / tracker.db (edited by hand, by
+# another process, or replaced from Sheets) is ignored and rebuilt. Reading it
+# memory-maps the file: the numeric columns are used in place instead of being
+# parsed from text. pyarrow is optional; without it there is no snapshot.
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+
+    def _key(self, version):
+        return json.dumps({"format": FORMAT, "columns": DEFAULT_DATA_COLUMNS, "version": list(version)}).encode()
+
+    def load(self, version):
+        # The frame saved for this storage version, or None (missing, stale,
+        # unreadable, or no pyarrow)
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+        except ImportError:
+            return None
+        try:
+            with pa.memory_map(self.path) as source:
+                reader = pa.ipc.open_file(source)
+                if (reader.schema.metadata or {}).get(b"tracker") != self._key(version):
+                    return None
+                table = reader.read_all()
+            return table.to_pandas(split_blocks=True)
+        except Exception:
+            return None
+
+    def save(self, frame, version):
+        # Write-then-rename; a failed write only costs the next start a parse
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+        except ImportError:
+            return False
+        def write(tmp):
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"tracker": self._key(version)})
+            atomic_write(self.path, write)
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,431 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+DEFAULT_DATA_COLUMNS = [
+    "date", "work", "work_minutes", "gym", "gym_minutes", "learning", "learning_minutes",
+    "learning_type", "reading", "reading_book", "reading_minutes",
+    "entertainment", "entertainment_item", "entertainment_minutes",
+    "mood", "notes"
+]
+BOOK_COLUMNS = ["title", "finished"]
+ENTERTAINMENT_COLUMNS = ["title", "item_type", "finished"]
+LIST_COLUMNS = {"books": BOOK_COLUMNS, "entertainment": ENTERTAINMENT_COLUMNS}
+TEXT_COLUMNS = ["date", "learning_type", "reading_book", "entertainment_item", "notes"]
+FLAG_COLUMNS = ["work", "gym", "learning", "reading", "entertainment"]
+MINUTE_COLUMNS = [f"{c}_minutes" for c in FLAG_COLUMNS]
+CATEGORY_COLUMNS = ["learning_type", "reading_book", "entertainment_item"]
+
+
+def atomic_write(path, write):
+    # Write-then-rename so concurrent readers never see a half-written file:
+    # write(tmp) fills a temporary file next to path, which then replaces it.
+    # On failure the temporary file is removed and the error re-raised.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path, text):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    atomic_write(path, write)
+
+
+def ensure_checkin_columns(df):
+    for col in DEFAULT_DATA_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0 if "minutes" in col or col in ["work", "gym", "learning", "reading", "entertainment"] else ""
+    return df
+
+
+def coerce_checkins(df):
+    # Typed, compact in-memory frame: datetime64 dates, int8 flags, int16 minutes,
+    # nullable Int8 mood and categoricals for the repeated text columns. Bad
+    # values are coerced (dates that are not ISO become NaT, numbers are clipped to
+    # their range) rather than dropped, so row positions still match storage.
+    df = ensure_checkin_columns(df)
+    out = {"date": pd.to_datetime(df["date"].astype(str).str[:10], format="%Y-%m-%d", errors="coerce")}
+    for col in DEFAULT_DATA_COLUMNS[1:]:
+        values = df[col]
+        if col in FLAG_COLUMNS:
+            out[col] = pd.to_numeric(values, errors="coerce").fillna(0).clip(0, 1).astype("int8")
+        elif col in MINUTE_COLUMNS:
+            out[col] = pd.to_numeric(values, errors="coerce").fillna(0).clip(0, 1440).astype("int16")
+        elif col == "mood":
+            out[col] = pd.to_numeric(values, errors="coerce").round().clip(1, 5).astype("Int8")
+        elif col in CATEGORY_COLUMNS:
+            out[col] = values.astype(object).where(values.notna(), "").astype(str).str.strip().astype("category")
+        else:
+            out[col] = values.astype(object).where(values.notna(), "").astype(str)
+    return pd.DataFrame(out, index=df.index)[DEFAULT_DATA_COLUMNS]
+
+
+def serialize_checkins(df):
+    # Back to plain storage values (ISO date strings, plain text)
+    out = df[DEFAULT_DATA_COLUMNS].copy()
+    if pd.api.types.is_datetime64_any_dtype(out["date"]):
+        out["date"] = out["date"].dt.strftime("%Y-%m-%d").fillna("")
+    for col in CATEGORY_COLUMNS:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(str)
+    return out
+
+
+def _frame_keys(df, key):
+    keys = df[key].astype(str)
+    return keys.str[:10] if key == "date" else keys.str.strip()
+
+
+def upsert_checkin_row(df, row):
+    # One row per date: saving the same day again replaces that day's values.
+    # Works on the typed frame and returns one.
+    new = coerce_checkins(pd.DataFrame([row]))
+    df = coerce_checkins(df)
+    mask = df["date"] == new["date"].iloc[0]
+    if mask.any():
+        # Categoricals reject unseen labels on assignment; widen, assign, re-type
+        df = df.astype({c: object for c in CATEGORY_COLUMNS})
+        for col in DEFAULT_DATA_COLUMNS:
+            df.loc[mask, col] = new[col].iloc[0]
+        return coerce_checkins(df)
+    return coerce_checkins(pd.concat([df, new], ignore_index=True))
+
+
+def title_key(title):
+    # Book and watchlist titles are unique ignoring case and surrounding spaces
+    return str(title).strip().casefold()
+
+
+def merge_frames(remote, local, key):
+    # Local rows win over remote rows with the same key and keep the remote
+    # position; keys only known locally are appended in local order.
+    if local.empty:
+        return remote
+    if remote.empty:
+        return local
+    local = local.assign(_key=_frame_keys(local, key)).drop_duplicates("_key", keep="last")
+    remote = remote.reset_index(drop=True)
+    remote_keys = _frame_keys(remote, key)
+    columns = list(dict.fromkeys(list(remote.columns) + [c for c in local.columns if c != "_key"]))
+    merged = remote.reindex(columns=columns).astype(object)
+    positions = pd.Series(range(len(local)), index=local["_key"].to_numpy())
+    hit = remote_keys.isin(positions.index).to_numpy()
+    if hit.any():
+        values = local.reindex(columns=columns).astype(object).to_numpy()
+        merged.iloc[hit.nonzero()[0], :] = values[positions[remote_keys[hit]].to_numpy()]
+    new = local[~local["_key"].isin(set(remote_keys))].drop(columns="_key").reindex(columns=columns)
+    return pd.concat([merged, new], ignore_index=True).infer_objects()
+
+
+# -------- CSV backend --------
+class CSVStore:
+    kind = "csv"
+
+    def __init__(self, data_file, books_file, entertainment_file):
+        self.files = {"data": data_file, "books": books_file, "entertainment": entertainment_file}
+
+    def version(self, name):
+        path = self.files[name]
+        try:
+            stat = os.stat(path)
+            return ("csv", path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return ("csv", path, 0, 0)
+
+    def _read(self, name, columns):
+        # Only empty cells are missing; "None" is a real learning type
+        try:
+            return pd.read_csv(self.files[name], keep_default_na=False, na_values=[""])
+        except Exception:
+            return pd.DataFrame(columns=columns)
+
+    def _write(self, name, df):
+        atomic_write(self.files[name], lambda tmp: df.to_csv(tmp, index=False))
+
+    def load_checkins(self):
+        return self._read("data", DEFAULT_DATA_COLUMNS)
+
+    def save_checkins(self, df):
+        self._write("data", serialize_checkins(df))
+
+    def upsert_checkin(self, row):
+        self.save_checkins(upsert_checkin_row(self.load_checkins(), row))
+
+    def load_books(self):
+        return self._read("books", BOOK_COLUMNS)
+
+    def save_books(self, books_df):
+        self._write("books", books_df)
+
+    def load_entertainment(self):
+        return self._read("entertainment", ENTERTAINMENT_COLUMNS)
+
+    def save_entertainment(self, ent_df):
+        self._write("entertainment", ent_df)
+
+    def _append(self, name, frame, columns):
+        # Appended lines; only a missing or empty file is written whole
+        path = self.files[name]
+        try:
+            header = list(pd.read_csv(path, nrows=0).columns)
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                newline = f.read(1) in (b"\n", b"\r")
+        except Exception:
+            self._write(name, frame.reindex(columns=columns))
+            return
+        lines = frame.reindex(columns=header).to_csv(header=False, index=False)
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            f.write(lines if newline else "\n" + lines)
+
+    def append_item(self, name, item):
+        self._append(name, pd.DataFrame([item]), LIST_COLUMNS[name])
+
+    def append_checkins(self, df):
+        # New dates only; an older file missing some columns is rewritten whole
+        try:
+            header = set(pd.read_csv(self.files["data"], nrows=0).columns)
+        except Exception:
+            header = set(DEFAULT_DATA_COLUMNS)
+        if not header.issuperset(DEFAULT_DATA_COLUMNS):
+            self.save_checkins(coerce_checkins(pd.concat([self.load_checkins(), serialize_checkins(df)], ignore_index=True)))
+            return
+        self._append("data", serialize_checkins(df), DEFAULT_DATA_COLUMNS)
+
+    def iter_checkins(self, chunk_rows):
+        # The stored history in file order, chunk_rows rows at a time
+        try:
+            reader = pd.read_csv(self.files["data"], keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+        except Exception:
+            return
+        with reader:
+            yield from reader
+
+    def update_item(self, name, title, values):
+        # CSV has no in-place update: the list is rewritten atomically
+        frame = self._read(name, LIST_COLUMNS[name])
+        hits = (frame["title"].map(title_key) == title_key(title)).to_numpy().nonzero()[0]
+        if len(hits) == 0:
+            return
+        frame = frame.astype({c: object for c in values if c in frame.columns})
+        for col, value in values.items():
+            frame.loc[frame.index[hits[0]], col] = value
+        self._write(name, frame)
+
+
+# -------- SQLite backend --------
+# WAL mode lets sessions read while one writes; check-ins are keyed by date so a
+# save is a single-row upsert and a full load reads the rows in date order.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    date TEXT PRIMARY KEY,
+    work INTEGER NOT NULL DEFAULT 0,
+    work_minutes INTEGER NOT NULL DEFAULT 0,
+    gym INTEGER NOT NULL DEFAULT 0,
+    gym_minutes INTEGER NOT NULL DEFAULT 0,
+    learning INTEGER NOT NULL DEFAULT 0,
+    learning_minutes INTEGER NOT NULL DEFAULT 0,
+    learning_type TEXT NOT NULL DEFAULT '',
+    reading INTEGER NOT NULL DEFAULT 0,
+    reading_book TEXT NOT NULL DEFAULT '',
+    reading_minutes INTEGER NOT NULL DEFAULT 0,
+    entertainment INTEGER NOT NULL DEFAULT 0,
+    entertainment_item TEXT NOT NULL DEFAULT '',
+    entertainment_minutes INTEGER NOT NULL DEFAULT 0,
+    mood INTEGER,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS books (
+    title TEXT PRIMARY KEY,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entertainment (
+    title TEXT PRIMARY KEY,
+    item_type TEXT NOT NULL DEFAULT '',
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    name TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+"""
+_TABLES = {"data": "checkins", "books": "books", "entertainment": "entertainment"}
+
+
+def _sql_value(col, value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None if col == "mood" else ("" if col in TEXT_COLUMNS else 0)
+    if hasattr(value, "item"):
+        value = value.item()
+    if col == "date":
+        return str(value)[:10]
+    if col in TEXT_COLUMNS or col in ("title", "item_type"):
+        return str(value)
+    return int(value)
+
+
+class SQLiteStore:
+    kind = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # One connection per thread; Streamlit runs each session in its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO revisions (name, revision) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET revision = revision + 1",
+            (name,),
+        )
+
+    def version(self, name):
+        row = self._connect().execute("SELECT revision FROM revisions WHERE name = ?", (name,)).fetchone()
+        return ("sqlite", self.path, row[0] if row else 0)
+
+    def _query(self, sql, params=(), columns=None):
+        cur = self._connect().execute(sql, params)
+        return pd.DataFrame(cur.fetchall(), columns=columns or [d[0] for d in cur.description])
+
+    def load_checkins(self):
+        return self._query(f"SELECT {', '.join(DEFAULT_DATA_COLUMNS)} FROM checkins ORDER BY date")
+
+    def _upsert_sql(self):
+        cols = ", ".join(DEFAULT_DATA_COLUMNS)
+        marks = ", ".join("?" for _ in DEFAULT_DATA_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in DEFAULT_DATA_COLUMNS if c != "date")
+        return f"INSERT INTO checkins ({cols}) VALUES ({marks}) ON CONFLICT(date) DO UPDATE SET {updates}"
+
+    def upsert_checkins(self, rows, replace=False):
+        # replace: rows are the whole history and every other date is deleted
+        # in the same transaction, like the list tables' _replace
+        values = [tuple(_sql_value(c, row.get(c)) for c in DEFAULT_DATA_COLUMNS) for row in rows]
+        conn = self._connect()
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM checkins")
+            conn.executemany(self._upsert_sql(), values)
+            self._bump(conn, "data")
+
+    def upsert_checkin(self, row):
+        self.upsert_checkins([row])
+
+    def save_checkins(self, df):
+        self.upsert_checkins(df.to_dict("records"), replace=True)
+
+    def append_checkins(self, df):
+        # An upsert in one transaction, so stored dates may be passed too
+        self.upsert_checkins(serialize_checkins(df).to_dict("records"))
+
+    def iter_checkins(self, chunk_rows):
+        cur = self._connect().execute(f"SELECT {', '.join(DEFAULT_DATA_COLUMNS)} FROM checkins ORDER BY date")
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield pd.DataFrame(rows, columns=DEFAULT_DATA_COLUMNS)
+
+    def _replace(self, name, columns, frame):
+        table = _TABLES[name]
+        values = [tuple(_sql_value(c, v) for c, v in zip(columns, row))
+                  for row in frame[columns].itertuples(index=False, name=None)]
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                values,
+            )
+            self._bump(conn, name)
+
+    def load_books(self):
+        return self._query("SELECT title, finished FROM books ORDER BY rowid")
+
+    def save_books(self, books_df):
+        self._replace("books", BOOK_COLUMNS, books_df)
+
+    def load_entertainment(self):
+        return self._query("SELECT title, item_type, finished FROM entertainment ORDER BY rowid")
+
+    def save_entertainment(self, ent_df):
+        self._replace("entertainment", ENTERTAINMENT_COLUMNS, ent_df)
+
+    def append_item(self, name, item):
+        columns = LIST_COLUMNS[name]
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT INTO {_TABLES[name]} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                tuple(_sql_value(c, item.get(c)) for c in columns),
+            )
+            self._bump(conn, name)
+
+    def update_item(self, name, title, values):
+        # Titles match through title_key, as in CSVStore; SQL lower() would
+        # only fold ASCII, so the first matching rowid is looked up here
+        table = _TABLES[name]
+        conn = self._connect()
+        with conn:
+            key = title_key(title)
+            hits = [rowid for rowid, t in conn.execute(f"SELECT rowid, title FROM {table} ORDER BY rowid")
+                    if title_key(t) == key]
+            if not hits:
+                return
+            conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in values)} WHERE rowid = ?",
+                tuple(_sql_value(c, v) for c, v in values.items()) + (hits[0],),
+            )
+            self._bump(conn, name)
+
+    def import_from(self, other):
+        # One-off migration, e.g. from the CSV files on first start
+        self.save_checkins(ensure_checkin_columns(other.load_checkins()))
+        books = other.load_books()
+        if not books.empty:
+            self.save_books(books)
+        ent = other.load_entertainment()
+        if not ent.empty:
+            self.save_entertainment(ent)
+
+
+# -------- Opening a tracker directory --------
+CSV_FILES = ("data.csv", "books.csv", "entertainment.csv")
+DB_FILE = "tracker.db"
+
+
+def open_store(directory, backend="csv"):
+    # The CSV files in directory, or tracker.db there ("sqlite"); a new
+    # database starts with whatever the CSV files hold
+    os.makedirs(directory, exist_ok=True)
+    csv_store = CSVStore(*(os.path.join(directory, name) for name in CSV_FILES))
+    if backend != "sqlite":
+        return csv_store
+    db_file = os.path.join(directory, DB_FILE)
+    fresh = not os.path.exists(db_file)
+    store = SQLiteStore(db_file)
+    if fresh:
+        store.import_from(csv_store)
+    return store
@@ -0,0 +1,148 @@
+import json
+import random
+import threading
+import time
+
+from .storage import atomic_write_text
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 8
+MAX_BACKOFF_SECONDS = 300
+
+
+def is_retryable(exc):
+    # Quota (429), server errors (5xx) and network failures are worth retrying
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUS
+    try:
+        import requests
+        if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+    except ImportError:
+        pass
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+# Write-behind queue: saves mark a target (worksheet) dirty and a background
+# worker pushes it. Repeated saves of the same target coalesce into one push of
+# its latest state, and dirty targets are journaled so a restart replays them.
+class SyncQueue:
+    def __init__(self, journal_path, push, max_attempts=MAX_ATTEMPTS):
+        self.journal_path = journal_path
+        self._push = push
+        self._max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._due = {}
+        self._attempts = {}
+        self._generation = {}
+        self._status = {}
+        for name in self._read_journal():
+            self._due[name] = 0
+            self._status[name] = {"state": "pending", "error": "", "at": time.time()}
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="sheets-sync", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, name):
+        with self._cond:
+            self._due[name] = 0
+            self._attempts[name] = 0
+            self._generation[name] = self._generation.get(name, 0) + 1
+            self._status[name] = {"state": "pending", "error": "", "at": time.time()}
+            self._write_journal()
+            self._cond.notify()
+
+    def retry_failed(self):
+        for name, status in self.status().items():
+            if status["state"] == "failed":
+                self.enqueue(name)
+
+    def pending(self):
+        with self._cond:
+            return {n for n, s in self._status.items() if s["state"] != "synced"}
+
+    def status(self):
+        with self._cond:
+            return {n: dict(s) for n, s in self._status.items()}
+
+    def flush(self, timeout=None):
+        # Wait until nothing is due; True when everything was pushed
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._due:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return all(s["state"] == "synced" for s in self._status.values())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    due = [n for n, t in self._due.items() if t <= now]
+                    if due:
+                        break
+                    self._cond.wait(min(self._due.values()) - now if self._due else None)
+                generations = {n: self._generation.get(n, 0) for n in due}
+            for name in due:
+                try:
+                    self._push(name)
+                except Exception as exc:
+                    self._failed(name, generations[name], exc)
+                else:
+                    self._synced(name, generations[name])
+
+    def _synced(self, name, generation):
+        with self._cond:
+            # A save that arrived during the push leaves the target due again
+            if self._generation.get(name, 0) == generation:
+                self._due.pop(name, None)
+                self._attempts.pop(name, None)
+                self._status[name] = {"state": "synced", "error": "", "at": time.time()}
+                self._write_journal()
+            self._cond.notify_all()
+
+    def _failed(self, name, generation, exc):
+        with self._cond:
+            if self._generation.get(name, 0) != generation:
+                return
+            attempts = self._attempts.get(name, 0) + 1
+            self._attempts[name] = attempts
+            error = f"{type(exc).__name__}: {exc}"[:200]
+            if is_retryable(exc) and attempts < self._max_attempts:
+                delay = min(MAX_BACKOFF_SECONDS, 2 ** attempts) * (0.5 + random.random() / 2)
+                self._due[name] = time.time() + delay
+                self._status[name] = {"state": "pending", "error": error, "at": time.time()}
+            else:
+                # Stays in the journal; retried on the next save, retry_failed() or restart
+                self._due.pop(name, None)
+                self._status[name] = {"state": "failed", "error": error, "at": time.time()}
+            self._cond.notify_all()
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                return list(json.load(f).get("pending", []))
+        except Exception:
+            return []
+
+    def _write_journal(self):
+        pending = sorted(n for n, s in self._status.items() if s["state"] != "synced")
+        try:
+            atomic_write_text(self.journal_path, json.dumps({"pending": pending}))
+        except OSError:
+            pass
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+MAX_TENANTS = 32
+MAX_BYTES = 512 * 1024 * 1024
+
+
+def tenant_key(identity):
+    # Stable, filesystem- and worksheet-safe id for a user name or email: a
+    # readable slug plus a hash, so "Ann.Lee" and "ann-lee" stay apart
+    identity = str(identity).strip()
+    slug = re.sub(r"[^a-z0-9]+", "-", identity.lower()).strip("-")[:40] or "user"
+    return f"{slug}-{hashlib.sha1(identity.encode('utf-8')).hexdigest()[:8]}"
+
+
+def tenant_dir(base, key):
+    # Per-user partition: data.csv, books.csv, entertainment.csv and tracker.db
+    # live here; None is the single-user layout next to app.py
+    return base if key is None else os.path.join(base, "tenants", key)
+
+
+# Least recently used cache of per-tenant resources (one TrackerData each).
+# opener(key) builds an entry on first use; entries beyond max_tenants, or beyond
+# max_bytes by their size(entry) estimate, are dropped oldest first. size must
+# be cheap and never block. An entry is kept while can_evict(key, entry) is
+# False (e.g. it has unsynced changes), and the entry being returned is never
+# evicted by its own lookup.
+class TenantCache:
+    def __init__(self, opener, max_tenants=MAX_TENANTS, max_bytes=MAX_BYTES, size=None, can_evict=None, on_evict=None):
+        self._opener = opener
+        self.max_tenants = max_tenants
+        self.max_bytes = max_bytes
+        self._size = size or (lambda entry: 0)
+        self.can_evict = can_evict or (lambda key, entry: True)
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._opening = {}
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            opening = self._opening.setdefault(key, threading.Lock())
+        # Opening reads from disk; other tenants are not blocked meanwhile
+        with opening:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                try:
+                    entry = self._opener(key)
+                    with self._lock:
+                        self._entries[key] = entry
+                finally:
+                    with self._lock:
+                        self._opening.pop(key, None)
+        self._evict(keep=key)
+        return entry
+
+    def _evict(self, keep):
+        # Sizes are read with the registry lock released: size() must not wait
+        # on a tenant, and other lookups go on meanwhile
+        with self._lock:
+            entries = list(self._entries.items())
+        sizes = {k: self._size(e) for k, e in entries}
+        with self._lock:
+            total = sum(sizes.get(k, 0) for k in self._entries)
+            count = len(self._entries)
+            dropped = []
+            for key, entry in list(self._entries.items()):
+                if count <= self.max_tenants and total <= self.max_bytes:
+                    break
+                if key == keep or not self.can_evict(key, entry):
+                    continue
+                del self._entries[key]
+                count -= 1
+                total -= sizes.get(key, 0)
+                dropped.append((key, entry))
+        if self.on_evict is not None:
+            for key, entry in dropped:
+                self.on_evict(key, entry)
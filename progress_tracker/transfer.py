@@ -0,0 +1,321 @@
+import csv
+import os
+import sys
+
+import pandas as pd
+
+from .datastore import TrackerData
+from .snapshot import SNAPSHOT_FILE, Snapshot
+from .storage import DEFAULT_DATA_COLUMNS, FLAG_COLUMNS, MINUTE_COLUMNS, coerce_checkins, open_store, serialize_checkins
+from .tenants import tenant_dir, tenant_key
+
+# Bulk import and export of the check-in history. Files are read and written
+# chunk_rows rows at a time; imported chunks are validated, deduplicated by
+# date and written through the tracker's own backend as one batch. With Google
+# Sheets the partition is read once up front and pushed once at the end, so
+# only the rows the worksheet does not have yet are sent.
+FORMATS = ("csv", "jsonl", "parquet")
+EXTENSIONS = {
+    ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl", ".parquet": "parquet", ".pq": "parquet",
+}
+CHUNK_ROWS = 10000
+SYNC_TIMEOUT = 300
+JOURNAL_FILE = "transfer_journal.json"
+_BASE = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    if path == "-":
+        return "csv"
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"cannot tell the format of {path}; pass --format ({', '.join(FORMATS)})")
+    return EXTENSIONS[ext]
+
+
+def _pyarrow():
+    # Optional: only Parquet files need it
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet files need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+# -------- Reading and validation --------
+def read_chunks(path, fmt, chunk_rows=CHUNK_ROWS):
+    # Raw records as frames of at most chunk_rows rows; "-" is stdin (CSV, JSON Lines)
+    source = sys.stdin if path == "-" else path
+    if fmt == "parquet":
+        for batch in _pyarrow().parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    if fmt == "csv":
+        reader = pd.read_csv(source, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+    else:
+        reader = pd.read_json(source, lines=True, dtype=False, convert_dates=False, chunksize=chunk_rows)
+    with reader:
+        yield from reader
+
+
+def _in_range(values, low, high):
+    # Blank cells take the column default; anything else must be a whole number in range
+    blank = values.isna() | (values.astype(str).str.strip() == "")
+    numbers = pd.to_numeric(values.where(~blank), errors="coerce")
+    return blank | (numbers.notna() & (numbers == numbers.round()) & numbers.between(low, high))
+
+
+def validate(chunk, first_row=1):
+    # (typed check-ins, rejects). A row with a missing or malformed date, or a
+    # flag, minutes or mood value out of range, is rejected with its reason
+    # instead of being coerced; a column the tracker does not know fails the file.
+    unknown = [str(c) for c in chunk.columns if c not in DEFAULT_DATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown columns: {', '.join(unknown)} (expected {', '.join(DEFAULT_DATA_COLUMNS)})")
+    if "date" not in chunk.columns:
+        raise ValueError("the file has no date column")
+    chunk = chunk.reset_index(drop=True)
+    dates = pd.to_datetime(chunk["date"].astype(str).str.strip().str[:10], format="%Y-%m-%d", errors="coerce")
+    problems = pd.DataFrame({"date": dates.isna() | chunk["date"].isna()})
+    for col in chunk.columns:
+        if col in FLAG_COLUMNS:
+            problems[col] = ~_in_range(chunk[col], 0, 1)
+        elif col in MINUTE_COLUMNS:
+            problems[col] = ~_in_range(chunk[col], 0, 1440)
+        elif col == "mood":
+            problems[col] = ~_in_range(chunk[col], 1, 5)
+    bad = problems.any(axis=1)
+    rejects = [
+        {"row": first_row + i, "date": chunk.at[i, "date"],
+         "reason": "invalid " + ", ".join(problems.columns[problems.loc[i].to_numpy()])}
+        for i in bad[bad].index
+    ]
+    valid = chunk[~bad].assign(date=dates[~bad])
+    return coerce_checkins(valid), rejects
+
+
+def import_file(data, path, fmt, chunk_rows=CHUNK_ROWS, replace=True, on_reject=None):
+    # Streams path into data; the last row for a date within the file wins.
+    # Chunks are validated as they are read and stored together at the end,
+    # so the history is merged, saved and snapshotted once per file rather
+    # than once per chunk. Returns counts of rows read, added, replaced,
+    # skipped (stored dates kept without replace), duplicates (dates repeated
+    # in the file) and rejected.
+    stats = dict.fromkeys(("read", "added", "replaced", "skipped", "duplicates", "rejected"), 0)
+    seen, imported = set(), set()
+    batch, columns = [], None
+
+    def store():
+        # Each date keeps the values of its last row and the place of its first
+        rows = pd.concat(batch, ignore_index=True)
+        last = rows.drop_duplicates("date", keep="last").set_index("date")
+        rows = coerce_checkins(last.loc[rows["date"].drop_duplicates()].reset_index())
+        repeat = rows["date"].isin(imported)
+        imported.update(rows["date"])
+        if repeat.any():
+            # Imported by an earlier batch: overwrite it even when keeping stored days
+            data.import_checkins(rows[repeat], True, columns)
+        added, replaced = data.import_checkins(rows[~repeat], replace, columns)
+        stats["added"] += added
+        stats["replaced"] += replaced
+        stats["skipped"] += int((~repeat).sum()) - added - replaced
+        batch.clear()
+
+    for chunk in read_chunks(path, fmt, chunk_rows):
+        valid, rejects = validate(chunk, stats["read"] + 1)
+        stats["read"] += len(chunk)
+        stats["rejected"] += len(rejects)
+        if on_reject is not None:
+            for reject in rejects:
+                on_reject(reject)
+        rows = valid.drop_duplicates("date", keep="last")
+        repeat = rows["date"].isin(seen)
+        stats["duplicates"] += len(valid) - len(rows) + int(repeat.sum())
+        seen.update(rows["date"])
+        # Columns the file leaves out keep their stored values on existing days;
+        # JSON Lines chunks may name different ones, so each set is stored apart
+        if batch and list(chunk.columns) != columns:
+            store()
+        columns = list(chunk.columns)
+        batch.append(rows)
+    if batch:
+        store()
+    return stats
+
+
+# -------- Export --------
+def frame_chunks(frame, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def _clean(chunk):
+    # Storage values as the app writes them: ISO dates, 0/1 flags, blank mood as null
+    return serialize_checkins(coerce_checkins(chunk.copy()))
+
+
+def export_file(chunks, path, fmt):
+    # Writes each raw check-in chunk as it arrives; returns the row count
+    rows = 0
+    empty = _clean(pd.DataFrame(columns=DEFAULT_DATA_COLUMNS))
+    if fmt == "parquet":
+        pa = _pyarrow()
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(_clean(chunk), preserve_index=False)
+                if writer is None:
+                    writer = pa.parquet.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += table.num_rows
+            if writer is None:
+                pa.parquet.write_table(pa.Table.from_pandas(empty, preserve_index=False), path)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in chunks:
+            chunk = _clean(chunk)
+            if fmt == "csv":
+                chunk.to_csv(out, header=rows == 0, index=False)
+            else:
+                chunk.to_json(out, orient="records", lines=True)
+            rows += len(chunk)
+        if rows == 0 and fmt == "csv":
+            empty.to_csv(out, index=False)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return rows
+
+
+# -------- Command line --------
+def _sheets(args, data, directory, tenant):
+    # The same read-once, push-what-changed cycle as the app, with its own
+    # journal: changes that could not be pushed are retried by the next run
+    from .profiler import RerunProfiler
+    from .sheets import SheetPool, hydrate, push_worksheet
+    from .sync import SyncQueue
+
+    with open(args.credentials, encoding="utf-8") as f:
+        pool = SheetPool(f.read(), args.sheet_id, RerunProfiler())
+    part = pool if tenant is None else pool.partition(f"{tenant}.")
+    queue = SyncQueue(
+        os.path.join(directory, JOURNAL_FILE), lambda target: push_worksheet(part, data, target.rpartition(".")[2])
+    )
+    hydrate(part, data, queue)
+    queue.start()
+    return part, queue
+
+
+def _finish_sync(part, queue):
+    synced = queue.flush(SYNC_TIMEOUT)
+    calls = sum(part.profiler.calls().values())
+    if not synced:
+        print(f"Google Sheets sync did not finish after {calls} API calls; run again to retry.", file=sys.stderr)
+    else:
+        print(f"Google Sheets synced with {calls} API calls.", file=sys.stderr)
+    return synced
+
+
+def _parser(command, description):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=f"python -m progress_tracker {command}", description=description)
+    parser.add_argument("--format", choices=FORMATS, help="file format (default: from the file extension)")
+    parser.add_argument("--dir", default=_BASE, help="tracker directory (default: the app's own folder)")
+    parser.add_argument(
+        "--backend", choices=("csv", "sqlite"),
+        default=(os.environ.get("TRACKER_STORAGE_BACKEND") or "csv").lower(),
+        help="local storage backend (default: TRACKER_STORAGE_BACKEND or csv)",
+    )
+    parser.add_argument("--tenant", help="user name or email of a multi-tenant deployment")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"rows per chunk (default {CHUNK_ROWS})")
+    parser.add_argument("--sheet-id", help="also sync this Google Sheet (needs --credentials)")
+    parser.add_argument("--credentials", help="service account JSON file for --sheet-id")
+    return parser
+
+
+def _open(parser, args):
+    if bool(args.sheet_id) != bool(args.credentials):
+        parser.error("--sheet-id and --credentials go together")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    tenant = tenant_key(args.tenant) if args.tenant else None
+    directory = tenant_dir(args.dir, tenant)
+    data = TrackerData(open_store(directory, args.backend), Snapshot(os.path.join(directory, SNAPSHOT_FILE)))
+    sync = _sheets(args, data, directory, tenant) if args.sheet_id else None
+    return data, sync
+
+
+def import_main(argv=None):
+    parser = _parser("import", "Load check-ins from a CSV, JSON Lines or Parquet file into the tracker.")
+    parser.add_argument("path", help="file to import (- for stdin, CSV or JSON Lines)")
+    parser.add_argument("--keep-existing", action="store_true", help="skip dates the tracker already has")
+    parser.add_argument("--rejects", help="write rejected rows (row number, date, reason) to this CSV file")
+    args = parser.parse_args(argv)
+    try:
+        fmt = file_format(args.path, args.format)
+        data, sync = _open(parser, args)
+    except Exception as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    rejects = open(args.rejects, "w", encoding="utf-8", newline="") if args.rejects else None
+    try:
+        if rejects is not None:
+            writer = csv.DictWriter(rejects, fieldnames=["row", "date", "reason"])
+            writer.writeheader()
+            on_reject = writer.writerow
+        else:
+            def on_reject(reject):
+                print(f"row {reject['row']}: {reject['reason']}", file=sys.stderr)
+
+        try:
+            stats = import_file(data, args.path, fmt, args.chunk_rows, not args.keep_existing, on_reject)
+        except Exception as exc:
+            print(f"error: {exc}", file=sys.stderr)
+            stats = None
+    finally:
+        if rejects is not None:
+            rejects.close()
+    synced = True
+    if sync is not None:
+        # Whatever was written locally is pushed, even after an error part way
+        part, queue = sync
+        queue.enqueue(part.title("data"))
+        synced = _finish_sync(part, queue)
+    if stats is None:
+        return 2
+    print(
+        f"{stats['read']} rows read: {stats['added']} added, {stats['replaced']} replaced, "
+        f"{stats['skipped']} skipped, {stats['duplicates']} duplicates, {stats['rejected']} rejected",
+        file=sys.stderr,
+    )
+    return 1 if stats["rejected"] or not synced else 0
+
+
+def export_main(argv=None):
+    parser = _parser("export", "Write the tracker's check-in history to a CSV, JSON Lines or Parquet file.")
+    parser.add_argument("path", help="file to write (- for stdout, CSV or JSON Lines)")
+    args = parser.parse_args(argv)
+    try:
+        fmt = file_format(args.path, args.format)
+        data, sync = _open(parser, args)
+        if sync is not None:
+            # The hydrated mirror is already in memory
+            chunks = frame_chunks(data.checkins(), args.chunk_rows)
+        else:
+            chunks = data.backend.iter_checkins(args.chunk_rows)
+        rows = export_file(chunks, args.path, fmt)
+    except Exception as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    print(f"{rows} rows exported", file=sys.stderr)
+    # A sheet that was still empty is seeded from the local history
+    return 0 if sync is None or _finish_sync(*sync) else 1
@@ -0,0 +1,143 @@
+# Markup and copy for the Streamlit page; app.py decides what is shown when.
+from .aggregates import ACTIVITIES
+from .charts import TASKS
+
+_TASK_NAMES = dict(zip(ACTIVITIES, TASKS))
+# Correlations weaker than this are not worth a sentence
+_NOTABLE_R = 0.3
+
+THEME_CSS = """
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;600&family=Space+Grotesk:wght@400;500;600;700&display=swap');
+    .stApp { background: linear-gradient(180deg, #0a0e17 0%, #0f1629 35%, #0d1322 100%); }
+    .main .block-container { padding-top: 1.5rem; max-width: 720px; }
+    h1, h2, h3 { font-family: 'Space Grotesk', sans-serif !important; color: #e0e7ff !important; }
+    .electric-date {
+        text-align: center;
+        background: linear-gradient(135deg, #1e1b4b 0%, #312e81 40%, #3730a3 100%);
+        color: #fff;
+        padding: 1.25rem 1.5rem;
+        border-radius: 16px;
+        margin: 0.5rem 0 1.25rem 0;
+        font-family: 'Space Grotesk', sans-serif;
+        box-shadow: 0 0 24px rgba(99, 102, 241, 0.25), 0 4px 12px rgba(0,0,0,0.3);
+        border: 1px solid rgba(129, 140, 248, 0.2);
+    }
+    .electric-date .day-num { font-size: 2.25rem; font-weight: 700; color: #a5b4fc; }
+    .electric-date .weekday { font-size: 0.8rem; letter-spacing: 0.15em; opacity: 0.9; color: #c7d2fe; }
+    .ai-insight-card {
+        background: linear-gradient(135deg, rgba(30, 27, 75, 0.6) 0%, rgba(49, 46, 129, 0.4) 100%);
+        border: 1px solid rgba(129, 140, 248, 0.25);
+        border-radius: 12px;
+        padding: 1rem 1.25rem;
+        margin: 0.75rem 0;
+        font-family: 'Space Grotesk', sans-serif;
+        color: #c7d2fe;
+        box-shadow: 0 4px 16px rgba(0,0,0,0.2);
+    }
+    .ai-insight-card .label { font-size: 0.7rem; text-transform: uppercase; letter-spacing: 0.1em; color: #818cf8; margin-bottom: 0.25rem; }
+    .digest-header { font-family: 'Space Grotesk', sans-serif; color: #a5b4fc; }
+    .digest-item { padding: 0.5rem 0; border-bottom: 1px solid rgba(129, 140, 248, 0.15); }
+    .digest-item a { color: #818cf8; text-decoration: none; }
+    .digest-item a:hover { color: #a5b4fc; text-decoration: underline; }
+    div[data-testid="stExpander"] { border: 1px solid rgba(129, 140, 248, 0.2); border-radius: 12px; }
+    .stForm { border: 1px solid rgba(129, 140, 248, 0.15); border-radius: 12px; padding: 1rem; }
+</style>
+"""
+
+SHEETS_HELP = """
+    **Data is lost on reboot unless you use Google Sheets.**
+
+    1. **Google Cloud:** [console.cloud.google.com](https://console.cloud.google.com) → Create project → APIs & Services → Enable **Google Sheets API**.
+    2. **Service account:** APIs & Services → Credentials → Create credentials → Service account → Create key (JSON). Download the JSON file.
+    3. **Google Sheet:** Create a new [Google Sheet](https://sheets.google.com). Copy the **Sheet ID** from the URL:  
+       `https://docs.google.com/spreadsheets/d/**SHEET_ID**/edit`
+    4. **Share the sheet:** Share the sheet with the **service account email** (from the JSON, e.g. `xxx@xxx.iam.gserviceaccount.com`) with **Editor** access.
+    5. **Streamlit Cloud:** Your app → Settings → Secrets. Add (TOML):
+       - `sheet_id = "your_sheet_id"`
+       - Either paste the whole JSON as a string: `gcp_service_account_json = '''{"type":"service_account", ...}'''`  
+         Or use nested keys: `[gcp_service_account]` then `type = "service_account"`, `project_id = "..."`, `private_key = "..."`, `client_email = "..."`, etc.
+    6. Redeploy the app. Data will be stored in the sheet and survive reboots.
+"""
+
+
+def date_header(day):
+    return f"""
+    <div class="electric-date">
+        <span class="weekday">{day.strftime("%A")}</span><br>
+        <span class="day-num">{day.strftime("%d")}</span>
+        <span style="font-size: 1.2rem; font-weight: 500;"> {day.strftime("%b")}</span>
+        <span style="font-size: 0.95rem; opacity: 0.9;"> {day.strftime("%Y")}</span>
+    </div>
+    """
+
+
+def digest_item(entry):
+    return (
+        f'<div class="digest-item">'
+        f'<a href="{entry["link"]}" target="_blank" rel="noopener">{entry["title"]}</a> '
+        f'<span style="color:#6366f1;font-size:0.75rem;">[{entry["source"]}]</span>'
+        f'</div>'
+    )
+
+
+def week_insights(week):
+    # Up to three short notes on the last seven days (Aggregates.window(7))
+    insights = []
+    w = week["counts"]["work"]
+    if w >= 5:
+        insights.append("Strong work week — 5+ days logged.")
+    elif w >= 3:
+        insights.append("Solid work days this week. Keep the rhythm.")
+    g = week["counts"]["gym"]
+    if g >= 3:
+        insights.append("Gym streak: 3+ days. You're on fire.")
+    elif g == 0 and week["days"] >= 3:
+        insights.append("No gym yet this week — one session can start the habit.")
+    lr = week["counts"]["learning"]
+    if lr >= 4:
+        insights.append("Learning consistency is high. Great for long-term growth.")
+    avg_mood = week["mood_mean"]
+    if avg_mood is not None:
+        if avg_mood >= 4:
+            insights.append("Mood trend is up. Nice.")
+        elif avg_mood <= 2.5 and week["days"] >= 5:
+            insights.append("Mood has been lower — small wins (one task, one walk) help.")
+    return insights[:3]
+
+
+def pattern_insights(analysis):
+    # Up to three notes from the whole history (analytics.analyze)
+    if not analysis:
+        return []
+    insights = []
+    streaks = analysis["streaks"]
+    activity = max(ACTIVITIES, key=lambda a: streaks[a]["current"])
+    current, longest = streaks[activity]["current"], streaks[activity]["longest"]
+    if current >= 3:
+        best = "a new best." if current >= longest else f"best is {longest}."
+        insights.append(f"{_TASK_NAMES[activity]} streak: {current} days in a row — {best}")
+    change = analysis["trends"]["change"]["counts"]
+    activity = max(ACTIVITIES, key=lambda a: abs(change[a]))
+    if abs(change[activity]) >= 2:
+        direction = "up" if change[activity] > 0 else "down"
+        insights.append(f"{_TASK_NAMES[activity]} is {direction} {abs(change[activity])} days on last week.")
+    correlation = {a: r for a, r in analysis["mood_correlation"].items() if r is not None}
+    if correlation:
+        activity = max(correlation, key=lambda a: abs(correlation[a]))
+        r = correlation[activity]
+        if abs(r) >= _NOTABLE_R:
+            direction = "better" if r > 0 else "lower"
+            insights.append(
+                f"Your mood tends to be {direction} on days with more {_TASK_NAMES[activity].lower()} time (r = {r:.2f})."
+            )
+    balance = analysis["learning_balance"]
+    recent = balance["recent"]
+    if len(balance["all_time"]["shares"]) >= 2 and recent["shares"] and (recent["evenness"] or 0) < 0.5:
+        label, share = recent["shares"][0]
+        insights.append(f"Learning this month is {share:.0%} {label} — the other tracks are getting little time.")
+    return insights[:3]
+
+
+def insight_card(insights, label="AI insights"):
+    return f'<p class="ai-insight-card"><span class="label">{label}</span><br>' + " ".join(insights) + "</p>"
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the package and the benchmarks fakes importable without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,143 @@
+import pandas as pd
+
+from progress_tracker.aggregates import Aggregates
+from progress_tracker.storage import coerce_checkins
+
+
+def _frame(rows):
+    return pd.DataFrame(rows)
+
+
+def test_saving_a_day_again_replaces_its_contribution():
+    agg = Aggregates.from_frame(_frame([
+        {"date": "2026-10-05", "work": 1, "work_minutes": 60, "mood": 2, "learning": 1, "learning_type": "Course"},
+        {"date": "2026-10-06", "work": 0, "mood": 4},
+    ]))
+    agg.apply({"date": "2026-10-05", "work": 0, "gym": 1, "gym_minutes": 30, "mood": 5,
+               "learning": 1, "learning_type": "Book"})
+    assert agg.days == 2
+    assert agg.total("work") == 0
+    assert agg.total("gym") == 1
+    assert agg.distribution("learning_type") == [("Book", 1)]
+    window = agg.window(7)
+    assert window["days"] == 2
+    assert window["minutes"]["work"] == 0
+    assert window["minutes"]["gym"] == 30
+    assert window["mood_mean"] == 4.5
+    assert agg.mood_series(7) == [("2026-10-05", 5), ("2026-10-06", 4)]
+
+
+def test_windows_cover_the_most_recent_days():
+    rows = [{"date": f"2026-09-{d:02d}", "work": d % 2, "mood": 3} for d in range(1, 31)]
+    agg = Aggregates.from_frame(_frame(rows))
+    assert agg.window(7)["days"] == 7
+    # 24..30: the even days 24, 26, 28 and 30 are off
+    assert agg.window(7)["counts"]["work"] == 3
+    assert agg.window(30)["counts"]["work"] == 15
+    assert agg.window(14)["mood_mean"] == 3
+    assert agg.mood_series(2) == [("2026-09-29", 3), ("2026-09-30", 3)]
+    agg.apply({"date": "2026-10-01", "work": 1, "mood": 5})
+    assert agg.window(7)["counts"]["work"] == 4
+    assert agg.mood_series(1) == [("2026-10-01", 5)]
+
+
+def test_out_of_order_days_are_counted_by_date():
+    agg = Aggregates.from_frame(_frame([
+        {"date": "2026-10-03", "reading": 1, "reading_book": "Dune", "mood": 4},
+        {"date": "2026-10-01", "reading": 1, "reading_book": "Dune"},
+        {"date": "2026-10-02", "reading": 0, "reading_book": "Emma", "mood": 2},
+    ]))
+    assert agg.mood_series(3) == [("2026-10-01", None), ("2026-10-02", 2), ("2026-10-03", 4)]
+    # Mood is averaged over the days that recorded one
+    assert agg.window(7)["mood_mean"] == 3
+    # A book only counts on days with reading ticked
+    assert agg.distribution("reading_book") == [("Dune", 2)]
+    assert agg.window(0)["days"] == 0
+
+
+def test_mood_series_reaches_past_the_windows():
+    rows = [{"date": f"2026-{m:02d}-{d:02d}", "mood": m} for m in range(1, 5) for d in range(1, 29)]
+    agg = Aggregates.from_frame(_frame(rows))
+    assert len(agg.mood_series()) == 112
+    assert agg.mood_series(90)[0] == ("2026-01-23", 1)
+    assert agg.mood_series(14) == agg.mood_series()[-14:]
+
+
+def test_rollups_by_week_month_and_year():
+    agg = Aggregates.from_frame(_frame([
+        # Week of Monday 2025-12-29 spans the year boundary
+        {"date": "2025-12-30", "gym": 1, "gym_minutes": 45, "mood": 2,
+         "reading": 1, "reading_book": "Dune"},
+        {"date": "2026-01-01", "gym": 0, "mood": 4, "reading": 1, "reading_book": "Dune"},
+        {"date": "2026-01-02", "gym": 1, "gym_minutes": 30,
+         "reading": 1, "reading_book": "Emma"},
+        {"date": "2026-02-10", "gym": 1, "gym_minutes": 20, "mood": 3},
+    ]))
+    assert [(r["period"], r["days"]) for r in agg.history("week")] == [("2025-12-29", 3), ("2026-02-09", 1)]
+    week = agg.history("week")[0]
+    assert week["gym_rate"] == 66.7
+    assert week["gym_minutes"] == 75
+    # Mood is averaged over the days that recorded one
+    assert week["mood_mean"] == 3.0
+    assert week["top_reading_book"] == "Dune"
+
+    months = agg.history("month")
+    assert [(r["period"], r["days"], r["gym_minutes"]) for r in months] == [
+        ("2025-12-01", 1, 45), ("2026-01-01", 2, 30), ("2026-02-01", 1, 20),
+    ]
+    assert months[1]["mood_mean"] == 4.0
+    assert months[1]["reading_rate"] == 100.0
+
+    years = agg.history("year")
+    assert [(r["period"], r["days"]) for r in years] == [("2025-01-01", 1), ("2026-01-01", 3)]
+    assert years[1]["gym_rate"] == 66.7
+    assert years[1]["mood_mean"] == 3.5
+
+    # Bounds pick the periods overlapping the range
+    assert [r["period"] for r in agg.history("month", "2026-01-15", "2026-12-31")] == ["2026-01-01", "2026-02-01"]
+    assert [r["period"] for r in agg.history("day", "2026-01-01", "2026-01-31")] == ["2026-01-01", "2026-01-02"]
+    assert agg.mix("reading_book", "year", "2026-01-01") == [("Dune", 1), ("Emma", 1)]
+    assert agg.mix("reading_book", "year") == [("Dune", 2), ("Emma", 1)]
+
+
+def test_resaving_a_day_moves_its_rollup_contribution():
+    agg = Aggregates.from_frame(_frame([
+        {"date": "2026-10-05", "work": 1, "work_minutes": 60, "learning": 1, "learning_type": "Course"},
+        {"date": "2026-10-06", "work": 0},
+    ]))
+    agg.apply({"date": "2026-10-05", "work": 0, "gym": 1, "learning": 1, "learning_type": "Book"})
+    [month] = agg.history("month")
+    assert month["days"] == 2
+    assert month["work_rate"] == 0.0 and month["work_minutes"] == 0
+    assert month["gym_rate"] == 50.0
+    assert month["top_learning_type"] == "Book"
+    assert agg.mix("learning_type", "month") == [("Book", 1)]
+
+
+def test_replacing_the_only_day_of_a_period_keeps_it():
+    agg = Aggregates.from_frame(_frame([{"date": "2026-03-01", "work": 1}]))
+    agg.apply({"date": "2026-03-01", "work": 0})
+    assert [(r["period"], r["work_rate"]) for r in agg.history("month")] == [("2026-03-01", 0.0)]
+    agg.apply({"date": "2026-04-01", "work": 1})
+    assert [r["period"] for r in agg.history("month")] == ["2026-03-01", "2026-04-01"]
+
+
+def test_unparseable_date_is_left_out():
+    agg = Aggregates.from_frame(coerce_checkins(pd.DataFrame([
+        {"date": "10/02/2026", "work": 1, "mood": 4},
+        {"date": "2026-10-03", "work": 1, "mood": 3},
+    ])))
+    assert agg.days == 1
+    assert agg.date_range() == ("2026-10-03", "2026-10-03")
+    assert agg.mood_series() == [("2026-10-03", 3)]
+    assert agg.total("work") == 1
+    assert [r["period"] for r in agg.history("month")] == ["2026-10-01"]
+
+
+def test_apply_ignores_entry_without_date():
+    agg = Aggregates.from_frame(_frame([{"date": "2026-10-03", "gym": 1}]))
+    agg.apply({"date": "", "gym": 1})
+    agg.apply({"date": None, "gym": 1})
+    assert agg.days == 1
+    assert agg.total("gym") == 1
+    assert agg.window(7)["counts"]["gym"] == 1
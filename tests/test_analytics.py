@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from progress_tracker.analytics import MIN_CORRELATION_DAYS, analyze, daily_frame
+from progress_tracker.datastore import TrackerData
+from progress_tracker.storage import SQLiteStore, coerce_checkins
+
+TODAY = date(2026, 10, 17)
+
+
+def _frame(rows):
+    return coerce_checkins(pd.DataFrame(rows))
+
+
+def _days_ago(n):
+    return str(TODAY - timedelta(days=n))
+
+
+def test_empty_history_has_no_analytics():
+    assert analyze(_frame([]), TODAY) is None
+    assert analyze(_frame([{"date": "not a date", "gym": 1}]), TODAY) is None
+
+
+def test_gap_days_break_a_streak():
+    # 10..8 days ago, a missing day, then 6..1 days ago
+    rows = [{"date": _days_ago(n), "gym": 1} for n in (10, 9, 8, 6, 5, 4, 3, 2, 1)]
+    assert len(daily_frame(_frame(rows))) == 10
+    streaks = analyze(_frame(rows), TODAY)["streaks"]["gym"]
+    assert streaks == {"current": 6, "longest": 6}
+    # A logged day without the activity breaks it the same way
+    rows[3]["gym"] = 0
+    assert analyze(_frame(rows), TODAY)["streaks"]["gym"] == {"current": 5, "longest": 5}
+
+
+def test_current_streak_runs_through_today_or_yesterday():
+    rows = [{"date": _days_ago(n), "work": 1} for n in (3, 2, 1)]
+    # Today not logged yet: the run ending yesterday is current
+    assert analyze(_frame(rows), TODAY)["streaks"]["work"]["current"] == 3
+    # Today logged without the activity (yet) still keeps yesterday's run
+    assert analyze(_frame(rows + [{"date": _days_ago(0), "work": 0}]), TODAY)["streaks"]["work"]["current"] == 3
+    assert analyze(_frame(rows + [{"date": _days_ago(0), "work": 1}]), TODAY)["streaks"]["work"]["current"] == 4
+    # Last logged two days ago: the run is over, but still the longest
+    assert analyze(_frame(rows[:2]), TODAY)["streaks"]["work"] == {"current": 0, "longest": 2}
+
+
+def test_week_over_week_trends():
+    rows = [{"date": _days_ago(n), "gym": 1, "gym_minutes": 30, "mood": 4} for n in range(0, 7)]
+    rows += [{"date": _days_ago(n), "gym": n % 2, "gym_minutes": 20, "mood": 2} for n in range(7, 14)]
+    trends = analyze(_frame(rows), TODAY)["trends"]
+    assert trends["this_week"]["days"] == trends["last_week"]["days"] == 7
+    assert trends["this_week"]["counts"]["gym"] == 7
+    assert trends["last_week"]["counts"]["gym"] == 4
+    assert trends["change"]["counts"]["gym"] == 3
+    assert trends["change"]["minutes"]["gym"] == 70
+    assert trends["change"]["mood_mean"] == 2.0
+
+
+def test_mood_correlation_needs_enough_paired_days():
+    rows = [{"date": _days_ago(n), "gym_minutes": 10 * (n % 5), "mood": 1 + n % 5} for n in range(MIN_CORRELATION_DAYS)]
+    correlation = analyze(_frame(rows), TODAY)["mood_correlation"]
+    assert correlation["gym"] == 1.0
+    # No variation in the minutes: nothing to correlate
+    assert correlation["work"] is None
+    assert analyze(_frame(rows[1:]), TODAY)["mood_correlation"]["gym"] is None
+
+
+def test_learning_balance_shares_and_evenness():
+    rows = [
+        {"date": _days_ago(40), "learning": 1, "learning_type": "Course", "learning_minutes": 60},
+        {"date": _days_ago(2), "learning": 1, "learning_type": "Book", "learning_minutes": 30},
+        {"date": _days_ago(1), "learning": 1, "learning_type": "Video", "learning_minutes": 30},
+        {"date": _days_ago(0), "learning": 0, "learning_type": "None"},
+    ]
+    balance = analyze(_frame(rows), TODAY)["learning_balance"]
+    assert balance["all_time"]["shares"][0] == ("Course", 0.5)
+    assert balance["recent"]["shares"] == [("Book", 0.5), ("Video", 0.5)]
+    assert balance["recent"]["evenness"] == 1.0
+    assert analyze(_frame(rows[:1]), TODAY)["learning_balance"]["all_time"]["evenness"] == 0.0
+
+
+def test_analytics_are_memoized_per_version_and_day(tmp_path):
+    data = TrackerData(SQLiteStore(str(tmp_path / "tracker.db")))
+    data.save_checkin({"date": _days_ago(1), "gym": 1})
+    first = data.analytics(TODAY)
+    assert data.analytics(TODAY) is first
+    assert data.analytics(TODAY + timedelta(days=2))["streaks"]["gym"]["current"] == 0
+    data.save_checkin({"date": _days_ago(0), "gym": 1})
+    assert data.analytics(TODAY)["streaks"]["gym"]["current"] == 2
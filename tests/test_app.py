@@ -0,0 +1,339 @@
+import json
+import os
+import shutil
+import time
+import types
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmarks import fake_gspread as fg
+from progress_tracker.digest import DEFAULT_FEEDS
+from progress_tracker.storage import DEFAULT_DATA_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADER = DEFAULT_DATA_COLUMNS
+
+
+# -------- App runs --------
+def _row(day, **values):
+    row = dict.fromkeys(HEADER, 0)
+    row.update({"date": str(day), "learning_type": "None", "reading_book": "",
+                "entertainment_item": "", "mood": 3, "notes": ""})
+    row.update(values)
+    return [row[c] for c in HEADER]
+
+
+@pytest.fixture
+def spreadsheet():
+    sheet = fg.FakeSpreadsheet()
+    restore = fg.install(sheet)
+    fg.reset_calls()
+    yield sheet
+    restore()
+
+
+def _calls():
+    return Counter(fg.snapshot_calls())
+
+
+def _values(sheet, title):
+    return sheet.sheets[title]._trimmed()
+
+
+@pytest.fixture
+def app(tmp_path):
+    # The script keeps its files next to itself, so it runs from a copy; a
+    # fresh digest snapshot there means no feed is fetched
+    shutil.copy(os.path.join(ROOT, "progress_tracker", "app.py"), tmp_path)
+    snapshot = {"fetched_at": time.time(), "urls": [url for url, _ in DEFAULT_FEEDS], "feeds": {}}
+    (tmp_path / "digest_cache.json").write_text(json.dumps(snapshot), encoding="utf-8")
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    def run(sheets=True, **secrets):
+        at = AppTest.from_file(str(tmp_path / "app.py"), default_timeout=60)
+        if sheets:
+            at.secrets["sheet_id"] = "sheet"
+            at.secrets["gcp_service_account_json"] = "{}"
+        for key, value in secrets.items():
+            at.secrets[key] = value
+        at.run()
+        assert not at.exception
+        return at
+
+    yield run
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _save(at):
+    [button] = [b for b in at.button if b.label == "Save Today"]
+    button.click()
+    at.run()
+    assert not at.exception
+
+
+def _wait(condition, timeout=5):
+    # Sheets writes happen on the sync worker thread
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_save_sends_only_the_new_row(app, spreadsheet):
+    yesterday = date.today() - timedelta(days=1)
+    spreadsheet.seed("data", [HEADER, _row(yesterday - timedelta(days=1)), _row(yesterday, gym=1)])
+    at = app()
+    fg.reset_calls()
+    _save(at)
+    _wait(lambda: _calls()["batch_update"])
+    data = _calls()
+    assert data["batch_update"] == 1
+    assert data["clear"] == data["update"] == data["append_row"] == 0
+    values = _values(spreadsheet, "data")
+    assert len(values) == 4
+    assert values[2][:4] == [str(yesterday), "0", "0", "1"]
+    assert values[3][0] == str(date.today())
+
+
+def test_compact_rewrites_the_sheet_in_one_request(app, spreadsheet):
+    yesterday = date.today() - timedelta(days=1)
+    spreadsheet.seed("data", [HEADER, _row(yesterday)])
+    at = app()
+    fg.reset_calls()
+    [button] = [b for b in at.button if b.label == "Compact Google Sheet"]
+    button.click()
+    at.run()
+    _wait(lambda: _calls()["update"])
+    assert _calls()["update"] == 1
+    assert _calls()["clear"] == 0
+    assert _values(spreadsheet, "data")[0] == HEADER
+
+
+def test_compact_waits_for_the_sheet_to_be_read(app, spreadsheet):
+    def down(*args, **kwargs):
+        raise ConnectionError("down")
+
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    spreadsheet.values_batch_get = down
+    at = app()
+    [button] = [b for b in at.button if b.label == "Compact Google Sheet"]
+    assert button.disabled
+    assert len(_values(spreadsheet, "data")) == 2
+
+
+def test_client_and_handles_are_reused_across_reruns(app, spreadsheet):
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    at = app()
+    assert _calls()["service_account_from_dict"] == _calls()["open_by_key"] == 1
+    fg.reset_calls()
+    at.run()
+    _save(at)
+    _wait(lambda: _calls()["batch_update"])
+    assert _calls()["service_account_from_dict"] == _calls()["worksheet"] == 0
+
+
+class _Unauthorized(Exception):
+    response = types.SimpleNamespace(status_code=401)
+
+
+def test_expired_credentials_are_renewed_and_the_call_replayed(app, spreadsheet, monkeypatch):
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    at = app()
+    ws = spreadsheet.sheets["data"]
+    batch_update = ws.batch_update
+    failures = [_Unauthorized("token expired")]
+
+    def expiring(data, **kwargs):
+        if failures:
+            raise failures.pop()
+        return batch_update(data, **kwargs)
+
+    monkeypatch.setattr(ws, "batch_update", expiring)
+    fg.reset_calls()
+    _save(at)
+    _wait(lambda: _calls()["batch_update"])
+    assert _calls()["service_account_from_dict"] == 1
+    assert _calls()["batch_update"] == 1
+    assert ws._trimmed()[-1][0] == str(date.today())
+
+
+def test_sheet_is_read_once_and_saves_are_pushed_behind(app, spreadsheet):
+    yesterday = date.today() - timedelta(days=1)
+    spreadsheet.seed("data", [HEADER, _row(yesterday)])
+    at = app()
+    fg.reset_calls()
+    at.run()
+    _save(at)
+    at.run()
+    # Reads come from the local mirror; the save reaches the sheet in the background
+    _wait(lambda: len(_values(spreadsheet, "data")) == 3)
+    assert _calls()["get_all_records"] == _calls()["get_all_values"] == 0
+
+
+def test_csv_edits_on_disk_are_picked_up(app, tmp_path, monkeypatch):
+    import pandas as pd
+
+    reads = []
+    read_csv = pd.read_csv
+
+    def counted(path, *args, **kwargs):
+        reads.append(os.path.basename(path))
+        return read_csv(path, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counted)
+    at = app(sheets=False)
+    reads.clear()
+    at.run()
+    assert reads == []
+    pd.DataFrame([dict(zip(HEADER, _row(date.today() - timedelta(days=1))))]).to_csv(tmp_path / "data.csv", index=False)
+    at.run()
+    assert reads and set(reads) == {"data.csv"}
+    assert not any("No data yet" in i.value for i in at.info)
+
+
+def test_saving_twice_in_a_day_replaces_the_day(app, spreadsheet):
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    at = app()
+    _save(at)
+    at.checkbox[0].check()
+    _save(at)
+    _wait(lambda: _values(spreadsheet, "data")[-1][1] == "1")
+    values = _values(spreadsheet, "data")
+    assert [r[0] for r in values[1:]] == [str(date.today() - timedelta(days=1)), str(date.today())]
+    assert values[-1][1] == "1"
+
+
+def test_empty_sheet_is_seeded_from_local_data(app, spreadsheet, tmp_path):
+    import pandas as pd
+
+    yesterday = date.today() - timedelta(days=1)
+    pd.DataFrame([dict(zip(HEADER, _row(yesterday, work=1)))]).to_csv(tmp_path / "data.csv", index=False)
+    spreadsheet.seed("data", [HEADER])
+    app()
+    _wait(lambda: len(_values(spreadsheet, "data")) == 2)
+    assert _values(spreadsheet, "data")[1][:2] == [str(yesterday), "1"]
+
+
+def test_profiler_panel_and_metrics_file(app, tmp_path):
+    metrics = tmp_path / "tracker.prom"
+    at = app(sheets=False, debug_panel="1", metrics_file=str(metrics))
+    assert any(e.label == "🛠 Rerun profiler" for e in at.expander)
+    at.run()
+    text = metrics.read_text(encoding="utf-8")
+    assert 'tracker_section_seconds_count{section="load"}' in text
+    assert 'tracker_calls_total{call="storage.version"}' in text
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+    assert not any(e.label == "🛠 Rerun profiler" for e in app(sheets=False).expander)
+
+
+def test_finishing_a_book_updates_one_cell(app, spreadsheet):
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    spreadsheet.seed("books", [["title", "finished"], ["Dune", "0"], ["Emma", "0"], ["Anna", "0"]])
+    at = app()
+
+    def finish(title):
+        at.selectbox(key="mark_book_done").select(title)
+        [button] = [b for b in at.button if b.label == "Mark book as finished"]
+        button.click()
+        at.run()
+        assert not at.exception
+
+    # The first push after loading the list compares it with the sheet rows
+    finish("Emma")
+    _wait(lambda: _values(spreadsheet, "books")[2] == ["Emma", "1"])
+    fg.reset_calls()
+    finish("Anna")
+    _wait(lambda: _calls()["update_cell"])
+    calls = _calls()
+    assert calls["update_cell"] == 1
+    assert calls["batch_update"] == calls["update"] == calls["append_rows"] == 0
+    assert _values(spreadsheet, "books")[1:] == [["Dune", "0"], ["Emma", "1"], ["Anna", "1"]]
+    assert at.selectbox(key="mark_book_done").options == ["Dune"]
+
+
+def test_startup_reads_every_worksheet_in_one_request(app, spreadsheet):
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    spreadsheet.seed("books", [["title", "finished"], ["Dune", "0"]])
+    spreadsheet.seed("entertainment", [["title", "item_type", "finished"]])
+    at = app()
+    calls = _calls()
+    assert calls["values_batch_get"] == 1
+    assert calls["get_all_records"] == calls["worksheet"] == 0
+    assert at.selectbox(key="mark_book_done").options == ["Dune"]
+
+
+def test_missing_worksheets_are_created_before_the_read_is_retried(app, spreadsheet):
+    # Only the data worksheet exists; the others are created and the read retried
+    spreadsheet.seed("data", [HEADER, _row(date.today() - timedelta(days=1))])
+    app()
+    calls = _calls()
+    assert calls["values_batch_get"] == 2
+    assert calls["add_worksheet"] == 2
+    assert calls["get_all_records"] == calls["get_all_values"] == calls["worksheet"] == 0
+
+
+def test_rows_added_elsewhere_are_pulled_in(app, spreadsheet, tmp_path):
+    import pandas as pd
+
+    days = [date.today() - timedelta(days=n) for n in (3, 2)]
+    spreadsheet.seed("data", [HEADER] + [_row(d) for d in days])
+    at = app(sheet_refresh_seconds="0.001")
+    fg.reset_calls()
+    # Unchanged revision: nothing but the revision check is fetched
+    at.run()
+    _wait(lambda: _calls()["get_lastUpdateTime"])
+    time.sleep(0.05)
+    assert _calls()["values_batch_get"] == 0
+    spreadsheet.sheets["data"].append_row(_row(date.today() - timedelta(days=1), gym=1))
+    at.run()
+
+    def local_days():
+        return pd.read_csv(tmp_path / "data.csv")["date"].tolist()
+
+    _wait(lambda: len(local_days()) == 3)
+    assert local_days()[-1] == str(date.today() - timedelta(days=1))
+
+
+def test_query_tenants_get_their_own_files_and_worksheets(app, spreadsheet, tmp_path):
+    import pandas as pd
+
+    from progress_tracker.tenants import tenant_key
+
+    at = app(tenants="query")
+    assert any(t.label == "Your name" for t in at.text_input)
+    for user in ("ann", "bob"):
+        at.query_params["user"] = user
+        at.run()
+        assert not at.exception
+    at.query_params["user"] = "ann"
+    at.run()
+    _save(at)
+    key = tenant_key("ann")
+    assert len(pd.read_csv(tmp_path / "tenants" / key / "data.csv")) == 1
+    bob = tmp_path / "tenants" / tenant_key("bob") / "data.csv"
+    assert not bob.exists() or pd.read_csv(bob).empty
+    assert not (tmp_path / "data.csv").exists()
+    _wait(lambda: f"{key}.data" in spreadsheet.sheets and len(_values(spreadsheet, f"{key}.data")) == 2)
+    assert _values(spreadsheet, f"{key}.data")[1][0] == str(date.today())
+    assert "data" not in spreadsheet.sheets
+
+
+def test_unreachable_sheet_is_not_retried_on_every_rerun(app, spreadsheet):
+    def down(*args, **kwargs):
+        fg._count("values_batch_get")
+        raise ConnectionError("down")
+
+    spreadsheet.values_batch_get = down
+    at = app()
+    assert any("unreachable" in w.value for w in at.warning)
+    fg.reset_calls()
+    for _ in range(3):
+        at.run()
+    # The sheet is tried again after the retry window, not on every rerun
+    assert _calls()["values_batch_get"] == 0
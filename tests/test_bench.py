@@ -0,0 +1,16 @@
+from benchmarks import bench_app
+
+
+def test_month_scenarios_run(capsys):
+    results = [
+        bench_app.run_scenario("month", "csv", False, 1, False, 7, 60),
+        bench_app.run_scenario("month", "sqlite", True, 1, False, 7, 60),
+    ]
+    bench_app.print_report(results)
+    assert "month/sqlite+sheets" in capsys.readouterr().out
+    local, sheets = results
+    assert local["days"] == 30 and local["api_calls"] is None
+    assert local["warm"]["seconds"] > 0 and local["save"]["seconds"] > 0
+    # Reruns are served locally; only the first load reads the sheet
+    assert sum(sheets["api_calls"]["rerun"].values()) == 0
+    assert sum(sheets["api_calls"]["load"].values()) > 0
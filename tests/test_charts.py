@@ -0,0 +1,78 @@
+import json
+
+import pandas as pd
+
+from progress_tracker.charts import (
+    MAX_POINTS,
+    PIE_SLICES,
+    completion_figure,
+    distribution_figure,
+    downsample_mood,
+    mood_figure,
+    top_slices,
+)
+
+
+def _mood(days, start="2020-01-01"):
+    dates = pd.date_range(start, periods=days, freq="D")
+    return pd.DataFrame({"date": dates, "mood": [1 + i % 5 for i in range(days)]})
+
+
+def test_short_series_keep_daily_points():
+    frame = _mood(MAX_POINTS)
+    points, bucket = downsample_mood(frame)
+    assert bucket is None
+    assert len(points) == MAX_POINTS
+
+
+def test_long_series_use_the_finest_bucket_that_fits():
+    points, bucket = downsample_mood(_mood(365))
+    assert bucket == "weekly"
+    assert len(points) <= MAX_POINTS
+    # Each weekly point is the mean of its days
+    assert points["mood"].between(1, 5).all()
+    points, bucket = downsample_mood(_mood(3650))
+    assert bucket == "monthly"
+    assert len(points) == 120
+    points, bucket = downsample_mood(_mood(365 * 40))
+    assert bucket == "yearly"
+
+
+def test_bucket_means_skip_days_without_mood():
+    frame = _mood(200)
+    frame.loc[frame.index[:7], "mood"] = None
+    frame["mood"] = frame["mood"].astype("Int8")
+    points, bucket = downsample_mood(frame)
+    assert bucket == "weekly"
+    assert not points["mood"].isna().any()
+
+
+def test_mood_figure_title_names_the_bucket():
+    series = [(d.strftime("%Y-%m-%d"), 3) for d in pd.date_range("2020-01-01", periods=400)]
+    fig = mood_figure(series, "All time")
+    assert fig.layout.title.text == "Mood Trend (All time, weekly mean)"
+    assert len(fig.data[0].x) <= MAX_POINTS
+    assert mood_figure(series[:14], "14 Days").layout.title.text == "Mood Trend (14 Days)"
+
+
+def test_top_slices_fold_the_tail_into_other():
+    dist = [(f"Book {i}", 100 - i) for i in range(20)]
+    slices = top_slices(dist)
+    assert len(slices) == PIE_SLICES
+    assert slices[:-1] == dist[:PIE_SLICES - 1]
+    assert slices[-1] == ("Other", sum(n for _, n in dist[PIE_SLICES - 1:]))
+    assert top_slices(dist[:PIE_SLICES]) == dist[:PIE_SLICES]
+    assert top_slices([]) == []
+
+
+def test_pie_payload_does_not_grow_with_the_history():
+    small = distribution_figure([(f"B{i}", 1) for i in range(10)], "Reading", ["#000"])
+    large = distribution_figure([(f"B{i}", 1) for i in range(5000)], "Reading", ["#000"])
+    assert len(large.data[0].labels) == len(small.data[0].labels) == PIE_SLICES
+    assert abs(len(json.dumps(large.to_plotly_json(), default=str)) - len(json.dumps(small.to_plotly_json(), default=str))) < 100
+
+
+def test_completion_figure_percentages():
+    week = {"days": 4, "counts": {"work": 4, "gym": 1, "learning": 0, "reading": 2, "entertainment": 3}}
+    fig = completion_figure(week)
+    assert list(fig.data[0].y) == [100.0, 25.0, 0.0, 50.0, 75.0]
@@ -0,0 +1,112 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from progress_tracker.datastore import ItemList, TrackerData
+from progress_tracker.storage import CSVStore, SQLiteStore, coerce_checkins
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def data(request, tmp_path):
+    if request.param == "csv":
+        backend = CSVStore(str(tmp_path / "data.csv"), str(tmp_path / "books.csv"), str(tmp_path / "entertainment.csv"))
+    else:
+        backend = SQLiteStore(str(tmp_path / "tracker.db"))
+    return TrackerData(backend)
+
+
+def _dates(df):
+    return df["date"].dt.strftime("%Y-%m-%d").tolist()
+
+
+def test_concurrent_saves_keep_every_row(data):
+    days = [f"2026-09-{d:02d}" for d in range(1, 21)]
+    start = threading.Barrier(len(days))
+
+    def save(day):
+        start.wait()
+        data.save_checkin({"date": day, "work": 1, "mood": 3})
+
+    threads = [threading.Thread(target=save, args=(day,)) for day in days]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(_dates(data.checkins())) == days
+    assert sorted(_dates(coerce_checkins(data.backend.load_checkins()))) == days
+    assert data.aggregates().total("work") == 20
+
+
+def test_views_cannot_change_the_shared_frame(data):
+    data.save_checkin({"date": "2026-10-01", "mood": 3})
+    view = data.checkins()
+    view.loc[0, "mood"] = 1
+    view["extra"] = 1
+    assert data.checkins()["mood"].tolist() == [3]
+    assert "extra" not in data.checkins().columns
+
+
+def test_frame_is_read_once_per_storage_version(data, monkeypatch):
+    data.save_checkin({"date": "2026-10-01"})
+    reads = []
+    load = data.backend.load_checkins
+    monkeypatch.setattr(data.backend, "load_checkins", lambda: reads.append(1) or load())
+    data.checkins()
+    data.checkins()
+    assert reads == []
+    # A write that bypasses the store (another process) changes the version
+    data.backend.save_checkins(coerce_checkins(pd.DataFrame([{"date": "2026-10-01"}, {"date": "2026-10-02"}])))
+    assert _dates(data.checkins()) == ["2026-10-01", "2026-10-02"]
+    assert reads == [1]
+
+
+def test_aggregates_follow_saves(data):
+    data.save_checkin({"date": "2026-10-01", "gym": 1})
+    agg = data.aggregates()
+    data.save_checkin({"date": "2026-10-02", "gym": 1})
+    data.save_checkin({"date": "2026-10-01", "gym": 0})
+    assert data.aggregates() is agg
+    assert agg.total("gym") == 1
+    assert agg.days == 2
+
+
+def test_list_edits_start_from_the_current_list(data):
+    data.add_item("books", "Dune")
+    stale = data.frame("books")
+    data.add_item("books", "Emma")
+    data.finish_item("books", "Dune")
+    assert stale["title"].tolist() == ["Dune"]
+    books = data.frame("books")
+    assert books["title"].tolist() == ["Dune", "Emma"]
+    assert books["finished"].astype(int).tolist() == [1, 0]
+
+
+def test_item_list_rejects_empty_and_duplicate_titles():
+    items = ItemList(["title", "finished"], pd.DataFrame({"title": ["Dune", "Dune ", "Emma"], "finished": [0, 1, 1]}))
+    # An older file may repeat a title; the first row is the one indexed
+    assert items.position(" dune") == 0
+    assert items.unfinished() == ["Dune"]
+    with pytest.raises(ValueError):
+        items.new_item({"title": "  "})
+    with pytest.raises(ValueError):
+        items.new_item({"title": "EMMA"})
+    assert items.add(items.new_item({"title": " Anna ", "finished": "1.0"})) == 3
+    assert items.row(3) == {"title": "Anna", "finished": 1}
+
+
+def test_list_delta_tracks_positions_until_pushed(data):
+    data.add_item("books", "Dune")
+    delta, marker = data.list_delta("books")
+    # A freshly read list has to be pushed whole once
+    assert delta is None
+    data.list_pushed("books", marker)
+    assert data.list_delta("books")[0] == {}
+    data.add_item("books", "Emma")
+    data.finish_item("books", "dune")
+    delta, marker = data.list_delta("books")
+    assert delta == {0: {"title": "Dune", "finished": 1}, 1: {"title": "Emma", "finished": 0}}
+    data.add_item("books", "Anna")
+    data.list_pushed("books", marker)
+    assert data.list_delta("books")[0] == {2: {"title": "Anna", "finished": 0}}
+    assert data.finish_item("books", "Missing") is None
@@ -0,0 +1,112 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from progress_tracker.digest import DigestCache, refresh_snapshot
+
+RSS = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Local</title>
+<item><title>{title}</title><link>http://example.com/1</link>
+<pubDate>Thu, 15 Oct 2026 08:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # /feed honours If-None-Match, /slow answers after the test's timeout, /error fails
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/slow":
+            time.sleep(1)
+        if self.path == "/error":
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = RSS.format(title=server.title).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.requests = []
+    httpd.etag = '"v1"'
+    httpd.title = "First"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _titles(snapshot, url):
+    return [e["title"] for e in snapshot["feeds"][url]["entries"]]
+
+
+def test_not_modified_keeps_previous_entries(server):
+    feeds = [(f"{server.url}/feed", "Local")]
+    url = feeds[0][0]
+    first = refresh_snapshot(feeds, timeout=2)
+    assert _titles(first, url) == ["First"]
+    assert first["feeds"][url]["etag"] == '"v1"'
+    assert first["feeds"][url]["entries"][0]["published"] == "2026-10-15"
+
+    server.title = "Second"
+    second = refresh_snapshot(feeds, first, timeout=2)
+    assert server.requests[-1] == ("/feed", '"v1"')
+    assert _titles(second, url) == ["First"]
+
+    server.etag = '"v2"'
+    third = refresh_snapshot(feeds, second, timeout=2)
+    assert _titles(third, url) == ["Second"]
+    assert third["feeds"][url]["etag"] == '"v2"'
+
+
+def test_slow_and_failing_feeds_keep_previous_entries(server):
+    feeds = [(f"{server.url}/feed", "Local"), (f"{server.url}/slow", "Slow"), (f"{server.url}/error", "Error")]
+    stale = {"source": "", "etag": None, "modified": None, "entries": [{"title": "Old", "published": ""}]}
+    previous = {"feeds": {feeds[1][0]: stale, feeds[2][0]: stale}}
+    started = time.monotonic()
+    snapshot = refresh_snapshot(feeds, previous, timeout=0.3)
+    # One deadline for all feeds; the slow one is not waited for
+    assert time.monotonic() - started < 0.9
+    assert _titles(snapshot, feeds[0][0]) == ["First"]
+    assert _titles(snapshot, feeds[1][0]) == ["Old"]
+    assert _titles(snapshot, feeds[2][0]) == ["Old"]
+    assert snapshot["urls"] == [url for url, _ in feeds]
+
+
+def test_failed_feed_without_previous_entries_is_left_out(server):
+    feeds = [(f"{server.url}/error", "Error")]
+    assert refresh_snapshot(feeds, timeout=2)["feeds"] == {}
+
+
+def test_cache_serves_saved_snapshot_without_fetching(server, tmp_path):
+    path = str(tmp_path / "digest.json")
+    feeds = [(f"{server.url}/feed", "Local")]
+    assert [e["title"] for e in DigestCache(path, timeout=2).entries(feeds)] == ["First"]
+    requests = len(server.requests)
+    # A fresh cache (a restart) serves the snapshot from disk within the TTL
+    assert [e["title"] for e in DigestCache(path, timeout=2).entries(feeds)] == ["First"]
+    assert len(server.requests) == requests
+    # Past the TTL the stale entries are served while one background refresh revalidates
+    cache = DigestCache(path, ttl=0, timeout=2)
+    assert [e["title"] for e in cache.entries(feeds)] == ["First"]
+    cache.refresh_async(feeds).join(5)
+    assert server.requests[-1] == ("/feed", '"v1"')
@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+
+from progress_tracker.profiler import CountedCalls, RerunProfiler
+
+
+def _rerun(profiler, sections, calls=()):
+    run = profiler.start_run()
+    for name, seconds in sections:
+        run.enter(name)
+        time.sleep(seconds)
+    for name in calls:
+        profiler.count(name)
+    return run.finish()
+
+
+def test_sections_close_when_the_next_one_starts():
+    profiler = RerunProfiler()
+    record = _rerun(profiler, [("load", 0.02), ("charts", 0.01)], ["store.load_checkins"])
+    assert list(record["sections"]) == ["load", "charts"]
+    assert record["sections"]["load"] >= 0.02
+    assert record["total"] >= sum(record["sections"].values())
+    assert record["counters"] == {"store.load_checkins": 1}
+    summary = profiler.summary()
+    assert summary[0]["section"] == "total"
+    assert [r["section"] for r in summary[1:]] == ["load", "charts"]
+
+
+def test_history_is_bounded_but_totals_are_not():
+    profiler = RerunProfiler(history=3)
+    for _ in range(5):
+        _rerun(profiler, [("load", 0)])
+    assert len(profiler.runs()) == 3
+    exported = json.loads(profiler.to_json())
+    assert exported["reruns"] == 5
+    assert 'tracker_section_seconds_count{section="load"} 5' in profiler.to_prometheus()
+
+
+def test_background_calls_only_reach_the_totals():
+    profiler = RerunProfiler()
+    run = profiler.start_run()
+    thread = threading.Thread(target=profiler.count, args=("sheets.batch_update",))
+    thread.start()
+    thread.join()
+    profiler.count("store.version")
+    record = run.finish()
+    assert record["counters"] == {"store.version": 1}
+    assert profiler.calls() == {"sheets.batch_update": 1, "store.version": 1}
+
+
+def test_unfinished_rerun_is_dropped():
+    profiler = RerunProfiler()
+    profiler.start_run().enter("load")
+    _rerun(profiler, [("header", 0)])
+    assert [list(r["sections"]) for r in profiler.runs()] == [["header"]]
+
+
+def test_prometheus_labels_are_escaped():
+    profiler = RerunProfiler()
+    _rerun(profiler, [('chart "mood"', 0)], ['sheets.get\nall'])
+    text = profiler.to_prometheus()
+    assert 'section="chart \\"mood\\""' in text
+    assert 'tracker_calls_total{call="sheets.get all"} 1' in text
+    assert text.endswith("\n")
+
+
+def test_counted_calls_proxy():
+    profiler = RerunProfiler()
+    target = type("Store", (), {"kind": "csv", "version": lambda self, name: (name, 1)})()
+    store = CountedCalls(target, profiler, "store")
+    assert store.kind == "csv"
+    assert store.version("data") == ("data", 1)
+    assert profiler.calls() == {"store.version": 1}
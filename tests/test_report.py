@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from progress_tracker.__main__ import main as cli
+from progress_tracker.report import COLUMNS, find_sets, run, summarize
+
+TODAY = date(2026, 10, 15)
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+
+
+def _tracker(path, days=1):
+    path.mkdir(parents=True)
+    lines = [f"2026-10-{15 - n:02d},1,30,4" for n in reversed(range(days))]
+    _write(path / "data.csv", "date,work,work_minutes,mood\n" + "\n".join(lines) + "\n")
+    return path
+
+
+def test_summarize_reads_history(tmp_path):
+    _write(tmp_path / "data.csv", "date,work,work_minutes,mood\n2026-10-14,1,30,4\n2026-10-15,1,45,5\n")
+    _write(tmp_path / "books.csv", "title,finished\nDune,1\nEmma,0\n")
+    row = summarize(str(tmp_path), TODAY)
+    assert row["error"] is None
+    assert row["days"] == 2
+    assert (row["first_date"], row["last_date"]) == ("2026-10-14", "2026-10-15")
+    assert row["work_done"] == 2 and row["work_minutes"] == 75
+    assert row["work_streak"] == 2
+    assert row["mood_mean"] == 4.5
+    assert (row["books_reading"], row["books_finished"]) == (1, 1)
+    assert row["watchlist_open"] == 0
+    assert list(row) == COLUMNS
+
+
+def test_sets_are_found_below_each_path_once(tmp_path):
+    a = _tracker(tmp_path / "users" / "a")
+    b = _tracker(tmp_path / "users" / "b")
+    found = list(find_sets([str(tmp_path / "users"), str(a), str(b / "data.csv")]))
+    assert found == [str(a), str(b)]
+
+
+def test_rows_are_written_in_input_order(tmp_path):
+    dirs = [_tracker(tmp_path / f"u{i}", days=i + 1) for i in range(4)]
+    out = io.StringIO()
+    assert run([str(d) for d in dirs], out, workers=2, today=TODAY) == 0
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["path"] for r in rows] == [str(d) for d in dirs]
+    assert [r["days"] for r in rows] == [1, 2, 3, 4]
+
+
+def test_csv_output_and_exit_status(tmp_path):
+    _tracker(tmp_path / "u")
+    output = tmp_path / "report.csv"
+    assert cli(["report", str(tmp_path / "u"), "--format", "csv", "-o", str(output),
+                "--workers", "1", "--today", "2026-10-15"]) == 0
+    with open(output, encoding="utf-8", newline="") as f:
+        [row] = list(csv.DictReader(f))
+    assert row["work_done"] == "1"
+    assert row["error"] == ""
+    assert cli([]) == 2
+
+
+@pytest.mark.parametrize("workers", ["0", "-2", "two"])
+def test_workers_must_be_a_positive_number(tmp_path, capsys, workers):
+    _tracker(tmp_path / "u")
+    with pytest.raises(SystemExit) as exc:
+        cli(["report", str(tmp_path / "u"), "--workers", workers])
+    assert exc.value.code == 2
+    assert "--workers" in capsys.readouterr().err
+
+
+def test_unreadable_data_is_reported(tmp_path):
+    _write(tmp_path / "data.csv", 'date,work\n"2026-10-15,1\n')
+    row = summarize(str(tmp_path), TODAY)
+    assert row["days"] is None
+    assert row["error"].startswith("ParserError")
+
+
+def test_run_counts_failures(tmp_path):
+    good = _tracker(tmp_path / "good")
+    bad = _tracker(tmp_path / "bad")
+    _write(bad / "books.csv", 'title,finished\n"Dune,0\n')
+    out = io.StringIO()
+    assert run([str(tmp_path)], out, workers=1, today=TODAY) == 1
+    rows = {r["path"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert rows[str(good)]["error"] is None
+    assert rows[str(bad)]["error"] is not None
@@ -0,0 +1,313 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from benchmarks import fake_gspread as fg
+from progress_tracker.datastore import TrackerData
+from progress_tracker.profiler import RerunProfiler
+from progress_tracker.sheets import (
+    SheetPool,
+    _remember_sheet_rows,
+    _sync_list_rows,
+    _sync_sheet_rows,
+    compact,
+    hydrate,
+    pull_remote_changes,
+    schedule_hydrate,
+)
+from progress_tracker.storage import open_store
+
+
+class _Queue:
+    # The parts of SyncQueue that hydrate uses
+    def __init__(self):
+        self.targets = []
+
+    def pending(self):
+        return set(self.targets)
+
+    def enqueue(self, target):
+        self.targets.append(target)
+
+
+@pytest.fixture
+def spreadsheet():
+    sheet = fg.FakeSpreadsheet()
+    restore = fg.install(sheet)
+    yield sheet
+    restore()
+
+
+@pytest.fixture
+def data(tmp_path):
+    return TrackerData(open_store(str(tmp_path)))
+
+
+def _pool():
+    return SheetPool("{}", "sheet", RerunProfiler())
+
+
+def test_sheets_and_charts_do_not_import_plotly_or_streamlit():
+    code = ("import sys; import progress_tracker.sheets, progress_tracker.charts; "
+            "print(any(m in sys.modules for m in ('plotly', 'plotly.express', 'streamlit')))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert out.stdout.strip() == "False"
+
+
+def test_failed_hydration_waits_for_retry_window(spreadsheet, data):
+    calls = []
+
+    def down(*args, **kwargs):
+        calls.append(1)
+        raise ConnectionError("down")
+
+    spreadsheet.values_batch_get = down
+    pool = _pool()
+    schedule_hydrate(pool, data, _Queue(), retry=60).join(5)
+    assert not pool.hydrated
+    attempts = len(calls)
+    assert attempts >= 1
+    # Within the window nothing is started, however often it is asked
+    for _ in range(5):
+        assert schedule_hydrate(pool, data, _Queue(), retry=60) is None
+    assert len(calls) == attempts
+    # After it, one more attempt
+    del spreadsheet.values_batch_get
+    schedule_hydrate(pool, data, _Queue(), retry=0).join(5)
+    assert pool.hydrated
+
+
+def test_hydration_loads_sheet_rows(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-15", "1", "4"]])
+    pool = _pool()
+    schedule_hydrate(pool, data, _Queue()).join(5)
+    assert pool.hydrated
+    df = data.checkins()
+    assert df["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-10-15"]
+    assert df["mood"].tolist() == [4]
+    assert schedule_hydrate(pool, data, _Queue()) is None
+
+
+def _stall(spreadsheet):
+    # values_batch_get blocks until released, so a test can act while the
+    # request is in flight
+    started, release = threading.Event(), threading.Event()
+    batch_get = spreadsheet.values_batch_get
+
+    def stalled(*args, **kwargs):
+        started.set()
+        assert release.wait(5)
+        return batch_get(*args, **kwargs)
+
+    spreadsheet.values_batch_get = stalled
+    return started, release
+
+
+def _in_background(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def _dates(data):
+    return data.checkins()["date"].dt.strftime("%Y-%m-%d").tolist()
+
+
+@pytest.mark.parametrize("queued", [True, False])
+def test_save_during_the_first_read_is_kept(spreadsheet, data, queued):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-14", "1", "4"]])
+    pool, queue = _pool(), _Queue()
+    started, release = _stall(spreadsheet)
+    thread = _in_background(hydrate, pool, data, queue)
+    assert started.wait(5)
+    # The data lock is free while the sheet is being read
+    data.save_checkin({"date": "2026-10-15", "gym": 1})
+    if queued:
+        queue.enqueue("data")
+    release.set()
+    thread.join(5)
+    assert pool.hydrated
+    assert _dates(data) == ["2026-10-14", "2026-10-15"]
+    # Either way the merged rows are queued for the sheet
+    assert queue.pending() == {"data"}
+
+
+def test_save_during_a_reload_is_kept(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-13", "1", "3"], ["2026-10-14", "1", "4"]])
+    pool, queue = _pool(), _Queue()
+    hydrate(pool, data, queue)
+    # An edit elsewhere changes a known row, so the pull reloads in full
+    spreadsheet.sheets["data"].update_cell(3, 2, "0")
+    started, release = _stall(spreadsheet)
+    thread = _in_background(pull_remote_changes, pool, data, queue)
+    assert started.wait(5)
+    data.save_checkin({"date": "2026-10-13", "mood": 5})
+    data.save_checkin({"date": "2026-10-15", "gym": 1})
+    release.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    df = data.checkins()
+    assert _dates(data) == ["2026-10-13", "2026-10-14", "2026-10-15"]
+    # The local saves win for their days; the edit elsewhere is kept for its day
+    assert df["mood"].tolist()[0] == 5
+    assert df["work"].tolist()[1:] == [0, 0]
+    assert queue.pending() == {"data"}
+
+
+def test_rows_appended_elsewhere_are_pulled_in(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-14", "1", "4"]])
+    pool, queue = _pool(), _Queue()
+    hydrate(pool, data, queue)
+    # Hydration created the list worksheets, so the first pull reads once more
+    pull_remote_changes(pool, data, queue)
+    version = data.version("data")
+    fg.reset_calls()
+    pull_remote_changes(pool, data, queue)
+    # Unchanged revision: nothing is read
+    assert fg.snapshot_calls() == {"get_lastUpdateTime": 1}
+    spreadsheet.sheets["data"].append_row(["2026-10-15", "0", "5"])
+    pull_remote_changes(pool, data, queue)
+    assert fg.snapshot_calls()["values_batch_get"] == 1
+    assert _dates(data) == ["2026-10-14", "2026-10-15"]
+    assert data.checkins()["mood"].tolist() == [4, 5]
+    assert data.version("data") != version
+    assert queue.pending() == set()
+
+
+def test_edits_above_the_last_row_are_pulled_in(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-13", "1", "3"], ["2026-10-14", "1", "4"]])
+    pool, queue = _pool(), _Queue()
+    hydrate(pool, data, queue)
+    # The last row is untouched; only the first one changes
+    spreadsheet.sheets["data"].update_cell(2, 3, "1")
+    pull_remote_changes(pool, data, queue)
+    assert data.checkins()["mood"].tolist() == [1, 4]
+    assert queue.pending() == set()
+    # The reloaded rows are the new baseline for the next pull
+    spreadsheet.sheets["data"].append_row(["2026-10-15", "0", "5"])
+    pull_remote_changes(pool, data, queue)
+    assert data.checkins()["mood"].tolist() == [1, 4, 5]
+
+
+def test_data_lock_is_free_while_the_sheet_is_read(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-14", "1", "4"]])
+    pool, queue = _pool(), _Queue()
+    hydrate(pool, data, queue)
+    spreadsheet.sheets["data"].append_row(["2026-10-15", "1", "5"])
+    started, release = _stall(spreadsheet)
+    thread = _in_background(pull_remote_changes, pool, data, queue)
+    assert started.wait(5)
+    assert data.lock.acquire(timeout=1)
+    data.lock.release()
+    release.set()
+    thread.join(5)
+    assert _dates(data) == ["2026-10-14", "2026-10-15"]
+
+
+# -------- Delta sync --------
+HEADER = ["date", "work", "mood"]
+
+
+def _synced_sheet(spreadsheet, title, values):
+    spreadsheet.seed(title, values)
+    pool = _pool()
+    ws = pool.worksheet(title)
+    _remember_sheet_rows(pool, title, values[0], values[1:])
+    fg.reset_calls()
+    return pool, ws
+
+
+def test_sheet_rows_sends_changed_and_new_rows_in_one_request(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "data", [HEADER, ["2026-10-01", 1, 3], ["2026-10-02", 0, 4]])
+    rows = [["2026-10-01", 1, 3], ["2026-10-02", 1, 4], ["2026-10-03", 1, 5]]
+    _sync_sheet_rows(pool, ws, HEADER, rows)
+    assert fg.snapshot_calls() == {"batch_update": 1}
+    assert spreadsheet.sheets["data"]._trimmed()[1:] == [[str(v) for v in r] for r in rows]
+    # Nothing changed since: no request at all
+    fg.reset_calls()
+    _sync_sheet_rows(pool, ws, HEADER, rows)
+    assert fg.snapshot_calls() == {}
+
+
+def test_sheet_rows_reads_unknown_state_first(spreadsheet):
+    spreadsheet.seed("data", [HEADER, ["2026-10-01", "1", "3"]])
+    pool = _pool()
+    ws = pool.worksheet("data")
+    fg.reset_calls()
+    _sync_sheet_rows(pool, ws, HEADER, [["2026-10-01", 1, 3], ["2026-10-02", 0, 2]])
+    assert fg.snapshot_calls() == {"get_all_values": 1, "batch_update": 1}
+
+
+def test_sheet_rows_appends_past_the_grid(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "data", [HEADER, ["2026-10-01", 1, 3]])
+    spreadsheet.sheets["data"].row_count = 2
+    _sync_sheet_rows(pool, ws, HEADER, [["2026-10-01", 1, 3], ["2026-10-02", 1, 4]])
+    assert fg.snapshot_calls() == {"append_rows": 1}
+    assert spreadsheet.sheets["data"]._trimmed()[-1] == ["2026-10-02", "1", "4"]
+
+
+def test_sheet_rows_refuses_fewer_rows(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "data", [HEADER, ["2026-10-01", 1, 3], ["2026-10-02", 0, 4]])
+    with pytest.raises(ValueError):
+        _sync_sheet_rows(pool, ws, HEADER, [["2026-10-01", 1, 3]])
+    assert fg.snapshot_calls() == {}
+    assert "data" not in pool.synced
+    assert len(spreadsheet.sheets["data"]._trimmed()) == 3
+
+
+def test_compact_refuses_before_the_sheet_is_read(spreadsheet, data):
+    spreadsheet.seed("data", [["date", "work", "mood"], ["2026-10-01", "1", "3"]])
+    pool = _pool()
+    with pytest.raises(ValueError):
+        compact(pool, data)
+    assert len(spreadsheet.sheets["data"]._trimmed()) == 2
+    hydrate(pool, data, _Queue())
+    data.save_checkin({"date": "2026-10-02", "gym": 1})
+    compact(pool, data)
+    assert [r[0] for r in spreadsheet.sheets["data"]._trimmed()[1:]] == ["2026-10-01", "2026-10-02"]
+
+
+def test_sheet_rows_rewrites_on_header_change(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "data", [HEADER, ["2026-10-01", 1, 3]])
+    header = HEADER + ["gym"]
+    _sync_sheet_rows(pool, ws, header, [["2026-10-01", 1, 3, 1]])
+    assert fg.snapshot_calls() == {"update": 1}
+    assert spreadsheet.sheets["data"]._trimmed() == [header, ["2026-10-01", "1", "3", "1"]]
+    assert pool.synced["data"]["header"] == header
+
+
+LIST_HEADER = ["title", "status"]
+
+
+def test_list_rows_single_cell_change_is_one_cell_update(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "books", [LIST_HEADER, ["Dune", "Reading"], ["Emma", "Reading"]])
+    assert _sync_list_rows(pool, ws, LIST_HEADER, {1: {"title": "Emma", "status": "Finished"}})
+    assert fg.snapshot_calls() == {"update_cell": 1}
+    assert spreadsheet.sheets["books"]._trimmed()[2] == ["Emma", "Finished"]
+    assert pool.synced["books"]["rows"][1] == ["Emma", "Finished"]
+
+
+def test_list_rows_new_and_changed_rows_share_one_request(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "books", [LIST_HEADER, ["Dune", "Reading"]])
+    delta = {0: {"title": "Dune", "status": "Finished"}, 1: {"title": "Emma", "status": "Reading"}}
+    assert _sync_list_rows(pool, ws, LIST_HEADER, delta)
+    assert fg.snapshot_calls() == {"batch_update": 1}
+    assert spreadsheet.sheets["books"]._trimmed() == [LIST_HEADER, ["Dune", "Finished"], ["Emma", "Reading"]]
+    # An unchanged row in the delta sends nothing
+    fg.reset_calls()
+    assert _sync_list_rows(pool, ws, LIST_HEADER, {0: {"title": "Dune", "status": "Finished"}})
+    assert fg.snapshot_calls() == {}
+
+
+def test_list_rows_falls_back_when_state_is_unknown(spreadsheet):
+    pool, ws = _synced_sheet(spreadsheet, "books", [LIST_HEADER, ["Dune", "Reading"]])
+    # A gap after the persisted rows, a different header, or no state at all
+    assert not _sync_list_rows(pool, ws, LIST_HEADER, {2: {"title": "Emma", "status": "Reading"}})
+    assert not _sync_list_rows(pool, ws, ["title"], {0: {"title": "Dune"}})
+    pool.synced.clear()
+    assert not _sync_list_rows(pool, ws, LIST_HEADER, {0: {"title": "Dune", "status": "Finished"}})
+    assert fg.snapshot_calls() == {}
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from progress_tracker.datastore import TrackerData
+from progress_tracker.snapshot import SNAPSHOT_FILE, Snapshot
+from progress_tracker.storage import coerce_checkins, open_store
+
+pytest.importorskip("pyarrow")
+
+
+def test_snapshot_matches_only_its_version(tmp_path):
+    store = open_store(str(tmp_path))
+    store.save_checkins(coerce_checkins(pd.DataFrame({"date": ["2026-10-15"], "work": [1], "mood": [4]})))
+    df = coerce_checkins(store.load_checkins())
+    snapshot = Snapshot(str(tmp_path / SNAPSHOT_FILE))
+    assert snapshot.save(df, store.version("data"))
+    pd.testing.assert_frame_equal(snapshot.load(store.version("data")), df)
+    assert snapshot.load(("csv", "elsewhere", 0, 0)) is None
+    (tmp_path / SNAPSHOT_FILE).write_bytes(b"not arrow")
+    assert snapshot.load(store.version("data")) is None
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_saves_keep_the_snapshot_current(tmp_path, backend, monkeypatch):
+    store = open_store(str(tmp_path), backend)
+    data = TrackerData(store, Snapshot(str(tmp_path / SNAPSHOT_FILE)))
+    data.save_checkin({"date": "2026-10-14", "gym": 1})
+    data.save_checkin({"date": "2026-10-15", "mood": 4})
+    # A fresh process loads the snapshot instead of parsing the store
+    monkeypatch.setattr(store, "load_checkins", lambda: pytest.fail("parsed the store"))
+    again = TrackerData(store, Snapshot(str(tmp_path / SNAPSHOT_FILE)))
+    pd.testing.assert_frame_equal(again.checkins(), data.checkins())
+
+
+def test_stale_snapshot_is_rebuilt(tmp_path):
+    store = open_store(str(tmp_path))
+    data = TrackerData(store, Snapshot(str(tmp_path / SNAPSHOT_FILE)))
+    data.save_checkin({"date": "2026-10-14", "gym": 1})
+    # Another writer changes data.csv behind the snapshot's back
+    store.save_checkins(coerce_checkins(pd.DataFrame({"date": ["2026-10-14", "2026-10-16"], "gym": [0, 1]})))
+    fresh = TrackerData(store, Snapshot(str(tmp_path / SNAPSHOT_FILE)))
+    assert fresh.checkins()["gym"].tolist() == [0, 1]
+    assert Snapshot(str(tmp_path / SNAPSHOT_FILE)).load(store.version("data")) is not None
+
+
+def test_failed_snapshot_write_keeps_the_old_file(tmp_path):
+    snapshot = Snapshot(str(tmp_path / SNAPSHOT_FILE))
+    df = coerce_checkins(pd.DataFrame({"date": ["2026-10-15"], "work": [1]}))
+    assert snapshot.save(df, ("csv", "x", 1, 1))
+    # A frame pyarrow cannot convert fails the write; nothing is left behind
+    assert not snapshot.save(pd.DataFrame({"bad": [object()]}), ("csv", "x", 2, 2))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [SNAPSHOT_FILE]
+    pd.testing.assert_frame_equal(snapshot.load(("csv", "x", 1, 1)), df)
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from progress_tracker.datastore import TrackerData
+from progress_tracker.storage import (
+    BOOK_COLUMNS,
+    DEFAULT_DATA_COLUMNS,
+    CSVStore,
+    SQLiteStore,
+    atomic_write,
+    atomic_write_text,
+    coerce_checkins,
+    ensure_checkin_columns,
+    serialize_checkins,
+    upsert_checkin_row,
+)
+
+
+def _checkin(day, **values):
+    row = dict.fromkeys(DEFAULT_DATA_COLUMNS, 0)
+    row.update({"date": day, "learning_type": "None", "reading_book": "",
+                "entertainment_item": "", "mood": 3, "notes": ""})
+    row.update(values)
+    return row
+
+
+def _dates(df):
+    return df["date"].dt.strftime("%Y-%m-%d").tolist()
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "csv":
+        return CSVStore(str(tmp_path / "data.csv"), str(tmp_path / "books.csv"), str(tmp_path / "entertainment.csv"))
+    return SQLiteStore(str(tmp_path / "tracker.db"))
+
+
+def test_upsert_checkin_row_replaces_the_same_day():
+    df = pd.DataFrame([_checkin("2026-10-01"), _checkin("2026-10-02")])
+    df = upsert_checkin_row(df, _checkin("2026-10-02", gym=1, mood=5))
+    assert _dates(df) == ["2026-10-01", "2026-10-02"]
+    assert df["gym"].tolist() == [0, 1]
+    df = upsert_checkin_row(df, _checkin("2026-10-03"))
+    assert len(df) == 3
+
+
+def test_saving_a_day_twice_keeps_one_row(store):
+    store.upsert_checkin(_checkin("2026-10-01", work=1, notes="first"))
+    store.upsert_checkin(_checkin("2026-10-02", notes="second"))
+    store.upsert_checkin(_checkin("2026-10-01", work=0, notes="again"))
+    df = ensure_checkin_columns(store.load_checkins())
+    assert df["date"].tolist() == ["2026-10-01", "2026-10-02"]
+    assert df["work"].tolist() == [0, 0]
+    assert df["notes"].tolist() == ["again", "second"]
+
+
+def test_every_save_changes_the_version(store):
+    before = store.version("data")
+    store.upsert_checkin(_checkin("2026-10-01"))
+    assert store.version("data") != before
+    books = store.version("books")
+    store.save_books(pd.DataFrame({"title": ["Dune"], "finished": [0]}))
+    assert store.version("books") != books
+
+
+def test_sqlite_loads_check_ins_in_date_order(tmp_path):
+    store = SQLiteStore(str(tmp_path / "tracker.db"))
+    for day in ["2026-10-03", "2026-10-01", "2026-10-02"]:
+        store.upsert_checkin(_checkin(day))
+    assert store.load_checkins()["date"].tolist() == ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+
+def test_lists_keep_their_order(store):
+    books = pd.DataFrame({"title": ["Emma", "Dune", "Anna"], "finished": [0, 1, 0]})
+    store.save_books(books)
+    store.save_books(books.iloc[[0, 2]])
+    assert store.load_books()[BOOK_COLUMNS].values.tolist() == [["Emma", 0], ["Anna", 0]]
+
+
+def test_sqlite_uses_wal_and_a_date_key(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    store = SQLiteStore(path)
+    store.upsert_checkin(_checkin("2026-10-01"))
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO checkins (date) VALUES ('2026-10-01')")
+
+
+def test_sqlite_imports_the_csv_files(tmp_path):
+    csv = CSVStore(str(tmp_path / "data.csv"), str(tmp_path / "books.csv"), str(tmp_path / "entertainment.csv"))
+    csv.save_checkins(pd.DataFrame([_checkin("2026-10-01", gym=1), _checkin("2026-10-02")]))
+    csv.save_books(pd.DataFrame({"title": ["Dune"], "finished": [1]}))
+    store = SQLiteStore(str(tmp_path / "tracker.db"))
+    assert store.load_checkins().empty
+    store.import_from(csv)
+    assert store.load_checkins()["gym"].tolist() == [1, 0]
+    assert store.load_books().values.tolist() == [["Dune", 1]]
+    assert store.load_entertainment().empty
+
+
+def test_coerce_checkins_types_and_clips():
+    df = coerce_checkins(pd.DataFrame([
+        _checkin("2026-10-01", work="1", work_minutes=2000, mood=9, reading_book=" Dune "),
+        _checkin("not a date", gym=3, gym_minutes=-5, mood="", learning_type=None),
+    ]))
+    assert str(df["date"].dtype).startswith("datetime64")
+    assert df["date"].isna().tolist() == [False, True]
+    assert df["work"].dtype == "int8" and df["work_minutes"].dtype == "int16"
+    assert df["work_minutes"].tolist() == [1440, 0]
+    assert df["gym"].tolist() == [0, 1]
+    assert df["mood"].tolist()[0] == 5 and df["mood"].isna().tolist() == [False, True]
+    assert isinstance(df["reading_book"].dtype, pd.CategoricalDtype)
+    assert df["reading_book"].tolist() == ["Dune", ""]
+    assert df["learning_type"].tolist() == ["None", ""]
+
+
+def test_typed_frame_round_trips_through_csv(tmp_path):
+    store = CSVStore(str(tmp_path / "data.csv"), str(tmp_path / "books.csv"), str(tmp_path / "entertainment.csv"))
+    df = coerce_checkins(pd.DataFrame([_checkin("2026-10-01", learning=1), _checkin("2026-10-02", notes="ok")]))
+    store.save_checkins(df)
+    assert serialize_checkins(df)["date"].tolist() == ["2026-10-01", "2026-10-02"]
+    # "None" is a learning type, not a missing value
+    again = coerce_checkins(store.load_checkins())
+    assert again["learning_type"].tolist() == ["None", "None"]
+    pd.testing.assert_frame_equal(again, df)
+
+
+def test_list_items_are_appended_and_finished_by_title(store):
+    store.append_item("books", {"title": "Dune", "finished": 0})
+    store.append_item("books", {"title": "Emma", "finished": 0})
+    store.update_item("books", "Emma", {"finished": 1})
+    store.update_item("books", "Missing", {"finished": 1})
+    books = store.load_books()[BOOK_COLUMNS]
+    assert books["title"].tolist() == ["Dune", "Emma"]
+    assert books["finished"].astype(int).tolist() == [0, 1]
+    store.append_item("entertainment", {"title": "Alien", "item_type": "Movie", "finished": 0})
+    assert store.load_entertainment()["item_type"].tolist() == ["Movie"]
+
+
+def test_one_non_iso_date_does_not_void_the_others():
+    # Left to infer the format, pandas took it from the first row
+    df = coerce_checkins(pd.DataFrame([_checkin("10/02/2026"), _checkin("2026-10-03"), _checkin("2026-10-04")]))
+    assert df["date"].isna().tolist() == [True, False, False]
+    assert _dates(df.dropna(subset=["date"])) == ["2026-10-03", "2026-10-04"]
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / "out.txt")
+    atomic_write_text(path, "one")
+    atomic_write_text(path, "two")
+    assert open(path, encoding="utf-8").read() == "two"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_failed_atomic_write_keeps_old_file(tmp_path):
+    path = str(tmp_path / "out.txt")
+    atomic_write_text(path, "kept")
+
+    def broken(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("half")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(path, broken)
+    assert open(path, encoding="utf-8").read() == "kept"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_saving_the_history_drops_days_it_no_longer_has(store):
+    store.save_checkins(pd.DataFrame([_checkin(f"2026-10-0{d}") for d in (1, 2, 3)]))
+    store.save_checkins(pd.DataFrame([_checkin("2026-10-02", gym=1)]))
+    df = ensure_checkin_columns(store.load_checkins())
+    assert df["date"].tolist() == ["2026-10-02"]
+    assert df["gym"].astype(int).tolist() == [1]
+    # A single-day upsert still leaves the other days alone
+    store.upsert_checkin(_checkin("2026-10-05"))
+    assert store.load_checkins()["date"].tolist() == ["2026-10-02", "2026-10-05"]
+
+
+def test_replaced_history_has_no_ghost_rows_after_a_restart(tmp_path):
+    data = TrackerData(SQLiteStore(str(tmp_path / "tracker.db")))
+    for day in ("2026-10-01", "2026-10-02", "2026-10-03"):
+        data.save_checkin(_checkin(day))
+    data.replace("data", pd.DataFrame([_checkin("2026-10-03", notes="kept")]))
+    assert _dates(data.checkins()) == ["2026-10-03"]
+    restarted = SQLiteStore(str(tmp_path / "tracker.db"))
+    assert restarted.load_checkins()["notes"].tolist() == ["kept"]
+    assert sum(len(chunk) for chunk in restarted.iter_checkins(10)) == 1
+
+
+def test_list_items_are_finished_ignoring_case_and_spaces(store):
+    store.append_item("books", {"title": "Straße", "finished": 0})
+    store.append_item("books", {"title": "Emma", "finished": 0})
+    store.update_item("books", "  STRASSE ", {"finished": 1})
+    store.update_item("books", "emma", {"finished": 1})
+    assert store.load_books()["finished"].astype(int).tolist() == [1, 1]
+    version = store.version("books")
+    store.update_item("books", "Missing", {"finished": 1})
+    assert store.version("books") == version
@@ -0,0 +1,146 @@
+import json
+import threading
+
+import pytest
+
+from progress_tracker import sync
+from progress_tracker.sync import SyncQueue, is_retryable
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.response = _Response(status_code)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(sync, "MAX_BACKOFF_SECONDS", 0.01)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "journal.json")
+
+
+def _pending(journal):
+    with open(journal, encoding="utf-8") as f:
+        return json.load(f)["pending"]
+
+
+def test_saves_during_a_push_coalesce_into_one_more_push(journal):
+    pushing = threading.Event()
+    release = threading.Event()
+    pushes = []
+
+    def push(name):
+        pushes.append(name)
+        if len(pushes) == 1:
+            pushing.set()
+            release.wait(5)
+
+    queue = SyncQueue(journal, push)
+    queue.start()
+    queue.enqueue("data")
+    assert pushing.wait(5)
+    for _ in range(5):
+        queue.enqueue("data")
+    release.set()
+    assert queue.flush(5)
+    assert pushes == ["data", "data"]
+    assert queue.pending() == set()
+    assert _pending(journal) == []
+
+
+def test_retryable_error_is_retried(journal):
+    failures = [ConnectionError("reset"), _APIError(503)]
+    pushes = []
+
+    def push(name):
+        pushes.append(name)
+        if failures:
+            raise failures.pop(0)
+
+    queue = SyncQueue(journal, push)
+    queue.start()
+    queue.enqueue("data")
+    assert queue.flush(5)
+    assert len(pushes) == 3
+    assert queue.status()["data"]["state"] == "synced"
+
+
+def test_gives_up_after_max_attempts(journal):
+    pushes = []
+
+    def push(name):
+        pushes.append(name)
+        raise _APIError(429)
+
+    queue = SyncQueue(journal, push, max_attempts=3)
+    queue.start()
+    queue.enqueue("data")
+    assert not queue.flush(5)
+    assert len(pushes) == 3
+    status = queue.status()["data"]
+    assert status["state"] == "failed"
+    assert "429" in status["error"]
+    assert _pending(journal) == ["data"]
+
+
+def test_failed_target_is_pushed_again_by_retry_failed(journal):
+    broken = [True]
+    pushes = []
+
+    def push(name):
+        pushes.append(name)
+        if broken[0]:
+            raise _APIError(400)
+
+    queue = SyncQueue(journal, push)
+    queue.start()
+    queue.enqueue("books")
+    assert not queue.flush(5)
+    # Not retryable: one attempt only
+    assert pushes == ["books"]
+    broken[0] = False
+    queue.retry_failed()
+    assert queue.flush(5)
+    assert pushes == ["books", "books"]
+
+
+def test_journal_replays_after_restart(journal):
+    queue = SyncQueue(journal, lambda name: None)
+    queue.enqueue("data")
+    queue.enqueue("books")
+    assert _pending(journal) == ["books", "data"]
+
+    pushes = []
+    queue = SyncQueue(journal, pushes.append)
+    assert queue.pending() == {"books", "data"}
+    queue.start()
+    assert queue.flush(5)
+    assert sorted(pushes) == ["books", "data"]
+    assert _pending(journal) == []
+
+
+def test_is_retryable():
+    assert is_retryable(_APIError(429))
+    assert is_retryable(_APIError(500))
+    assert not is_retryable(_APIError(403))
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError())
+
+
+def test_failed_journal_write_leaves_no_tmp_file(tmp_path):
+    # The rename onto a directory fails; the queue carries on without a journal
+    (tmp_path / "journal.json").mkdir()
+    queue = SyncQueue(str(tmp_path / "journal.json"), lambda name: None)
+    queue.enqueue("data")
+    assert queue.pending() == {"data"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["journal.json"]
@@ -0,0 +1,120 @@
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+from progress_tracker.datastore import ItemList, TrackerData
+from progress_tracker.storage import SQLiteStore
+from progress_tracker.tenants import TenantCache, tenant_dir, tenant_key
+
+
+def test_tenant_key_is_stable_and_distinct():
+    assert tenant_key("Ann.Lee") == tenant_key(" Ann.Lee ")
+    assert tenant_key("Ann.Lee") != tenant_key("ann-lee")
+    assert tenant_key("Ann.Lee").startswith("ann-lee-")
+    assert tenant_key("../..").startswith("user-")
+
+
+def test_tenant_dir_keeps_the_single_user_layout():
+    assert tenant_dir("/app", None) == "/app"
+    assert tenant_dir("/app", "ann") == os.path.join("/app", "tenants", "ann")
+
+
+def test_least_recently_used_is_evicted():
+    evicted = []
+    cache = TenantCache(lambda key: {"key": key}, max_tenants=2, on_evict=lambda k, e: evicted.append(k))
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert evicted == ["b"]
+    assert len(cache) == 2
+
+
+def test_busy_entry_is_kept():
+    cache = TenantCache(lambda key: key, max_tenants=1, can_evict=lambda key, entry: key != "a")
+    cache.get("a")
+    cache.get("b")
+    cache.get("c")
+    assert len(cache) == 2
+
+
+def test_evicts_by_size():
+    cache = TenantCache(lambda key: key, max_bytes=10, size=lambda entry: 6)
+    cache.get("a")
+    cache.get("b")
+    assert len(cache) == 1
+
+
+def test_memory_bytes_follow_the_loaded_frames(tmp_path):
+    base = tenant_dir(str(tmp_path), "ann")
+    os.makedirs(base)
+    data = TrackerData(SQLiteStore(os.path.join(base, "tracker.db")))
+    assert data.memory_bytes() == 0
+    data.save_checkin({"date": "2026-10-01", "notes": "x" * 1000})
+    small = data.memory_bytes()
+    assert small > 1000
+    data.add_item("books", "Dune")
+    assert data.memory_bytes() > small
+
+
+def test_memory_bytes_count_the_aggregates_and_analytics(tmp_path):
+    data = TrackerData(SQLiteStore(str(tmp_path / "tracker.db")))
+    for day in range(1, 29):
+        data.save_checkin({"date": f"2026-10-{day:02d}", "gym": 1, "mood": 3})
+    frames = data.memory_bytes()
+    data.aggregates()
+    with_aggregates = data.memory_bytes()
+    assert with_aggregates > frames + 28 * 1000
+    data.analytics(date(2026, 10, 28))
+    assert data.memory_bytes() > with_aggregates
+    # Saved days keep the aggregates current and counted
+    data.save_checkin({"date": "2026-10-29", "gym": 1})
+    assert data.memory_bytes() > with_aggregates
+
+
+def test_sizes_are_kept_without_rescanning(tmp_path, monkeypatch):
+    data = TrackerData(SQLiteStore(str(tmp_path / "tracker.db")))
+    data.save_checkin({"date": "2026-10-01", "gym": 1})
+    data.add_item("books", "Dune")
+    before = data.memory_bytes()
+
+    def scan(*args, **kwargs):
+        raise AssertionError("frame rescanned")
+
+    monkeypatch.setattr(pd.DataFrame, "memory_usage", scan)
+    data.save_checkin({"date": "2026-10-02", "notes": "x" * 500})
+    data.save_checkin({"date": "2026-10-02", "notes": "y"})
+    data.add_item("books", "Emma")
+    data.finish_item("books", "Dune")
+    assert data.memory_bytes() > before + 500
+
+
+def test_item_list_size_follows_adds_and_sets():
+    items = ItemList(["title", "author", "finished"])
+    items.add({"title": "Dune", "author": "", "finished": 0})
+    items.set(0, {"title": "Dune", "author": "Frank Herbert", "finished": 1})
+    items.add({"title": "Emma", "author": "", "finished": 0})
+    rebuilt = ItemList(items.columns, items.frame())
+    assert items.memory_bytes() == rebuilt.memory_bytes()
+
+
+def test_locked_tenant_does_not_block_others(tmp_path):
+    # A tenant holding its data lock (e.g. mid-hydration) must not stall
+    # lookups of other tenants, which measure every tenant's size
+    def opener(key):
+        data = TrackerData(SQLiteStore(os.path.join(tmp_path, f"{key}.db")))
+        data.checkins()
+        return data
+
+    cache = TenantCache(opener, size=lambda data: data.memory_bytes())
+    busy = cache.get("busy")
+    busy.lock.acquire()
+    try:
+        done = threading.Event()
+        threading.Thread(target=lambda: (cache.get("other"), done.set()), daemon=True).start()
+        assert done.wait(5)
+    finally:
+        busy.lock.release()
+    assert busy.memory_bytes() > 0
@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+
+from progress_tracker.datastore import TrackerData
+from progress_tracker.storage import open_store
+from progress_tracker.transfer import export_file, import_file
+
+
+def _history(path, days=500):
+    dates = pd.date_range("2025-06-03", periods=days).strftime("%Y-%m-%d")
+    pd.DataFrame({
+        "date": dates, "work": 1, "work_minutes": 90, "learning": 1, "learning_minutes": 30,
+        "learning_type": "Course", "mood": 3, "notes": "kept",
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def data(request, tmp_path):
+    return TrackerData(open_store(str(tmp_path / "tracker"), request.param))
+
+
+def test_import_validates_and_dedupes(data, tmp_path):
+    source = tmp_path / "in.csv"
+    source.write_text(
+        "date,work,work_minutes,mood,notes\n"
+        "2026-10-01,1,30,4,first\n"
+        "2026-13-01,1,30,4,bad date\n"
+        "2026-10-02,2,30,4,bad flag\n"
+        "2026-10-03,1,-5,4,bad minutes\n"
+        "2026-10-04,1,30,9,bad mood\n"
+        "2026-10-01,0,10,,second\n",
+        encoding="utf-8",
+    )
+    rejects = []
+    stats = import_file(data, str(source), "csv", chunk_rows=2, on_reject=rejects.append)
+    assert stats["read"] == 6
+    assert stats["rejected"] == 4
+    assert stats["added"] == 1
+    assert stats["duplicates"] == 1
+    assert [r["reason"] for r in rejects] == ["invalid date", "invalid work", "invalid work_minutes", "invalid mood"]
+    df = data.checkins()
+    assert len(df) == 1
+    assert df["notes"].iloc[0] == "second"
+    assert pd.isna(df["mood"].iloc[0])
+
+
+def test_partial_columns_keep_stored_values(data, tmp_path):
+    _history(tmp_path / "history.csv")
+    import_file(data, str(tmp_path / "history.csv"), "csv")
+    (tmp_path / "patch.csv").write_text("date,work,mood\n2026-10-15,0,5\n", encoding="utf-8")
+    stats = import_file(data, str(tmp_path / "patch.csv"), "csv")
+    assert (stats["added"], stats["replaced"]) == (0, 1)
+    df = data.checkins()
+    day = df[df["date"] == "2026-10-15"].iloc[0]
+    assert (day["work"], day["mood"]) == (0, 5)
+    assert (day["work_minutes"], day["learning_minutes"], day["learning_type"], day["notes"]) == (90, 30, "Course", "kept")
+    # What the backend holds, not just the in-memory frame
+    reread = TrackerData(data.backend).checkins()
+    assert reread[reread["date"] == "2026-10-15"].iloc[0]["notes"] == "kept"
+    assert len(reread) == 500
+
+
+def test_keep_existing_skips_stored_dates(data, tmp_path):
+    _history(tmp_path / "history.csv", days=3)
+    import_file(data, str(tmp_path / "history.csv"), "csv")
+    (tmp_path / "more.csv").write_text("date,work\n2025-06-03,0\n2025-06-10,1\n", encoding="utf-8")
+    stats = import_file(data, str(tmp_path / "more.csv"), "csv", replace=False)
+    assert (stats["added"], stats["skipped"]) == (1, 1)
+    assert data.checkins()["work"].tolist() == [1, 1, 1, 1]
+
+
+def test_chunks_are_stored_once_per_file(data, tmp_path, monkeypatch):
+    _history(tmp_path / "history.csv", days=3)
+    import_file(data, str(tmp_path / "history.csv"), "csv")
+    writes = []
+    for name in ("save_checkins", "append_checkins"):
+        write = getattr(data.backend, name)
+        monkeypatch.setattr(data.backend, name, lambda df, write=write: (writes.append(len(df)), write(df))[1])
+    _history(tmp_path / "more.csv", days=50)
+    stats = import_file(data, str(tmp_path / "more.csv"), "csv", chunk_rows=7)
+    assert (stats["added"], stats["replaced"]) == (47, 3)
+    assert len(writes) == 1
+    assert len(data.checkins()) == 50
+
+
+def test_days_repeated_across_chunks_keep_the_last_without_replace(data, tmp_path):
+    (tmp_path / "in.csv").write_text("date,work\n2026-10-01,1\n2026-10-02,1\n2026-10-01,0\n", encoding="utf-8")
+    stats = import_file(data, str(tmp_path / "in.csv"), "csv", chunk_rows=2, replace=False)
+    assert (stats["added"], stats["duplicates"], stats["skipped"]) == (2, 1, 0)
+    assert data.checkins()["work"].tolist() == [0, 1]
+
+
+def test_unknown_column_fails_the_file(data, tmp_path):
+    (tmp_path / "in.csv").write_text("date,Work\n2026-10-01,1\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="unknown columns: Work"):
+        import_file(data, str(tmp_path / "in.csv"), "csv")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "parquet"])
+def test_export_round_trip(data, tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    _history(tmp_path / "history.csv", days=25)
+    import_file(data, str(tmp_path / "history.csv"), "csv")
+    out = str(tmp_path / f"out.{fmt}")
+    assert export_file(data.backend.iter_checkins(10), out, fmt) == 25
+    copy = TrackerData(open_store(str(tmp_path / "copy")))
+    assert import_file(copy, out, fmt)["added"] == 25
+    pd.testing.assert_frame_equal(copy.checkins(), data.checkins())
+
+
+def test_cli_import_with_rejects_and_sheet_sync(tmp_path):
+    from benchmarks import fake_gspread as fg
+    from progress_tracker.__main__ import main as cli
+
+    sheet = fg.FakeSpreadsheet()
+    restore = fg.install(sheet)
+    try:
+        _history(tmp_path / "history.csv", days=40)
+        with open(tmp_path / "history.csv", "a", encoding="utf-8") as f:
+            f.write("2026-13-01,1,30,1,30,Course,3,bad\n")
+        (tmp_path / "creds.json").write_text("{}", encoding="utf-8")
+        args = ["--dir", str(tmp_path / "tracker"), "--sheet-id", "sheet", "--credentials", str(tmp_path / "creds.json")]
+        status = cli(["import", str(tmp_path / "history.csv"), "--rejects", str(tmp_path / "rejects.csv"), *args])
+        # A rejected row makes the exit status 1; the good rows still land
+        assert status == 1
+        assert pd.read_csv(tmp_path / "rejects.csv")["reason"].tolist() == ["invalid date"]
+        assert len(sheet.sheets["data"]._trimmed()) == 41
+        fg.reset_calls()
+        assert cli(["export", str(tmp_path / "out.jsonl"), *args]) == 0
+        assert fg.snapshot_calls().get("batch_update", 0) == 0
+        assert len(pd.read_json(tmp_path / "out.jsonl", lines=True)) == 40
+    finally:
+        restore()